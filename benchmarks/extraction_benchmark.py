@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+EXTRACTORS = {
+    "import": ("documentor.import_extractor", "extract_api_details_import"),
+    "ast": ("documentor.ast_extractor", "extract_api_details_ast"),
+    "openapi": ("documentor.openapi_extractor", "extract_api_details_openapi"),
+}
+
+# Runs inside a fresh interpreter so the import-based path pays the real cost of importing
+# FastAPI and executing the API module, exactly as it does on every CLI invocation
+CHILD_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+from {module} import {function}
+endpoints = {function}({api_file!r}, {framework!r})
+elapsed = time.perf_counter() - start
+from documentor.tokens import count_tokens
+# Tokens of endpoint text each extractor puts into the prompts
+print(elapsed, len(endpoints), sum(count_tokens(endpoint.code) for endpoint in endpoints))
+"""
+
+
+def run_once(extractor, api_file, framework):
+    module, function = EXTRACTORS[extractor]
+    script = CHILD_SCRIPT.format(root=ROOT_DIR, module=module, function=function, api_file=api_file, framework=framework)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    wall_time = time.perf_counter() - start
+    extraction_time, endpoint_count, code_tokens = output.split()
+    return float(extraction_time), wall_time, int(endpoint_count), int(code_tokens)
+
+
+def benchmark(api_file, framework, repeats):
+    results = {}
+    for extractor in EXTRACTORS:
+        extraction_times, wall_times = [], []
+        for _ in range(repeats):
+            extraction_time, wall_time, endpoint_count, code_tokens = run_once(extractor, api_file, framework)
+            extraction_times.append(extraction_time)
+            wall_times.append(wall_time)
+        results[extractor] = {
+            "endpoints": endpoint_count,
+            "code_tokens": code_tokens,
+            "median_extraction_ms": statistics.median(extraction_times) * 1000,
+            "median_process_ms": statistics.median(wall_times) * 1000,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare import-based, AST-based and OpenAPI-based route extraction.")
+    parser.add_argument(
+        "--api_files",
+        nargs="+",
+        default=[
+            os.path.join(ROOT_DIR, "sample_inputs", "sample_apis.py"),
+            os.path.join(ROOT_DIR, "sample_inputs", "complex_api.py"),
+        ],
+        help="API files to extract routes from."
+    )
+    parser.add_argument("--framework", default="auto", help="Framework of the API files: auto, fastapi or flask (default: auto).")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh-interpreter runs per extractor (default: 5).")
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    all_results = {}
+    for api_file in args.api_files:
+        results = benchmark(api_file, args.framework, args.repeats)
+        all_results[api_file] = results
+        print(f"\n{api_file}")
+        for extractor, result in results.items():
+            print(
+                f"  {extractor:<7} {result['endpoints']:>4} endpoints  {result['code_tokens']:>6} code tokens  "
+                f"extraction {result['median_extraction_ms']:8.1f} ms  "
+                f"process {result['median_process_ms']:8.1f} ms"
+            )
+        speedup = results["import"]["median_extraction_ms"] / max(results["ast"]["median_extraction_ms"], 1e-6)
+        print(f"  ast extraction is {speedup:.0f}x faster")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(all_results, f, indent=4)
+        print(f"\nResults saved to {args.output}")
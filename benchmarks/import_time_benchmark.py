@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CLI = os.path.join(ROOT_DIR, "document_this.py")
+SAMPLE_API = os.path.join(ROOT_DIR, "sample_inputs", "sample_apis.py")
+
+# Stacks that take hundreds of milliseconds to import and must only load in the code path that uses them
+HEAVY_MODULES = ["langchain_core", "langchain_openai", "langchain_text_splitters", "openai", "fastapi", "pydantic"]
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def scenarios(output_dir):
+    """
+    Name -> (command, heavy modules it may import). Every command runs in a fresh interpreter.
+    """
+    cache_hit = [CLI, "-a", SAMPLE_API, "-o", output_dir, "-b", "fake"]
+    return {
+        "cli_help": ([CLI, "--help"], []),
+        "cli_invalid_mode": ([CLI, "-m", "unknown", "-o", output_dir], []),
+        # The response is in the cache after the warm-up run, so no chat model is ever built
+        "bulk_cache_hit": (cache_hit, []),
+        "bulk_cache_miss": ([CLI, "-a", SAMPLE_API, "-o", output_dir, "-b", "fake", "--no-cache"],
+                           ["langchain_core", "langchain_text_splitters", "pydantic"]),
+    }
+
+
+def parse_importtime(stderr):
+    """
+    Returns (total import microseconds, {top-level package: cumulative microseconds}).
+    """
+    total = 0
+    packages = {}
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, module = int(match.group(2)), match.group(3), match.group(4)
+        if not indent:
+            # Top-level entries already include everything they imported
+            total += cumulative
+        package = module.split(".")[0]
+        packages[package] = max(packages.get(package, 0), cumulative)
+    return total, packages
+
+
+def run(command):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + command, cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    wall_time = time.perf_counter() - start
+    total, packages = parse_importtime(result.stderr)
+    return wall_time, total, packages
+
+
+def benchmark(name, command, allowed, repeats):
+    wall_times, import_times = [], []
+    for _ in range(repeats):
+        wall_time, total, packages = run(command)
+        wall_times.append(wall_time)
+        import_times.append(total)
+    heavy = sorted(module for module in HEAVY_MODULES if module in packages)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "scenario": name,
+        "command": " ".join(os.path.relpath(part, ROOT_DIR) if part.startswith(ROOT_DIR) else part for part in command),
+        "median_wall_ms": statistics.median(wall_times) * 1000,
+        "median_import_ms": statistics.median(import_times) / 1000,
+        "heavy_modules": heavy,
+        "unexpected_heavy_modules": [module for module in heavy if module not in allowed],
+        "slowest_packages_ms": {package: cumulative / 1000 for package, cumulative in slowest},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure CLI start-up import time with python -X importtime.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh-interpreter runs per scenario (default: 5).")
+    parser.add_argument(
+        "--max_import_ms",
+        type=float,
+        default=None,
+        help="Fail when a scenario that must stay light spends longer than this importing (default: no limit)."
+    )
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    failures = []
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Warm-up run that fills the response cache for the cache-hit scenario
+        subprocess.run([sys.executable, CLI, "-a", SAMPLE_API, "-o", output_dir, "-b", "fake"],
+                       cwd=ROOT_DIR, check=True, capture_output=True)
+        for name, (command, allowed) in scenarios(output_dir).items():
+            result = benchmark(name, command, allowed, args.repeats)
+            results.append(result)
+            print(
+                f"{name:<18} wall {result['median_wall_ms']:7.1f} ms  imports {result['median_import_ms']:7.1f} ms  "
+                f"heavy: {', '.join(result['heavy_modules']) or '-'}"
+            )
+            print("    slowest: " + ", ".join(f"{package} {ms:.1f} ms" for package, ms in result["slowest_packages_ms"].items()))
+            if result["unexpected_heavy_modules"]:
+                failures.append(f"{name} imports {', '.join(result['unexpected_heavy_modules'])}")
+            if args.max_import_ms and not allowed and result["median_import_ms"] > args.max_import_ms:
+                failures.append(f"{name} spends {result['median_import_ms']:.1f} ms importing (limit {args.max_import_ms} ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results, "failures": failures}, f, indent=4)
+        print(f"\nResults saved to {args.output}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    # A non-zero exit lets CI fail when a heavy stack creeps back into a light path
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,323 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIR)
+
+from documentor.api_by_api_doc import APIDocumentationGenerator
+from documentor.bulk_api_doc import BulkAPIDocumentationGenerator
+from documentor.ast_extractor import extract_api_details_ast
+
+SAMPLE_FILES = [
+    os.path.join(ROOT_DIR, "sample_inputs", "sample_apis.py"),
+    os.path.join(ROOT_DIR, "sample_inputs", "complex_api.py"),
+]
+
+MODES = ["bulk", "api_by_api"]
+
+# Timings that count as a regression when they grow by more than --threshold against a baseline
+TRACKED_METRICS = ["extraction_ms", "prompt_build_ms", "wall_seconds", "peak_memory_mb"]
+
+# Smallest absolute increase of each metric that can count as a regression; below it run-to-run noise dominates
+MIN_REGRESSION_DELTA = {"extraction_ms": 5.0, "prompt_build_ms": 5.0, "wall_seconds": 0.1, "peak_memory_mb": 1.0}
+
+SYNTHETIC_HEADER = '''from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, Query
+from pydantic import BaseModel
+from typing import List, Optional
+
+app = FastAPI()
+
+
+def verify_token(x_token: str = Header(...)):
+    if x_token != "secret-token":
+        raise HTTPException(status_code=401, detail="Invalid token")
+'''
+
+SYNTHETIC_RESOURCE = '''
+
+class {model}(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+
+
+{resource}_router = APIRouter(prefix="/{resource}", dependencies=[Depends(verify_token)])
+{resource}_db = {{}}
+'''
+
+# One CRUD route per entry; a resource gets up to five of them
+SYNTHETIC_ROUTES = [
+    '''
+
+@{resource}_router.get("/", response_model=List[{model}])
+def list_{resource}(skip: int = Query(0, ge=0), limit: int = Query(10, le=100)):
+    """List {resource} with pagination."""
+    return list({resource}_db.values())[skip:skip + limit]
+''',
+    '''
+
+@{resource}_router.get("/{{item_id}}", response_model={model})
+def get_{resource}(item_id: int):
+    """Get one item of {resource} by id."""
+    if item_id not in {resource}_db:
+        raise HTTPException(status_code=404, detail="{model} not found")
+    return {resource}_db[item_id]
+''',
+    '''
+
+@{resource}_router.post("/", response_model={model}, status_code=201)
+def create_{resource}(item: {model}):
+    """Create an item of {resource}."""
+    if item.id in {resource}_db:
+        raise HTTPException(status_code=409, detail="{model} already exists")
+    {resource}_db[item.id] = item
+    return item
+''',
+    '''
+
+@{resource}_router.put("/{{item_id}}", response_model={model})
+def update_{resource}(item_id: int, item: {model}):
+    """Replace an item of {resource}."""
+    if item_id not in {resource}_db:
+        raise HTTPException(status_code=404, detail="{model} not found")
+    {resource}_db[item_id] = item
+    return item
+''',
+    '''
+
+@{resource}_router.delete("/{{item_id}}", status_code=204)
+def delete_{resource}(item_id: int):
+    """Delete an item of {resource}."""
+    {resource}_db.pop(item_id, None)
+''',
+]
+
+
+def synthetic_app_source(routes):
+    """
+    Source of a FastAPI app with exactly `routes` CRUD routes, spread over routers of five routes each.
+    """
+    parts = [SYNTHETIC_HEADER]
+    resources = []
+    for number in range(0, routes, len(SYNTHETIC_ROUTES)):
+        resource, model = f"resource{len(resources)}", f"Resource{len(resources)}"
+        resources.append(resource)
+        parts.append(SYNTHETIC_RESOURCE.format(resource=resource, model=model))
+        for template in SYNTHETIC_ROUTES[:routes - number]:
+            parts.append(template.format(resource=resource, model=model))
+    parts.append("\n\n" + "\n".join(f"app.include_router({resource}_router)" for resource in resources) + "\n")
+    return "".join(parts)
+
+
+def write_synthetic_app(directory, routes):
+    path = os.path.join(directory, f"synthetic_{routes}_routes.py")
+    with open(path, "w") as f:
+        f.write(synthetic_app_source(routes))
+    return path
+
+
+def build_generator(mode, api_file, output_dir, args):
+    backend_options = {"latency": args.latency, "output_tokens": args.output_tokens}
+    if mode == "bulk":
+        return BulkAPIDocumentationGenerator(
+            "gpt-4o-mini", api_file, output_dir, args.bulk_version, use_cache=False, chunk_tokens=args.chunk_tokens,
+            concurrency=args.concurrency, backend="fake", backend_options=backend_options
+        )
+    return APIDocumentationGenerator(
+        "gpt-4o-mini", api_file, output_dir, "auto", args.api_by_api_version, concurrency=args.concurrency,
+        use_cache=False, extractor=args.extractor, backend="fake", backend_options=backend_options
+    )
+
+
+def measure_preparation(mode, generator):
+    """
+    Time the work done before any LLM call: reading routes (or the file) and formatting the prompts.
+    """
+    start = time.perf_counter()
+    if mode == "bulk":
+        content = generator.extract_api_file_content()
+    else:
+        endpoints = generator.extract_api_details()
+    extraction = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if mode == "bulk":
+        generator.prompt.format(api_file_content=content)
+    else:
+        for endpoint in endpoints:
+            generator.format_prompt(endpoint)
+    return extraction, time.perf_counter() - start
+
+
+def run_pipeline(mode, api_file, args, trace_memory=False):
+    with tempfile.TemporaryDirectory() as output_dir:
+        generator = build_generator(mode, api_file, output_dir, args)
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        # The generators report progress on stdout, which would drown the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            generator.process_and_generate_documentation()
+        wall_time = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        return wall_time, peak, generator.metrics.summary()["totals"]["calls"]
+
+
+def benchmark(mode, api_file, args):
+    endpoint_count = len(extract_api_details_ast(api_file))
+    extraction_times, prompt_times, wall_times = [], [], []
+    for _ in range(args.repeats):
+        with tempfile.TemporaryDirectory() as output_dir:
+            extraction, prompt_build = measure_preparation(mode, build_generator(mode, api_file, output_dir, args))
+        extraction_times.append(extraction)
+        prompt_times.append(prompt_build)
+        wall_time, _, calls = run_pipeline(mode, api_file, args)
+        wall_times.append(wall_time)
+    # A separate traced run, tracemalloc slows allocation down too much to time the same run
+    _, peak, _ = run_pipeline(mode, api_file, args, trace_memory=True)
+    wall_seconds = statistics.median(wall_times)
+    return {
+        "input": os.path.relpath(api_file, ROOT_DIR) if api_file.startswith(ROOT_DIR) else os.path.basename(api_file),
+        "mode": mode,
+        "endpoints": endpoint_count,
+        "llm_calls": calls,
+        "extraction_ms": statistics.median(extraction_times) * 1000,
+        "prompt_build_ms": statistics.median(prompt_times) * 1000,
+        "wall_seconds": wall_seconds,
+        "endpoints_per_second": endpoint_count / wall_seconds if wall_seconds else None,
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, settings, baseline, threshold):
+    """
+    Print the change of every tracked metric against a baseline run; returns the regressions.
+
+    A metric regresses when it grew by more than threshold and by more than its MIN_REGRESSION_DELTA.
+    """
+    changed = {key: value for key, value in settings.items() if baseline.get("settings", {}).get(key) != value}
+    if changed:
+        print(f"\nWarning: settings differ from the baseline ({', '.join(sorted(changed))}), results are not comparable")
+    previous = {(result["input"], result["mode"]): result for result in baseline["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'}:")
+    for result in results:
+        old = previous.get((result["input"], result["mode"]))
+        if not old:
+            continue
+        changes = []
+        for metric in TRACKED_METRICS:
+            if not old.get(metric):
+                continue
+            change = result[metric] / old[metric] - 1
+            changes.append(f"{metric} {change:+.0%}")
+            if change > threshold and result[metric] - old[metric] > MIN_REGRESSION_DELTA[metric]:
+                regressions.append(f"{result['input']} [{result['mode']}] {metric}: {old[metric]:.2f} -> {result[metric]:.2f}")
+        print(f"  {result['input']:<40} {result['mode']:<11} " + ", ".join(changes))
+    for regression in regressions:
+        print(f"  REGRESSION {regression}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the bulk and api_by_api pipelines against the fake LLM backend."
+    )
+    parser.add_argument(
+        "--api_files",
+        nargs="+",
+        default=SAMPLE_FILES,
+        help="API files to benchmark (default: the files in sample_inputs/)."
+    )
+    parser.add_argument(
+        "--synthetic_routes",
+        nargs="*",
+        type=int,
+        default=[10, 100, 1000],
+        help="Also benchmark generated FastAPI apps with these numbers of routes (default: 10 100 1000)."
+    )
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES, help="Pipelines to benchmark (default: both).")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per fake LLM call (default: 0.05).")
+    parser.add_argument("--output_tokens", type=int, default=200, help="Tokens per fake LLM response (default: 200).")
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM calls in flight per pipeline (default: 8).")
+    parser.add_argument("--chunk_tokens", type=int, default=None, help="Split large files in bulk mode (default: off).")
+    parser.add_argument("--extractor", choices=["import", "ast", "openapi"], default="ast",
+                        help="api_by_api route extractor (default: ast).")
+    parser.add_argument("--bulk_version", default="v1", help="Bulk prompt version (default: v1).")
+    parser.add_argument("--api_by_api_version", default="v1", help="api_by_api prompt version (default: v1).")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per case, the median is reported (default: 3).")
+    parser.add_argument("--output", help="Path to write the results as JSON.")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare with.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown against the baseline reported as a regression (default: 0.2)."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as synthetic_dir:
+        api_files = list(args.api_files) + [write_synthetic_app(synthetic_dir, routes) for routes in args.synthetic_routes]
+        results = []
+        print(f"{'input':<40} {'mode':<11} {'endpoints':>9} {'calls':>6} {'extract ms':>10} {'prompt ms':>10} "
+              f"{'wall s':>8} {'endpoints/s':>11} {'peak MB':>8}")
+        for mode in args.modes if api_files else []:
+            # Untimed warm-up: the first run pays for lazy imports (LangChain, the fake model, asyncio),
+            # which would otherwise be charged to whichever case happens to be measured first
+            run_pipeline(mode, api_files[0], args)
+        for api_file in api_files:
+            for mode in args.modes:
+                result = benchmark(mode, api_file, args)
+                results.append(result)
+                print(
+                    f"{result['input']:<40} {mode:<11} {result['endpoints']:>9} {result['llm_calls']:>6} "
+                    f"{result['extraction_ms']:>10.2f} {result['prompt_build_ms']:>10.2f} {result['wall_seconds']:>8.2f} "
+                    f"{result['endpoints_per_second']:>11.1f} {result['peak_memory_mb']:>8.2f}"
+                )
+
+    report = {
+        "environment": {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "settings": {
+            key: getattr(args, key)
+            for key in ("latency", "output_tokens", "concurrency", "chunk_tokens", "extractor", "bulk_version",
+                        "api_by_api_version", "repeats")
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, report["settings"], json.load(f), args.threshold)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"\nResults saved to {args.output}")
+    # A non-zero exit lets CI fail on regressions
+    sys.exit(1 if regressions else 0)
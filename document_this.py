@@ -1,6 +1,9 @@
 import argparse
-from documentor.bulk_api_doc import BulkAPIDocumentationGenerator
-from documentor.api_by_api_doc import APIDocumentationGenerator
+# Only the light registries are imported up front; each mode imports its generator (and with it
+# the LLM stack) when it runs, so --help and invalid arguments return immediately
+from documentor.llm_backends import LLM_BACKENDS
+from documentor.batch_client import BATCH_CLIENTS
+import os
 def main():
     # Create argument parser
     parser = argparse.ArgumentParser(description="Generate API documentation using LLMs.")
@@ -10,7 +13,7 @@ def main():
         '-m', '--mode',
         type=str,
         default='bulk',
-        help='Mode of documentation generation. Options: bulk, api_by_api (default: bulk).'
+        help='Mode of documentation generation. Options: bulk, api_by_api, batch_submit, repository (default: bulk).'
     )
     # Add arguments
     parser.add_argument(
@@ -18,6 +21,10 @@ def main():
         default="/Users/neel/Developer/cmpe297_project/sample_inputs/sample_apis.py",
         help="Path to the API file to be documented (default: /Users/neel/Developer/cmpe297_project/sample_inputs/sample_apis.py)."
     )
+    parser.add_argument(
+        '-r', '--repo_dir',
+        help="Repository root to document in repository mode; every FastAPI/Flask route file under it is documented."
+    )
     parser.add_argument(
         '-o', '--output_dir',
         default="/Users/neel/Developer/cmpe297_project/output_docs",
@@ -28,38 +35,247 @@ def main():
         default="gpt-4o-mini",
         help="LLM model to use for generating documentation (default: gpt-4o-mini)."
     )
+    parser.add_argument(
+        '-b', '--backend',
+        choices=sorted(LLM_BACKENDS),
+        default='openai',
+        help="LLM backend. 'fake' is a deterministic offline model for benchmarking (default: openai)."
+    )
+    parser.add_argument(
+        '--fake_latency',
+        type=float,
+        default=0.0,
+        help="Simulated seconds per call for the fake backend (default: 0)."
+    )
+    parser.add_argument(
+        '--fake_output_tokens',
+        type=int,
+        default=200,
+        help="Approximate number of tokens returned per call by the fake backend (default: 200)."
+    )
+    parser.add_argument(
+        '--fake_throttle_rate',
+        type=float,
+        default=0.0,
+        help="Fraction of fake backend calls rejected with a simulated 429, to exercise retries (default: 0)."
+    )
+    parser.add_argument(
+        '--fake_server_rpm',
+        type=int,
+        default=0,
+        help="Requests per minute the fake backend accepts before answering 429 (default: 0, unlimited)."
+    )
+    parser.add_argument(
+        '--fake_prefix_cache',
+        action='store_true',
+        help="Simulate provider prompt caching in the fake backend: repeated prompt prefixes of 1024+ tokens are reported as cached and answered faster."
+    )
+    parser.add_argument(
+        '--rpm',
+        type=int,
+        default=None,
+        help="Requests-per-minute budget shared by all LLM calls of the run (default: unlimited)."
+    )
+    parser.add_argument(
+        '--tpm',
+        type=int,
+        default=None,
+        help="Tokens-per-minute budget shared by all LLM calls of the run (default: unlimited)."
+    )
+    parser.add_argument(
+        '--max_retries',
+        type=int,
+        default=5,
+        help="Retries with jittered exponential backoff for calls failing with 5xx or connection errors (default: 5). Throttled (429) calls pause every caller and have their own retry budget of 20."
+    )
     parser.add_argument(
         '-p', '--prompt_version',
         default="v1",
         help="Version of the prompt to use from the prompt file (default: v1)."
     )
+    parser.add_argument(
+        '-c', '--concurrency',
+        type=int,
+        default=None,
+        help="Number of endpoints (api_by_api mode, default: 1; repository mode, default: 8) or chunks (chunked bulk mode, default: 4) documented concurrently."
+    )
+    parser.add_argument(
+        '-ct', '--chunk_tokens',
+        type=int,
+        default=None,
+        help="In bulk mode, split API files larger than this many tokens at route boundaries and document the parts in parallel."
+    )
+    parser.add_argument(
+        '-e', '--extractor',
+        choices=['import', 'ast', 'openapi'],
+        default='import',
+        help="How api_by_api mode finds routes: 'import' executes the API module, 'ast' parses it without running it, 'openapi' builds each prompt from the FastAPI app's OpenAPI schema (default: import)."
+    )
+    parser.add_argument(
+        '-f', '--framework',
+        choices=['auto', 'fastapi', 'flask'],
+        default='auto',
+        help="Web framework of the API file(s); 'auto' detects it from the imports and app/router declarations (default: auto)."
+    )
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=None,
+        help="Number of worker processes extracting routes in repository mode (default: CPU count)."
+    )
+    parser.add_argument(
+        '--batch_client',
+        choices=sorted(BATCH_CLIENTS),
+        default='openai',
+        help="Batch client for batch_submit mode. 'local' runs the batch file through --backend on this machine (default: openai)."
+    )
+    parser.add_argument(
+        '--poll_interval',
+        type=int,
+        default=30,
+        help="Seconds between batch status checks in batch_submit mode (default: 30)."
+    )
+    parser.add_argument(
+        '-g', '--group_tokens',
+        type=int,
+        default=None,
+        help="In api_by_api mode, pack small endpoints with the same router prefix into one LLM request of at most this many tokens of endpoint code."
+    )
+    parser.add_argument(
+        '-cc', '--compact_code',
+        action='store_true',
+        help="Strip comments, long docstrings, large literals and duplicated functions from the code sent to the LLM, and report the token savings."
+    )
+    parser.add_argument(
+        '-t', '--template_threshold',
+        type=int,
+        default=None,
+        help="Document endpoints whose handler has at most this cyclomatic complexity from the route metadata, without an LLM call (api_by_api, batch_submit and repository modes; default: off)."
+    )
+    parser.add_argument(
+        '-i', '--incremental',
+        action='store_true',
+        help="In api_by_api mode, only regenerate endpoints whose handler source changed since the last run."
+    )
+    parser.add_argument(
+        '-s', '--stream',
+        action='store_true',
+        help="In api_by_api mode, print the documentation token by token as it is generated (only with --concurrency 1)."
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Always call the LLM instead of reusing cached responses from <output_dir>/.llm_cache."
+    )
 
     # Parse the arguments
     args = parser.parse_args()
 
+    backend_options = {}
+    if args.backend == 'fake':
+        backend_options = {
+            "latency": args.fake_latency,
+            "output_tokens": args.fake_output_tokens,
+            "throttle_rate": args.fake_throttle_rate,
+            "server_rpm": args.fake_server_rpm,
+            "prefix_cache": args.fake_prefix_cache
+        }
+    rate_limits = {"rpm": args.rpm, "tpm": args.tpm, "max_retries": args.max_retries}
+
     if args.mode == 'bulk':
+        from documentor.bulk_api_doc import BulkAPIDocumentationGenerator
+
         # Instantiate the documentation generator
         generator = BulkAPIDocumentationGenerator(
             model=args.model,
             api_file_path=args.api_file_path,
             output_dir=args.output_dir,
-            prompt_version=args.prompt_version
+            prompt_version=args.prompt_version,
+            use_cache=not args.no_cache,
+            chunk_tokens=args.chunk_tokens,
+            concurrency=args.concurrency or 4,
+            backend=args.backend,
+            backend_options=backend_options,
+            rate_limits=rate_limits,
+            compact_code=args.compact_code
         )
 
         # Process and generate documentation
         generator.process_and_generate_documentation()
     elif args.mode == 'api_by_api':
+        from documentor.api_by_api_doc import APIDocumentationGenerator
+
         # Instantiate the documentation generator
         generator = APIDocumentationGenerator(
             model=args.model,
             api_file_path=args.api_file_path,
             output_dir=args.output_dir,
             prompt_version=args.prompt_version,
-            framework="fastapi"
+            framework=args.framework,
+            concurrency=args.concurrency or 1,
+            use_cache=not args.no_cache,
+            incremental=args.incremental,
+            extractor=args.extractor,
+            backend=args.backend,
+            backend_options=backend_options,
+            stream_tokens=args.stream,
+            rate_limits=rate_limits,
+            compact_code=args.compact_code,
+            group_tokens=args.group_tokens,
+            template_threshold=args.template_threshold
         )
 
         # Process and generate documentation
         generator.process_and_generate_documentation()
+    elif args.mode == 'batch_submit':
+        from documentor.api_by_api_doc import APIDocumentationGenerator
+        from documentor.batch_client import create_batch_client
+
+        # Same endpoints and markdown layout as api_by_api, generated through a batch job
+        generator = APIDocumentationGenerator(
+            model=args.model,
+            api_file_path=args.api_file_path,
+            output_dir=args.output_dir,
+            prompt_version=args.prompt_version,
+            framework=args.framework,
+            use_cache=False,
+            extractor=args.extractor,
+            backend=args.backend,
+            backend_options=backend_options,
+            compact_code=args.compact_code,
+            template_threshold=args.template_threshold
+        )
+        client_options = {}
+        if args.batch_client == 'local':
+            client_options = {"backend": args.backend, "backend_options": backend_options}
+        batch_client = create_batch_client(
+            args.batch_client, os.path.join(args.output_dir, ".batches"), **client_options
+        )
+        generator.process_with_batch_submission(batch_client, poll_interval=args.poll_interval)
+    elif args.mode == 'repository':
+        if not args.repo_dir:
+            parser.error("--repo_dir is required in repository mode")
+        from documentor.repository_doc import RepositoryDocumentationGenerator
+
+        generator = RepositoryDocumentationGenerator(
+            model=args.model,
+            repo_dir=args.repo_dir,
+            output_dir=args.output_dir,
+            prompt_version=args.prompt_version,
+            concurrency=args.concurrency or 8,
+            processes=args.processes,
+            extractor=args.extractor,
+            use_cache=not args.no_cache,
+            backend=args.backend,
+            backend_options=backend_options,
+            rate_limits=rate_limits,
+            compact_code=args.compact_code,
+            framework=args.framework,
+            template_threshold=args.template_threshold
+        )
+        generator.process_and_generate_documentation()
+    else:
+        print(f"Invalid mode: {args.mode}. Use 'bulk', 'api_by_api', 'batch_submit' or 'repository'.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,342 @@
+from documentor.api_by_api_doc import APIDocumentationGenerator
+from documentor.routes import extract_routes
+from documentor.critic import StructuredCritic
+from documentor.llm_cache import LLMResponseCache
+from documentor.llm_backends import create_llm
+from documentor.metrics import RunMetrics
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
+import datetime
+import json
+import math
+import os
+import random
+import statistics
+import threading
+
+# Criteria the critic scores every endpoint's documentation on
+ENDPOINT_CRITERIA = {
+    "completeness": "Does the documentation cover the endpoint's purpose, methods, parameters, request body, responses and errors?",
+    "clarity": "Is it clear, well-structured and easy to understand for someone new to the API?",
+    "accuracy": "Does it describe exactly what the handler code does, without invented or missing behavior?",
+    "relevance": "Does it stay focused on what a user of this endpoint needs to know?"
+}
+
+ENDPOINT_INSTRUCTIONS = """You are a meticulous technical documentation reviewer.
+Each document below is documentation of the same API endpoint, written from the handler code that follows.
+Score every document on its own against the code; the documents are in random order and their order means nothing."""
+
+
+def t_quantile(p, df):
+    """
+    Quantile of Student's t distribution, from the normal quantile with the Cornish-Fisher expansion
+    (accurate to about 0.01 for df >= 3, and exact in the limit).
+    """
+    z = NormalDist().inv_cdf(p)
+    if df == math.inf:
+        return z
+    return (
+        z
+        + (z ** 3 + z) / (4 * df)
+        + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+        + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3)
+    )
+
+
+def mean_interval(values, alpha):
+    """
+    Mean and two-sided (1 - alpha) t confidence interval of values. Returns (mean, low, high).
+    """
+    mean = statistics.mean(values)
+    if len(values) < 2:
+        return mean, -math.inf, math.inf
+    half_width = t_quantile(1 - alpha / 2, len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+    return mean, mean - half_width, mean + half_width
+
+
+def look_alpha(alpha, look):
+    # Spending alpha / (k (k + 1)) at look k sums to alpha over any number of looks,
+    # so stopping as soon as an interval excludes zero keeps the overall error rate below alpha
+    return alpha / (look * (look + 1))
+
+
+def sample_endpoints(api_files, framework="auto", extractor="ast", seed=0):
+    """
+    Endpoints of all API files in the order they should be evaluated: shuffled within each file and
+    interleaved across files, so any prefix of the list is spread over every file.
+
+    Returns a list of (file_path, endpoint). Files that cannot be read are skipped.
+    """
+    rng = random.Random(seed)
+    per_file = []
+    for file_path in api_files:
+        try:
+            endpoints = extract_routes(file_path, framework, extractor)
+        except Exception as e:
+            print(f"Skipping {file_path}: {type(e).__name__}: {e}")
+            continue
+        rng.shuffle(endpoints)
+        per_file.append([(file_path, endpoint) for endpoint in endpoints])
+    rng.shuffle(per_file)
+    samples = []
+    for position in range(max((len(endpoints) for endpoints in per_file), default=0)):
+        samples.extend(endpoints[position] for endpoints in per_file if position < len(endpoints))
+    return samples
+
+
+class PromptABTest:
+    def __init__(self, model, api_files, prompt_versions, output_dir, framework="auto", extractor="ast",
+                 alpha=0.05, min_samples=5, max_samples=40, min_effect=0.0, critiques_per_sample=1,
+                 critic_temperature=None, workers=4, seed=0, use_cache=True, backend="openai",
+                 backend_options=None, rate_limits=None):
+        """
+        Compares api_by_api prompt versions on endpoints sampled across API files, and stops as soon
+        as the data picks a winner.
+
+        Every sampled endpoint is documented with each version still in the race and the documents
+        are critiqued together, so scores are paired by endpoint. After each round the paired
+        differences of the overall score between the leader and every other version get a
+        confidence interval at an alpha that shrinks with every look. A version whose interval lies
+        entirely below zero is dropped and costs no more calls. The test stops when one version is
+        left, when every remaining difference is within min_effect, or after max_samples endpoints.
+
+        :param api_files: API files to sample endpoints from
+        :param prompt_versions: api_by_api prompt versions to compare
+        :param alpha: Overall probability of declaring a winner that is not better
+        :param min_samples: Endpoints evaluated before the first decision
+        :param max_samples: Most endpoints evaluated before the test is called inconclusive
+        :param min_effect: Differences in overall score smaller than this are treated as a tie (0 = never)
+        :param critiques_per_sample: Critiques averaged per endpoint, to reduce critic noise
+        :param critic_temperature: Critic sampling temperature (default: 0 for one critique, 0.7 for several)
+        :param workers: Endpoints evaluated concurrently, which is also the number of endpoints per round
+        """
+        if len(prompt_versions) < 2:
+            raise ValueError("An A/B test needs at least two prompt versions")
+        self.model = model
+        self.api_files = api_files
+        self.prompt_versions = list(prompt_versions)
+        self.framework = framework
+        self.extractor = extractor
+        self.alpha = alpha
+        self.min_samples = max(2, min_samples)
+        self.max_samples = max(self.min_samples, max_samples)
+        self.min_effect = min_effect
+        self.critiques_per_sample = max(1, critiques_per_sample)
+        self.workers = max(1, workers)
+        self.seed = seed
+        self.now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.output_dir = os.path.join(output_dir, "critic_evaluations")
+        self.result_file_path = os.path.join(self.output_dir, f"ab_test_{self.now}.json")
+        self.report_file_path = os.path.join(self.output_dir, f"ab_test_{self.now}.report.json")
+
+        # Only used to format each version's prompt; the calls go through the shared LLMs below
+        self.generators = {
+            version: APIDocumentationGenerator(
+                model=model, api_file_path=api_files[0], output_dir=output_dir, framework=framework,
+                prompt_version=version, use_cache=False, extractor=extractor, backend=backend,
+                backend_options=backend_options, rate_limits=rate_limits
+            )
+            for version in self.prompt_versions
+        }
+
+        self.cache = LLMResponseCache(os.path.join(output_dir, ".llm_cache")) if use_cache else None
+        # Generation calls are labelled with their prompt version, critiques with "critic"
+        self.metrics = RunMetrics("ab_test", model, backend=backend)
+        self.llm = create_llm(backend, model, temperature=0, cache=self.cache, metrics=self.metrics,
+                              rate_limits=rate_limits, **(backend_options or {}))
+        if critic_temperature is None:
+            critic_temperature = 0 if self.critiques_per_sample == 1 else 0.7
+        critic_options = dict(backend_options or {})
+        if backend == "openai":
+            critic_options.setdefault("model_kwargs", {"response_format": {"type": "json_object"}})
+        critic_llm = create_llm(backend, model, temperature=critic_temperature, cache=self.cache,
+                                metrics=self.metrics, rate_limits=rate_limits, **critic_options)
+        self.critic = StructuredCritic(critic_llm, ENDPOINT_CRITERIA, ENDPOINT_INSTRUCTIONS,
+                                       batch_size=len(self.prompt_versions))
+
+        self.active = list(self.prompt_versions)
+        self.eliminated = {}  # version -> number of endpoints evaluated when it was dropped
+        # version -> per-endpoint scores, index-aligned across versions while both are active
+        self.scores = {version: [] for version in self.prompt_versions}
+        self.looks = 0
+        self.calls = {"generation": 0, "critique": 0}
+        self.sample_count = 0
+        self.lock = threading.Lock()
+
+    def generate(self, version, file_path, endpoint):
+        prompt = self.generators[version].format_prompt(endpoint, file_path)
+        return self.llm.invoke(prompt, label=version).content
+
+    def critique(self, file_path, endpoint, docs, sample_index):
+        """
+        Average the critic's scores of each version's document over critiques_per_sample critiques.
+
+        The presentation order comes from a generator seeded per sample and critique, not one shared by
+        the worker threads, so a run is reproducible from the seed whatever the thread scheduling.
+
+        Returns {version: scores}, or None when any version could not be scored.
+        """
+        context = f"**Endpoint:** {', '.join(endpoint.methods)} {endpoint.path} ({file_path})\n" \
+                  f"**Handler code:**\n{endpoint.code}"
+        versions = list(docs)
+        totals = {version: [] for version in versions}
+        for review in range(self.critiques_per_sample):
+            # A different order per critique keeps the critic's position bias out of the comparison
+            order = versions[:]
+            # String seeds are hashed deterministically (tuples are not accepted by random.Random)
+            rng = random.Random(f"{self.seed}:{file_path}:{','.join(endpoint.methods)} {endpoint.path}:{sample_index}:{review}")
+            rng.shuffle(order)
+            review_context = context if self.critiques_per_sample == 1 else \
+                f"{context}\n\n(Independent review {review + 1} of {self.critiques_per_sample})"
+            results = self.critic.evaluate(review_context, [docs[version] for version in order], label="critic")
+            with self.lock:
+                self.calls["critique"] += 1
+            for version, (scores, _) in zip(order, results):
+                if scores is not None:
+                    totals[version].append(scores)
+        if not all(totals.values()):
+            return None
+        return {
+            version: {key: statistics.mean(scores[key] for scores in critiques) for key in critiques[0]}
+            for version, critiques in totals.items()
+        }
+
+    def evaluate_sample(self, file_path, endpoint, versions, sample_index):
+        docs = {version: self.generate(version, file_path, endpoint) for version in versions}
+        with self.lock:
+            self.calls["generation"] += len(versions)
+        return self.critique(file_path, endpoint, docs, sample_index)
+
+    def leader(self):
+        return max(self.active, key=lambda version: statistics.mean(s["overall"] for s in self.scores[version]))
+
+    def differences(self, version, leader):
+        # Only endpoints scored for both versions, i.e. the part of the run where both were active
+        count = min(len(self.scores[version]), len(self.scores[leader]))
+        return [
+            self.scores[version][index]["overall"] - self.scores[leader][index]["overall"]
+            for index in range(count)
+        ]
+
+    def decide(self):
+        """
+        Drop versions that are significantly worse than the leader. Returns the stop reason, or None to continue.
+        """
+        self.looks += 1
+        samples = len(self.scores[self.active[0]])
+        if samples < self.min_samples:
+            return None
+        leader = self.leader()
+        # Bonferroni over the comparisons made at this look
+        alpha = look_alpha(self.alpha, self.looks) / (len(self.active) - 1)
+        ties = 0
+        for version in [version for version in self.active if version != leader]:
+            _, low, high = mean_interval(self.differences(version, leader), alpha)
+            if high < 0:
+                print(f"Dropping prompt version {version}: worse than {leader} after {samples} endpoints")
+                self.active.remove(version)
+                self.eliminated[version] = samples
+            elif self.min_effect and -self.min_effect < low and high < self.min_effect:
+                ties += 1
+        if len(self.active) == 1:
+            return "winner"
+        if ties == len(self.active) - 1:
+            return "equivalent"
+        return None
+
+    def run(self):
+        samples = sample_endpoints(self.api_files, self.framework, self.extractor, self.seed)
+        if not samples:
+            raise ValueError("No endpoints found in the API files")
+        self.sample_count = len(samples)
+        print(f"Sampling from {len(samples)} endpoints in {len(self.api_files)} files")
+        reason = None
+        position = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while reason is None:
+                evaluated = len(self.scores[self.active[0]])
+                if evaluated >= self.max_samples:
+                    reason = "max_samples"
+                    break
+                if position >= len(samples):
+                    reason = "exhausted"
+                    break
+                round_samples = samples[position:position + min(self.workers, self.max_samples - evaluated)]
+                versions = list(self.active)
+                futures = [
+                    executor.submit(self.evaluate_sample, file_path, endpoint, versions, position + offset)
+                    for offset, (file_path, endpoint) in enumerate(round_samples)
+                ]
+                position += len(round_samples)
+                for (file_path, endpoint), future in zip(round_samples, futures):
+                    sample_scores = future.result()
+                    if sample_scores is None:
+                        print(f"Skipping {endpoint.path} ({file_path}): critique could not be parsed")
+                        continue
+                    for version in versions:
+                        self.scores[version].append(sample_scores[version])
+                reason = self.decide()
+        return self.summarize(reason)
+
+    def version_summary(self, version):
+        scores = self.scores[version]
+        if not scores:
+            return {"samples": 0}
+        summary = {"samples": len(scores)}
+        for key in list(ENDPOINT_CRITERIA) + ["overall"]:
+            mean, low, high = mean_interval([s[key] for s in scores], self.alpha)
+            summary[key] = {"mean": round(mean, 3), "ci": [round(low, 3), round(high, 3)]}
+        if version in self.eliminated:
+            summary["dropped_after"] = self.eliminated[version]
+        return summary
+
+    def summarize(self, reason):
+        leader = self.leader()
+        comparisons = {}
+        for version in self.prompt_versions:
+            differences = self.differences(version, leader) if version != leader else []
+            if len(differences) >= 2:
+                mean, low, high = mean_interval(differences, self.alpha)
+                comparisons[f"{version} - {leader}"] = {
+                    "samples": len(differences), "mean": round(mean, 3), "ci": [round(low, 3), round(high, 3)]
+                }
+        # What evaluating every version on max_samples endpoints would have cost
+        full_calls = min(self.max_samples, self.sample_count) * (len(self.prompt_versions) + self.critiques_per_sample)
+        used_calls = self.calls["generation"] + self.calls["critique"]
+        result = {
+            "prompt_versions": self.prompt_versions,
+            "api_files": self.api_files,
+            "stop_reason": reason,
+            "winner": leader if reason == "winner" else None,
+            "leader": leader,
+            "looks": self.looks,
+            "alpha": self.alpha,
+            "min_effect": self.min_effect,
+            "critiques_per_sample": self.critiques_per_sample,
+            "calls": dict(self.calls, total=used_calls, fixed_design=full_calls),
+            "versions": {version: self.version_summary(version) for version in self.prompt_versions},
+            "comparisons": comparisons,
+        }
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.result_file_path, "w") as f:
+            json.dump(result, f, indent=4)
+        self.metrics.extra["ab_test"] = {key: result[key] for key in ("stop_reason", "winner", "leader", "calls")}
+        self.metrics.write_report(self.report_file_path)
+        if self.cache:
+            self.cache.report()
+
+        print("\n=== A/B Test Result ===")
+        for version, summary in result["versions"].items():
+            if summary["samples"]:
+                overall = summary["overall"]
+                dropped = f", dropped after {summary['dropped_after']}" if "dropped_after" in summary else ""
+                print(f"{version}: overall {overall['mean']:.2f} "
+                      f"[{overall['ci'][0]:.2f}, {overall['ci'][1]:.2f}] on {summary['samples']} endpoints{dropped}")
+        if reason == "winner":
+            print(f"Winner: {leader}")
+        elif reason == "equivalent":
+            print(f"No difference larger than {self.min_effect} between the remaining versions (leader: {leader})")
+        else:
+            print(f"Inconclusive ({reason}), current leader: {leader}")
+        print(f"{used_calls} LLM calls used, {full_calls} for a fixed-size test. Results saved to {self.result_file_path}")
+        return result
@@ -1,126 +1,491 @@
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-import importlib.util
+from documentor.llm_cache import LLMResponseCache
+from documentor.llm_backends import create_llm, backend_model_key
+from documentor.metrics import RunMetrics, InstrumentedLLM
+from documentor.prompt_registry import get_prompt_registry
+from documentor.compaction import CodeCompactor
+from documentor.templates import TemplateRenderer
+from documentor.module_context import build_module_context
+from documentor.grouping import GROUP_PROMPT, ENDPOINT_BLOCK, group_endpoints, group_key, parse_group_response
+from documentor.batch_client import TERMINAL_STATUSES
+from documentor.manifest import DocumentationManifest
+from documentor.streaming_writer import StreamingMarkdownWriter
+from documentor.routes import extract_routes
 import os
 import datetime
 import json
+import time
 
 class APIDocumentationGenerator:
-    def __init__(self, model, api_file_path, output_dir, framework, prompt_version):
+    def __init__(self, model, api_file_path, output_dir, framework, prompt_version, concurrency=1, use_cache=True, incremental=False, extractor="import",
+                 backend="openai", backend_options=None, stream_tokens=False, rate_limits=None,
+                 compact_code=False, group_tokens=None, llm=None, template_threshold=None):
         self.api_file_path = api_file_path
+        # "fastapi", "flask" or "auto" to detect it from the API file's source
         self.framework = framework
+        # "import" executes the API module, "ast" reads the routes statically, "openapi" builds
+        # the prompts from the app's OpenAPI schema (see documentor.openapi_extractor)
+        self.extractor = extractor
         self.prompt_version = prompt_version
         self.model = model
+        # Maximum number of endpoints documented at the same time (1 = serial)
+        self.concurrency = max(1, concurrency)
+        # Echo tokens to stdout as they arrive; only readable when endpoints are documented one at a time
+        self.stream_tokens = stream_tokens and self.concurrency == 1
         self.now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         
         # Output file paths
         self.output_file_name = self.api_file_path.split("/")[-1].split(".")[0] + self.now
         self.output_directory = os.path.join(output_dir, self.model, "API-by-API", self.prompt_version)
         self.output_file_path = os.path.join(self.output_directory, self.output_file_name + ".md")
+        # Sections are appended here as they complete; the name has no timestamp so a restart can resume it
+        self.partial_file_path = os.path.join(
+            self.output_directory, self.api_file_path.split("/")[-1].split(".")[0] + ".md.partial"
+        )
+        # Latency, token, cache and cost report written next to the markdown
+        self.report_file_path = os.path.join(self.output_directory, self.output_file_name + ".report.json")
+
+        # Incremental runs only regenerate endpoints whose handler changed since the last run
+        self.incremental = incremental
+        self.manifest_path = os.path.join(
+            self.output_directory, self.api_file_path.split("/")[-1].split(".")[0] + ".manifest.json"
+        )
         
-        # Prompt file
-        self.prompt_file_path = "/Users/neel/Developer/cmpe297_project/prompts/bulk_api_prompts.json"  # Adjust path to your prompts
+        # Prompt template, validated and compiled once (see documentor.prompt_registry)
+        self.prompt = get_prompt_registry().get("api_by_api", self.prompt_version)
+        # Strip comments, long docstrings and large literals from handler code before it is sent
+        self.compactor = CodeCompactor(model=self.model) if compact_code else None
+        # Endpoints whose handler complexity is at most template_threshold are rendered from the route
+        # model without an LLM call (None = every endpoint goes to the LLM)
+        self.templates = TemplateRenderer(template_threshold) if template_threshold is not None else None
+        # Prompts with {module_context} start with the same module-wide prefix for every endpoint,
+        # which the provider can serve from its prompt cache
+        self.uses_module_context = "module_context" in self.prompt.placeholders
+        self.module_contexts = {}  # file path -> module context
+        # Token budget for packing small endpoints with the same router prefix into one request (None = one call each)
+        self.group_tokens = group_tokens
+        self.group_stats = {"grouped_calls": 0, "grouped_endpoints": 0, "fallbacks": 0}
         
+        # Responses are cached on disk so re-running on an unchanged file costs no tokens
+        self.cache = LLMResponseCache(os.path.join(output_dir, ".llm_cache")) if use_cache else None
+
         # Initialize LLM
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        # Requests/tokens per minute and retry settings of the shared scheduler (see documentor.rate_limiter)
+        self.rate_limits = rate_limits
+        self.metrics = RunMetrics("api_by_api", self.model, self.prompt_version, self.backend)
+        # Chat model built once by a long-running caller (see documentor.service), instead of a new client per run
+        self.shared_llm = llm
         self.llm = self.initialize_llm()
 
     def initialize_llm(self):
-        return ChatOpenAI(model=self.model, temperature=0)
+        if self.shared_llm:
+            # Calls still go into this run's metrics
+            return InstrumentedLLM(self.shared_llm, self.metrics, self.model)
+        return create_llm(self.backend, self.model, temperature=0, cache=self.cache, metrics=self.metrics,
+                          rate_limits=self.rate_limits, **self.backend_options)
 
     def load_prompt_template(self):
-        with open(self.prompt_file_path, "r") as file:
-            prompts = json.load(file)
-        return prompts.get(self.prompt_version, "Default prompt not found.")
+        return self.prompt.template
+
+    def prompt_text(self):
+        # Everything besides the endpoint that goes into a prompt; a change invalidates stored sections
+        prompt_text = self.load_prompt_template()
+        if self.uses_module_context:
+            prompt_text += self.module_context(self.api_file_path)
+        return prompt_text
+
+    def generation_key(self):
+        # Output directories are per model name only, so fake and real runs of a model share them;
+        # code compaction changes what the model is shown, so it is part of the key too
+        return f"{backend_model_key(self.backend, self.model)} compact_code={self.compactor is not None}"
+
+    def section_keys(self, endpoints):
+        """
+        Keys of the sections in the partial file: a resumed section is only kept when its route,
+        handler source, prompt, backend, model and compaction setting are unchanged.
+        """
+        prompt_hash = DocumentationManifest.hash_text(
+            self.generation_key() + self.prompt_version + self.prompt_text()
+        )[:16]
+        return [
+            f"{DocumentationManifest.endpoint_key(endpoint)} {DocumentationManifest.source_hash(endpoint)[:16]} {prompt_hash}"
+            for endpoint in endpoints
+        ]
 
     def extract_api_details(self):
-        import importlib.util
-        import inspect
-        from fastapi.routing import APIRoute
-        # Load the module
-        spec = importlib.util.spec_from_file_location("api_module", self.api_file_path)
-        api_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(api_module)
-        framework = self.framework
-
-        endpoints = []
-
-        if framework == "fastapi":
-            app = getattr(api_module, "app", None)
-            if app:
-                for route in app.routes:
-                    if isinstance(route, APIRoute):
-                        # Extract handler function and its code
-                        handler = route.endpoint
-                        code = inspect.getsource(handler) if handler else "Code not found"
-
-                        endpoints.append({
-                            "api_name": route.name or "Unnamed API",
-                            "path": route.path,
-                            "methods": list(route.methods),
-                            "parameters": [param.name for param in route.dependant.path_params],
-                            "code": code
-                        })
-        elif framework == "flask":
-            app = getattr(api_module, "app", None)
-            if app:
-                for rule in app.url_map.iter_rules():
-                    # Extract handler function and its code
-                    handler = app.view_functions.get(rule.endpoint)
-                    code = inspect.getsource(handler) if handler else "Code not found"
-
-                    endpoints.append({
-                        "api_name": rule.endpoint,
-                        "path": rule.rule,
-                        "methods": list(rule.methods - {"HEAD", "OPTIONS"}),
-                        "parameters": list(rule.arguments),
-                        "code": code
-                    })
-        return endpoints
+        return extract_routes(self.api_file_path, self.framework, self.extractor)
+
+    def module_context(self, file_path):
+        if file_path not in self.module_contexts:
+            with open(file_path, "r") as f:
+                context = build_module_context(f.read())
+            if self.compactor and context:
+                context = self.compactor.compact(context)
+            self.module_contexts[file_path] = context or "None"
+        return self.module_contexts[file_path]
+
+    def endpoint_values(self, endpoint, code=None):
+        if code is None:
+            code = self.compactor.compact(endpoint.code) if self.compactor else endpoint.code
+        return {
+            "path": endpoint.path,
+            "methods": ", ".join(endpoint.methods),
+            "parameters": ", ".join(endpoint.parameters) if endpoint.parameters else "None",
+            "code": code
+        }
+
+    def format_prompt(self, endpoint, file_path=None):
+        values = self.endpoint_values(endpoint)
+        if self.uses_module_context:
+            values["module_context"] = self.module_context(file_path or self.api_file_path)
+        return self.prompt.format(**values)
 
     def generate_api_documentation(self, endpoint):
-        # Load prompt template
-        prompt_template = self.load_prompt_template()
-        
-        # Format the prompt
-        prompt = prompt_template.format(
-            path=endpoint["path"],
-            methods=", ".join(endpoint["methods"]),
-            parameters=", ".join(endpoint["parameters"]) if endpoint["parameters"] else "None",
-            code=endpoint["code"]
-        )
+        prompt = self.format_prompt(endpoint)
+
+        if self.stream_tokens:
+            # Show the documentation as it is generated
+            chunks = []
+            for chunk in self.llm.stream(prompt):
+                print(chunk.content, end="", flush=True)
+                chunks.append(chunk.content)
+            print()
+            return "".join(chunks)
         
         # Invoke the LLM to generate documentation
         response = self.llm.invoke(prompt)
         return response.content
 
+    async def agenerate_api_documentation(self, endpoint):
+        prompt = self.format_prompt(endpoint)
+
+        # Invoke the LLM asynchronously so several endpoints can be in flight
+        response = await self.llm.ainvoke(prompt)
+        return response.content
+
+    def format_group_prompt(self, endpoints, file_path=None):
+        """
+        Build one request for several endpoints. Returns the prompt and the id each endpoint is answered under.
+        """
+        ids = [f"E{number}" for number in range(1, len(endpoints) + 1)]
+        # The version's instructions are given once, with the endpoint fields pointing to the list below
+        values = {name: "(given for each endpoint below)" for name in ("path", "methods", "parameters", "code")}
+        if self.uses_module_context:
+            values["module_context"] = self.module_context(file_path or self.api_file_path)
+        # Members share one prompt, so a handler repeating an earlier member's body is sent as a stub
+        codes = self.compactor.compact_many([endpoint.code for endpoint in endpoints]) if self.compactor else [None] * len(endpoints)
+        blocks = [
+            ENDPOINT_BLOCK.format(id=endpoint_id, **self.endpoint_values(endpoint, code))
+            for endpoint_id, endpoint, code in zip(ids, endpoints, codes)
+        ]
+        prompt = GROUP_PROMPT.format(
+            instructions=self.prompt.format(**values), endpoints="\n".join(blocks), ids=", ".join(ids)
+        )
+        return prompt, ids
+
+    async def agenerate_documentation_grouped(self, endpoints, on_section=None):
+        # Imported on first async use; the serial path never loads asyncio
+        import asyncio
+
+        blocks = [ENDPOINT_BLOCK.format(id="E0", **self.endpoint_values(endpoint)) for endpoint in endpoints]
+        groups = group_endpoints(blocks, endpoints, self.group_tokens, model=self.model)
+        print(f"Packed {len(endpoints)} endpoints into {len(groups)} requests (budget {self.group_tokens} tokens)\n")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        documentation = [None] * len(endpoints)
+
+        def add_section(position, section):
+            documentation[position] = section
+            if on_section:
+                on_section(position, section)
+
+        async def document_endpoint(position):
+            endpoint = endpoints[position]
+            async with semaphore:
+                start = time.perf_counter()
+                doc_content = await self.agenerate_api_documentation(endpoint)
+                latency = time.perf_counter() - start
+            print(f"Documentation generated for {endpoint.path} in {latency:.2f}s\n")
+            add_section(position, self.build_section(endpoint, doc_content, latency))
+
+        async def document_group(positions):
+            if len(positions) == 1:
+                return await document_endpoint(positions[0])
+            async with semaphore:
+                prompt, ids = self.format_group_prompt([endpoints[position] for position in positions])
+                start = time.perf_counter()
+                response = await self.llm.ainvoke(prompt)
+                latency = time.perf_counter() - start
+            answers = parse_group_response(response.content, ids)
+            self.group_stats["grouped_calls"] += 1
+            self.group_stats["grouped_endpoints"] += len(answers)
+            print(f"Documented {len(answers)} of {len(positions)} endpoints under /{group_key(endpoints[positions[0]])} "
+                  f"in one call ({latency:.2f}s)\n")
+
+            missing = []
+            for endpoint_id, position in zip(ids, positions):
+                if endpoint_id in answers:
+                    # The call's latency is shared by the endpoints it documented
+                    add_section(position, self.build_section(endpoints[position], answers[endpoint_id], latency / len(positions)))
+                else:
+                    missing.append(position)
+            if missing:
+                # Unparseable or incomplete answer: document the rest one endpoint at a time. The answer is
+                # evicted from the response cache, otherwise every rerun would pay for it and the fallback again
+                self.llm.evict(prompt)
+                self.group_stats["fallbacks"] += len(missing)
+                print(f"Falling back to single-endpoint calls for {len(missing)} endpoints\n")
+                await asyncio.gather(*(document_endpoint(position) for position in missing))
+
+        await asyncio.gather(*(document_group(positions) for positions in groups))
+        return documentation
+
+    def build_section(self, endpoint, doc_content, latency):
+        return {
+            "path": endpoint.path,
+            "methods": endpoint.methods,
+            "parameters": endpoint.parameters,
+            "documentation": doc_content,
+            "latency": latency
+        }
+
+    def generate_documentation_serially(self, endpoints, on_section=None):
+        documentation = []
+        for position, endpoint in enumerate(endpoints):
+            print(f"Processing {endpoint.path}...")
+            start = time.perf_counter()
+            doc_content = self.generate_api_documentation(endpoint)
+            latency = time.perf_counter() - start
+            section = self.build_section(endpoint, doc_content, latency)
+            documentation.append(section)
+            if on_section:
+                on_section(position, section)
+            print(f"Documentation generated for {endpoint.path} in {latency:.2f}s\n")
+        return documentation
+
+    async def agenerate_documentation_concurrently(self, endpoints, on_section=None):
+        import asyncio
+
+        # The semaphore bounds the number of in-flight LLM calls
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def document_endpoint(position, endpoint):
+            async with semaphore:
+                print(f"Processing {endpoint.path}...")
+                start = time.perf_counter()
+                doc_content = await self.agenerate_api_documentation(endpoint)
+                latency = time.perf_counter() - start
+                print(f"Documentation generated for {endpoint.path} in {latency:.2f}s\n")
+                section = self.build_section(endpoint, doc_content, latency)
+                if on_section:
+                    on_section(position, section)
+                return section
+
+        # gather returns results in the order of the endpoints, not completion order
+        return await asyncio.gather(*(document_endpoint(position, endpoint) for position, endpoint in enumerate(endpoints)))
+
+    def report_latencies(self, documentation, wall_time):
+        if not documentation:
+            return
+        latencies = [doc["latency"] for doc in documentation]
+        print("=== Per-endpoint latency ===")
+        for doc in documentation:
+            print(f"{', '.join(doc['methods'])} {doc['path']}: {doc['latency']:.2f}s")
+        print(
+            f"{len(documentation)} endpoints in {wall_time:.2f}s wall time "
+            f"(concurrency={self.concurrency}, sum of latencies={sum(latencies):.2f}s, "
+            f"max={max(latencies):.2f}s)"
+        )
+
+    def report_compaction(self):
+        if self.compactor:
+            self.compactor.report()
+            self.metrics.extra["compaction"] = self.compactor.stats()
+
+    def report_templates(self):
+        if self.templates:
+            self.templates.report()
+            self.metrics.extra["templates"] = self.templates.stats()
+
+    def render_templates(self, endpoints, documentation):
+        """
+        Fill documentation[index] for every pending endpoint simple enough for the template. Returns the indices filled.
+        """
+        rendered = []
+        if not self.templates:
+            return rendered
+        for index, endpoint in enumerate(endpoints):
+            if documentation[index] is not None:
+                continue
+            doc_content = self.templates.render(endpoint)
+            if doc_content is not None:
+                documentation[index] = self.build_section(endpoint, doc_content, 0.0)
+                rendered.append(index)
+        return rendered
+
+    def build_batch_request(self, custom_id, endpoint):
+        # One line of an OpenAI-style batch input file
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": self.model,
+                "temperature": 0,
+                "messages": [{"role": "user", "content": self.format_prompt(endpoint)}]
+            }
+        }
+
+    def read_batch_results(self, output_path):
+        results = {}
+        with open(output_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                response = result.get("response")
+                if response and response.get("status_code") == 200:
+                    results[result["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                else:
+                    error = result.get("error") or (response or {}).get("body", {}).get("error")
+                    results[result["custom_id"]] = f"Documentation not generated: {error}"
+        return results
+
+    def process_with_batch_submission(self, batch_client, poll_interval=30):
+        """
+        Submit every endpoint prompt as one batch job, wait for it and write the usual markdown file.
+        """
+        endpoints = self.extract_api_details()
+        if not os.path.exists(self.output_directory):
+            os.makedirs(self.output_directory)
+        # Trivial endpoints are rendered here and left out of the batch
+        documentation = [None] * len(endpoints)
+        templated = set(self.render_templates(endpoints, documentation))
+        self.report_templates()
+        if len(templated) == len(endpoints):
+            self.save_documentation_to_file(documentation)
+            return
+
+        # Write all formatted prompts to a JSONL batch file
+        batch_input_path = os.path.join(self.output_directory, self.output_file_name + ".batch_input.jsonl")
+        with open(batch_input_path, "w") as f:
+            for index, endpoint in enumerate(endpoints):
+                if index not in templated:
+                    f.write(json.dumps(self.build_batch_request(f"endpoint-{index}", endpoint)) + "\n")
+        print(f"Wrote {len(endpoints) - len(templated)} requests to {batch_input_path}")
+        self.report_compaction()
+
+        batch_id = batch_client.submit(batch_input_path)
+        print(f"Submitted batch {batch_id}")
+
+        # Poll until the batch reaches a terminal status
+        status = batch_client.status(batch_id)
+        while status not in TERMINAL_STATUSES:
+            print(f"Batch {batch_id} is {status}, checking again in {poll_interval}s...")
+            time.sleep(poll_interval)
+            status = batch_client.status(batch_id)
+        if status != "completed":
+            raise RuntimeError(f"Batch {batch_id} finished with status '{status}'")
+
+        batch_output_path = os.path.join(self.output_directory, self.output_file_name + ".batch_output.jsonl")
+        batch_client.download_results(batch_id, batch_output_path)
+        results = self.read_batch_results(batch_output_path)
+
+        # Stitch the results back in route order
+        documentation = [
+            documentation[index] or self.build_section(
+                endpoint,
+                results.get(f"endpoint-{index}", "Documentation not generated: missing from batch output"),
+                0.0
+            )
+            for index, endpoint in enumerate(endpoints)
+        ]
+        self.save_documentation_to_file(documentation)
+
+    def format_section(self, doc):
+        return (
+            f"# API Path: {doc['path']}\n"
+            f"### Methods: {', '.join(doc['methods'])}\n"
+            f"### Parameters: {', '.join(doc['parameters']) if doc['parameters'] else 'None'}\n"
+            f"{doc['documentation']}\n\n"
+        )
+
+    def section_documentation(self, section_text):
+        # Inverse of format_section: drop the three header lines and the trailing blank line
+        return section_text.split("\n", 3)[3][:-2]
+
     def save_documentation_to_file(self, documentation):
         if not os.path.exists(self.output_directory):
             os.makedirs(self.output_directory)
         
         with open(self.output_file_path, "w") as f:
             for doc in documentation:
-                f.write(f"# API Path: {doc['path']}\n")
-                f.write(f"### Methods: {', '.join(doc['methods'])}\n")
-                f.write(f"### Parameters: {', '.join(doc['parameters']) if doc['parameters'] else 'None'}\n")
-                f.write(f"{doc['documentation']}\n\n")
+                f.write(self.format_section(doc))
         print(f"API Documentation saved to {self.output_file_path}")
 
     def process_and_generate_documentation(self):
         # Extract API details
         endpoints = self.extract_api_details()
+        keys = self.section_keys(endpoints)
+        documentation = [None] * len(endpoints)
+
+        # Sections are streamed to a partial file; pick up where an interrupted run stopped
+        if not os.path.exists(self.output_directory):
+            os.makedirs(self.output_directory)
+        writer = StreamingMarkdownWriter(self.partial_file_path, self.output_file_path)
+        for index, section_text in enumerate(writer.resume(keys)):
+            documentation[index] = self.build_section(endpoints[index], self.section_documentation(section_text), 0.0)
+        if writer.next_index:
+            print(f"Resuming {self.partial_file_path}: {writer.next_index} of {len(endpoints)} endpoints already written\n")
+
+        # Reuse stored sections for endpoints whose handler source is unchanged
+        manifest = None
+        if self.incremental:
+            # A changed module context (e.g. an edited model) invalidates every stored section
+            manifest = DocumentationManifest(self.manifest_path, self.prompt_text(), self.generation_key())
+            reused = 0
+            for index, endpoint in enumerate(endpoints):
+                if documentation[index] is not None:
+                    continue
+                doc_content = manifest.lookup(endpoint)
+                if doc_content is not None:
+                    documentation[index] = self.build_section(endpoint, doc_content, 0.0)
+                    writer.add(index, keys[index], self.format_section(documentation[index]))
+                    reused += 1
+            print(f"Incremental run: reusing {reused} of {len(endpoints)} endpoints, "
+                  f"regenerating {documentation.count(None)}\n")
+        for index in self.render_templates(endpoints, documentation):
+            writer.add(index, keys[index], self.format_section(documentation[index]))
+        pending_indices = [index for index, doc in enumerate(documentation) if doc is None]
+        pending = [endpoints[index] for index in pending_indices]
+
+        def on_section(position, section):
+            # Append each section to the partial file as soon as every earlier one is written
+            index = pending_indices[position]
+            documentation[index] = section
+            writer.add(index, keys[index], self.format_section(section))
         
         # Generate documentation for each API
-        documentation = []
-        for endpoint in endpoints:
-            print(f"Processing {endpoint['path']}...")
-            doc_content = self.generate_api_documentation(endpoint)
-            documentation.append({
-                "path": endpoint["path"],
-                "methods": endpoint["methods"],
-                "parameters": endpoint["parameters"],
-                "documentation": doc_content
-            })
-            print(f"Documentation generated for {endpoint['path']}\n")
+        start = time.perf_counter()
+        if self.group_tokens:
+            import asyncio
+            generated = asyncio.run(self.agenerate_documentation_grouped(pending, on_section))
+            self.metrics.extra["grouping"] = dict(self.group_stats, endpoints=len(pending))
+        elif self.concurrency > 1:
+            import asyncio
+            generated = asyncio.run(self.agenerate_documentation_concurrently(pending, on_section))
+        else:
+            generated = self.generate_documentation_serially(pending, on_section)
+        self.report_latencies(generated, time.perf_counter() - start)
         
-        # Save all documentation to a file
-        self.save_documentation_to_file(documentation)
+        # Atomically move the completed file into place
+        writer.finish()
+        print(f"API Documentation saved to {self.output_file_path}")
+        if manifest:
+            manifest.update(endpoints, documentation)
+            manifest.save()
+        self.report_compaction()
+        self.report_templates()
+        self.metrics.write_report(self.report_file_path)
+        if self.cache:
+            self.cache.report()
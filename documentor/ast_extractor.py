@@ -0,0 +1,436 @@
+from documentor.routes import Route, resolve_framework
+from dataclasses import replace
+import ast
+import os
+import re
+import textwrap
+
+# Decorator attributes that register a single HTTP method
+FASTAPI_METHOD_DECORATORS = {"get", "post", "put", "delete", "patch", "options", "head", "trace"}
+FLASK_METHOD_DECORATORS = {"get", "post", "put", "delete", "patch"}
+
+# FastAPI parameter helpers and where they put the value
+FASTAPI_PARAM_KINDS = {
+    "Path": "path",
+    "Query": "query",
+    "Body": "body",
+    "Form": "body",
+    "File": "body",
+    "Header": "header",
+    "Cookie": "header",
+    "Depends": "dependency",
+    "Security": "dependency",
+}
+
+# Media type of the request body when a parameter uses one of these helpers (FastAPI's own defaults)
+FASTAPI_BODY_MEDIA_TYPES = {"Form": "application/x-www-form-urlencoded", "File": "multipart/form-data"}
+
+SIMPLE_TYPES = {"str", "int", "float", "bool", "bytes", "Optional", "List", "list", "Set", "set", "Union", "None"}
+
+
+def call_name(node):
+    """
+    Return the name a call is made through: FastAPI(...) -> "FastAPI", fastapi.FastAPI(...) -> "FastAPI".
+    """
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def literal(node, default=None):
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        return default
+
+
+def keyword_value(call, name, default=None):
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return literal(keyword.value, default)
+    return default
+
+
+def raised_http_errors(source):
+    """
+    Return [(status code, detail)] of the HTTPExceptions raised in a piece of code, sorted by status code.
+
+    Status codes given as `status.HTTP_404_NOT_FOUND` are read from the constant's name.
+    """
+    try:
+        tree = ast.parse(textwrap.dedent(source))
+    except SyntaxError:
+        return []
+    errors = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Raise) or not isinstance(node.exc, ast.Call):
+            continue
+        if call_name(node.exc) not in ("HTTPException", "StarletteHTTPException"):
+            continue
+        status = node.exc.args[0] if node.exc.args else next(
+            (keyword.value for keyword in node.exc.keywords if keyword.arg == "status_code"), None
+        )
+        code = literal(status) if status is not None else None
+        if code is None and isinstance(status, ast.Attribute):
+            match = re.match(r"HTTP_(\d{3})", status.attr)
+            code = int(match.group(1)) if match else None
+        if isinstance(code, int):
+            detail = node.exc.args[1] if len(node.exc.args) > 1 else next(
+                (keyword.value for keyword in node.exc.keywords if keyword.arg == "detail"), None
+            )
+            errors.append((code, literal(detail) if detail is not None else None))
+    return sorted(errors, key=lambda error: error[0])
+
+
+def dependencies_keyword(call):
+    # Depends() calls given as dependencies=[...] to an app, router, include_router() or route decorator
+    return [
+        item for keyword in call.keywords if keyword.arg == "dependencies"
+        and isinstance(keyword.value, (ast.List, ast.Tuple)) for item in keyword.value.elts
+    ]
+
+
+def join_paths(prefix, path):
+    if not prefix:
+        return path
+    return prefix.rstrip("/") + path
+
+
+class RouteCollector:
+    def __init__(self, source, framework, file_path=None, modules=None):
+        """
+        :param file_path: Path of the parsed file, used to find routers imported from local modules
+        :param modules: Collectors of the modules already read, shared while following imports
+        """
+        self.source = source
+        self.lines = source.splitlines(keepends=True)
+        self.framework = framework
+        self.file_path = file_path
+        self.apps = []          # names bound to FastAPI()/Flask()
+        self.routers = {}       # router/blueprint name -> prefix given at construction
+        self.routes = {}        # app/router name -> list of Routes in registration order
+        self.imports = {}       # local name -> (module, relative import level, imported attribute or None)
+        self.mounts = []        # (app name, mount path, routes of the mounted app)
+        self.mounted = set()    # apps mounted on another app of this module
+        self.functions = {}     # module-level function name -> FunctionDef, to follow Depends()
+        self.owner_dependencies = {}  # app/router name -> Depends() calls applied to all of its routes
+        self.included = set()   # routers/blueprints included in another router or app of this module
+        self.modules = modules if modules is not None else {}
+        if file_path:
+            self.modules[os.path.realpath(file_path)] = self
+
+    def handler_source(self, node):
+        # Match inspect.getsource, which includes the decorators
+        start = min([decorator.lineno for decorator in node.decorator_list] + [node.lineno])
+        return "".join(self.lines[start - 1:node.end_lineno]), start
+
+    def visit_import(self, node):
+        for alias in node.names:
+            if isinstance(node, ast.ImportFrom):
+                self.imports[alias.asname or alias.name] = (node.module or "", node.level, alias.name)
+            elif alias.asname:
+                self.imports[alias.asname] = (alias.name, 0, None)
+
+    def visit_assignment(self, node):
+        if not isinstance(node.value, ast.Call) or len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            return
+        name = node.targets[0].id
+        constructor = call_name(node.value)
+        if constructor in ("FastAPI", "Flask"):
+            self.apps.append(name)
+            self.routes.setdefault(name, [])
+            self.owner_dependencies[name] = dependencies_keyword(node.value)
+        elif constructor == "APIRouter":
+            self.routers[name] = keyword_value(node.value, "prefix", "")
+            self.routes.setdefault(name, [])
+            self.owner_dependencies[name] = dependencies_keyword(node.value)
+        elif constructor == "Blueprint":
+            self.routers[name] = keyword_value(node.value, "url_prefix", "")
+            self.routes.setdefault(name, [])
+
+    def module_path(self, module, level):
+        # File of an imported module: relative to this file, or to the first directory up the tree that has it
+        if not self.file_path:
+            return None
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        if level:
+            for _ in range(level - 1):
+                directory = os.path.dirname(directory)
+            roots = [directory]
+        else:
+            roots = [directory]
+            while os.path.exists(os.path.join(directory, "__init__.py")):
+                directory = os.path.dirname(directory)
+                roots.append(directory)
+        for root in roots:
+            base = os.path.join(root, *module.split(".")) if module else root
+            for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+                if os.path.isfile(candidate):
+                    return candidate
+        return None
+
+    def load_module(self, module, level):
+        path = self.module_path(module, level)
+        if path is None:
+            return None
+        path = os.path.realpath(path)
+        if path not in self.modules:
+            # Marked before parsing, so import cycles end here
+            self.modules[path] = None
+            try:
+                with open(path, "r") as file:
+                    source = file.read()
+                collector = RouteCollector(source, self.framework, path, self.modules)
+                collector.collect(ast.parse(source, filename=path))
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                collector = None
+            self.modules[path] = collector
+        return self.modules[path]
+
+    def resolve(self, node):
+        """
+        Return (routes, constructor prefix) of the app or router an include/mount refers to, or None.
+        """
+        if isinstance(node, ast.Name) and node.id in self.routes:
+            return self.routes[node.id], self.routers.get(node.id, "")
+        if isinstance(node, ast.Name) and node.id in self.imports:
+            # from app.routers.users import router
+            module, level, name = self.imports[node.id]
+        elif isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id in self.imports:
+            # from app.routers import users; users.router
+            module, level, imported = self.imports[node.value.id]
+            module = ".".join(part for part in (module, imported) if part)
+            name = node.attr
+        else:
+            return None
+        collector = self.load_module(module, level)
+        if collector is None or name not in collector.routes:
+            return None
+        return collector.routes[name], collector.routers.get(name, "")
+
+    def visit_include(self, node):
+        # app.include_router(router, prefix=...) / app.register_blueprint(bp, url_prefix=...)
+        call = node.value
+        if not isinstance(call.func, ast.Attribute) or not isinstance(call.func.value, ast.Name):
+            return
+        if call.func.attr == "mount":
+            return self.visit_mount(call)
+        if call.func.attr not in ("include_router", "register_blueprint") or not call.args:
+            return
+        parent = call.func.value.id
+        child = self.resolve(call.args[0])
+        if parent not in self.routes or child is None:
+            return
+        routes, child_prefix = child
+        if isinstance(call.args[0], ast.Name) and call.args[0].id in self.routes:
+            self.included.add(call.args[0].id)
+        # A router included in another router also gets that router's own prefix
+        parent_prefix = self.routers.get(parent, "")
+        if call.func.attr == "include_router":
+            prefix = join_paths(parent_prefix, keyword_value(call, "prefix", ""))
+        else:
+            url_prefix = keyword_value(call, "url_prefix")
+            prefix = parent_prefix
+            if url_prefix is not None:
+                # Flask replaces the blueprint's own url_prefix with the one given at registration
+                prefix = join_paths(parent_prefix, url_prefix)
+                routes = [
+                    replace(route, path=route.path[len((child_prefix or "").rstrip("/")):]) for route in routes
+                ]
+        # The including router's dependencies, then those given to include_router(), run first
+        dependencies = self.owner_dependencies.get(parent, []) + dependencies_keyword(call)
+        for route in routes:
+            path = join_paths(prefix, route.path)
+            route = replace(route, path=path, parameters=self.path_parameters(path))
+            self.routes[parent].append(self.with_dependencies(route, dependencies) if dependencies else route)
+
+    def visit_mount(self, call):
+        # app.mount("/v1", sub_app): served under the mount path, including routes added to it later
+        parent = call.func.value.id
+        path = literal(call.args[0]) if call.args else keyword_value(call, "path")
+        target = call.args[1] if len(call.args) > 1 else next(
+            (keyword.value for keyword in call.keywords if keyword.arg == "app"), None
+        )
+        child = self.resolve(target) if target is not None else None
+        if parent not in self.routes or not isinstance(path, str) or child is None:
+            return
+        if isinstance(target, ast.Name):
+            self.mounted.add(target.id)
+        self.mounts.append((parent, path, child[0]))
+
+    def route_decorators(self, node):
+        # Yield (owner, path, methods) for every route decorator on a function
+        for decorator in node.decorator_list:
+            if not isinstance(decorator, ast.Call) or not isinstance(decorator.func, ast.Attribute):
+                continue
+            owner = decorator.func.value
+            if not isinstance(owner, ast.Name) or owner.id not in self.routes:
+                continue
+            attr = decorator.func.attr
+            path = literal(decorator.args[0]) if decorator.args else keyword_value(decorator, "path")
+            if path is None:
+                continue
+            if self.framework == "fastapi" and attr in FASTAPI_METHOD_DECORATORS:
+                yield owner.id, path, [attr.upper()]
+            elif self.framework == "fastapi" and attr == "api_route":
+                yield owner.id, path, [method.upper() for method in keyword_value(decorator, "methods", ["GET"])]
+            elif self.framework == "flask" and attr in FLASK_METHOD_DECORATORS:
+                yield owner.id, path, [attr.upper()]
+            elif self.framework == "flask" and attr == "route":
+                methods = keyword_value(decorator, "methods", ["GET"])
+                yield owner.id, path, [method.upper() for method in methods if method.upper() not in ("HEAD", "OPTIONS")]
+
+    def path_parameters(self, path):
+        if self.framework == "flask":
+            return [name.split(":")[-1] for name in re.findall(r"<([^>]+)>", path)]
+        return [name.split(":")[0] for name in re.findall(r"{([^}]+)}", path)]
+
+    def describe_argument(self, arg, default, path_parameters):
+        annotation = ast.unparse(arg.annotation) if arg.annotation is not None else None
+        kind = None
+        value = None
+        description = None
+        if isinstance(default, ast.Call) and call_name(default) in FASTAPI_PARAM_KINDS:
+            kind = FASTAPI_PARAM_KINDS[call_name(default)]
+            if default.args:
+                value = ast.unparse(default.args[0])
+            for keyword in default.keywords:
+                if keyword.arg == "default":
+                    value = ast.unparse(keyword.value)
+                elif keyword.arg == "description":
+                    description = literal(keyword.value)
+        elif default is not None:
+            value = ast.unparse(default)
+
+        if kind is None:
+            if arg.arg in path_parameters:
+                kind = "path"
+            elif annotation is None or set(re.findall(r"\w+", annotation)) <= SIMPLE_TYPES:
+                kind = "query"
+            else:
+                # FastAPI treats pydantic models and other complex annotations as the request body
+                kind = "body"
+
+        details = {
+            "name": arg.arg,
+            "annotation": annotation,
+            "default": "required" if value in (None, "...") else value,
+            "description": description
+        }
+        if kind == "body":
+            details["media_type"] = FASTAPI_BODY_MEDIA_TYPES.get(call_name(default), "application/json")
+        return kind, details
+
+    def dependency_calls(self, node):
+        # Depends()/Security() in a function's route decorators, then in its signature
+        decorators = [item for decorator in node.decorator_list if isinstance(decorator, ast.Call) for item in dependencies_keyword(decorator)]
+        return decorators + [default for default in node.args.defaults + node.args.kw_defaults if default is not None]
+
+    def dependency_functions(self, calls, seen=None):
+        """
+        Yield the module-level functions used through the Depends()/Security() calls, nested ones
+        included. Dependencies defined elsewhere are yielded as None.
+        """
+        seen = seen if seen is not None else set()
+        for call in calls:
+            if not isinstance(call, ast.Call) or FASTAPI_PARAM_KINDS.get(call_name(call)) != "dependency" or not call.args:
+                continue
+            name = call_name(call.args[0])
+            if name in seen:
+                continue
+            seen.add(name)
+            function = self.functions.get(name) if isinstance(call.args[0], ast.Name) else None
+            yield function
+            if function is not None:
+                yield from self.dependency_functions(self.dependency_calls(function), seen)
+
+    def with_dependencies(self, route, calls):
+        """
+        Copy of a route that runs the Depends() calls before its own dependencies: their source is
+        put first in `dependencies` and their parameters (e.g. a token header) are added to the route's.
+        """
+        sources = []
+        parameters = {kind: list(getattr(route, f"{kind}_parameters")) for kind in ("query", "body", "header")}
+        for function in self.dependency_functions(calls):
+            if function is None:
+                sources.append("Code not found")
+                continue
+            sources.append(self.handler_source(function)[0])
+            for kind, details in self.function_parameters(function, route.parameters):
+                if kind in parameters and details["name"] not in [parameter["name"] for parameter in parameters[kind]]:
+                    parameters[kind].append(details)
+        return replace(
+            route, dependencies=sources + route.dependencies,
+            **{f"{kind}_parameters": value for kind, value in parameters.items()}
+        )
+
+    def function_parameters(self, node, path_parameters):
+        args = node.args.args + node.args.kwonlyargs
+        defaults = [None] * (len(node.args.args) - len(node.args.defaults)) + node.args.defaults + node.args.kw_defaults
+        for arg, default in zip(args, defaults):
+            yield self.describe_argument(arg, default, path_parameters)
+
+    def build_endpoint(self, node, owner, path, methods):
+        full_path = join_paths(self.routers.get(owner, ""), path)
+        path_parameters = self.path_parameters(full_path)
+        code, line = self.handler_source(node)
+        route = Route(
+            api_name=node.name,
+            path=full_path,
+            methods=methods,
+            parameters=path_parameters,
+            code=code,
+            source_file=self.file_path,
+            source_line=line
+        )
+        if self.framework == "fastapi":
+            for kind, details in self.function_parameters(node, path_parameters):
+                if kind in ("query", "body", "header"):
+                    getattr(route, f"{kind}_parameters").append(details)
+            # Parameters of dependencies (e.g. a token header read by Depends()) are part of the request too
+            route = self.with_dependencies(route, self.owner_dependencies.get(owner, []) + self.dependency_calls(node))
+        return route
+
+    def collect(self, tree):
+        self.functions = {
+            node.name: node for node in tree.body if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        }
+        for node in tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.visit_import(node)
+            elif isinstance(node, ast.Assign):
+                self.visit_assignment(node)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+                self.visit_include(node)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for owner, path, methods in self.route_decorators(node):
+                    self.routes[owner].append(self.build_endpoint(node, owner, path, methods))
+        for parent, prefix, routes in self.mounts:
+            for route in list(routes):
+                path = join_paths(prefix, route.path)
+                self.routes[parent].append(replace(route, path=path, parameters=self.path_parameters(path)))
+
+        owners = [app for app in self.apps if app not in self.mounted]
+        if not owners:
+            # Router-only modules: document the routers not included in another one, with their own prefix
+            owners = [router for router in self.routers if router not in self.included]
+        return [route for owner in owners for route in self.routes[owner]]
+
+
+def extract_api_details_ast(file_path, framework="auto"):
+    """
+    Extract endpoints from a FastAPI or Flask file without importing it.
+
+    Returns the same Routes as the import-based extractor, with the query, body and header
+    parameters (and their defaults) read from the handler signature. Routers and blueprints
+    imported from local modules, nested routers and mounted sub-applications are followed.
+    """
+    framework = resolve_framework(file_path, framework)
+    with open(file_path, "r") as file:
+        source = file.read()
+    tree = ast.parse(source, filename=file_path)
+    return RouteCollector(source, framework, os.path.abspath(file_path)).collect(tree)
@@ -0,0 +1,122 @@
+from documentor.llm_backends import create_llm
+import json
+import os
+import uuid
+
+# Client name -> class implementing submit/status/download_results
+BATCH_CLIENTS = {}
+
+# Batch statuses after which polling stops (same names as the OpenAI Batch API)
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def register_batch_client(name):
+    def decorator(cls):
+        BATCH_CLIENTS[name] = cls
+        return cls
+    return decorator
+
+
+@register_batch_client("openai")
+class OpenAIBatchClient:
+    def __init__(self, work_dir, **options):
+        from openai import OpenAI
+
+        self.work_dir = work_dir
+        self.client = OpenAI()
+
+    def submit(self, input_path):
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id):
+        return self.client.batches.retrieve(batch_id).status
+
+    def download_results(self, batch_id, output_path):
+        batch = self.client.batches.retrieve(batch_id)
+        with open(output_path, "w") as f:
+            if batch.output_file_id:
+                f.write(self.client.files.content(batch.output_file_id).text)
+            if batch.error_file_id:
+                f.write(self.client.files.content(batch.error_file_id).text)
+
+
+@register_batch_client("local")
+class LocalBatchClient:
+    def __init__(self, work_dir, backend="fake", backend_options=None, max_concurrency=8):
+        """
+        File-based stand-in for a batch API: requests are run with a local chat model on submit,
+        and results are written in the OpenAI batch output format.
+
+        :param work_dir: Directory holding the batch state and output files
+        :param backend: LLM backend used to answer the requests (see documentor.llm_backends)
+        :param backend_options: Extra keyword arguments for the backend factory
+        :param max_concurrency: Maximum number of requests run at the same time
+        """
+        self.work_dir = work_dir
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        self.max_concurrency = max_concurrency
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def state_path(self, batch_id):
+        return os.path.join(self.work_dir, f"{batch_id}.state.json")
+
+    def submit(self, input_path):
+        batch_id = f"batch_local_{uuid.uuid4().hex}"
+        with open(input_path, "r") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+
+        results = []
+        # Requests are grouped per model, one LangChain batch call each
+        by_model = {}
+        for request in requests:
+            by_model.setdefault(request["body"]["model"], []).append(request)
+        for model, model_requests in by_model.items():
+            llm = create_llm(self.backend, model, temperature=model_requests[0]["body"].get("temperature", 0), **self.backend_options)
+            prompts = [request["body"]["messages"][-1]["content"] for request in model_requests]
+            responses = llm.batch(prompts, config={"max_concurrency": self.max_concurrency}, return_exceptions=True)
+            for request, response in zip(model_requests, responses):
+                results.append(self.format_result(request, response))
+
+        output_path = os.path.join(self.work_dir, f"{batch_id}.output.jsonl")
+        with open(output_path, "w") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        with open(self.state_path(batch_id), "w") as f:
+            json.dump({"status": "completed", "input_path": input_path, "output_path": output_path}, f)
+        return batch_id
+
+    def format_result(self, request, response):
+        if isinstance(response, Exception):
+            return {"custom_id": request["custom_id"], "response": None, "error": {"message": str(response)}}
+        return {
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"role": "assistant", "content": response.content}}]}
+            },
+            "error": None
+        }
+
+    def status(self, batch_id):
+        with open(self.state_path(batch_id), "r") as f:
+            return json.load(f)["status"]
+
+    def download_results(self, batch_id, output_path):
+        with open(self.state_path(batch_id), "r") as f:
+            state = json.load(f)
+        with open(state["output_path"], "r") as source, open(output_path, "w") as destination:
+            destination.write(source.read())
+
+
+def create_batch_client(name, work_dir, **options):
+    if name not in BATCH_CLIENTS:
+        raise ValueError(f"Unknown batch client: {name}. Options: {', '.join(sorted(BATCH_CLIENTS))}")
+    return BATCH_CLIENTS[name](work_dir, **options)
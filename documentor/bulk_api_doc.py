@@ -1,12 +1,37 @@
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-import importlib.util
-import json
+from documentor.llm_cache import LLMResponseCache
+from documentor.llm_backends import create_llm
+from documentor.metrics import RunMetrics, InstrumentedLLM
+from documentor.prompt_registry import get_prompt_registry
+from documentor.compaction import CodeCompactor
+from documentor.chunking import split_api_source, module_header
+from documentor.tokens import count_tokens
 import os 
 import datetime
+import time
+
+# Appended to the version prompt when the API file is documented in parts
+CHUNK_INSTRUCTIONS = """
+
+Note: the API file is too large for a single request and has been split into {chunk_count} parts; the content above is part {chunk_number}. Document only the endpoints that appear in this part, using a level-2 heading (##) per endpoint. Do not write an overall title, overview or table of contents, those are added when the parts are assembled."""
+
+# Cheap merge step: only the outline of the generated parts is sent back to the LLM
+MERGE_PROMPT = """You are assembling a README for an API whose endpoint documentation was generated in separate parts.
+Using the setup code and the outline of the generated sections below, write the beginning of the README in markdown:
+1. A level-1 title for the API.
+2. An **Overview** section summarising the API's purpose and key use cases.
+3. A **Table of Contents** listing every endpoint section in the order given.
+
+Return only these sections; the endpoint documentation will be appended after them.
+
+Setup code:
+{header}
+
+Outline of the generated sections:
+{outline}"""
 
 class BulkAPIDocumentationGenerator:
-    def __init__(self, model,api_file_path, output_dir, prompt_version):
+    def __init__(self, model,api_file_path, output_dir, prompt_version, use_cache=True, chunk_tokens=None, concurrency=4,
+                 backend="openai", backend_options=None, rate_limits=None, compact_code=False, llm=None):
         self.api_file_path = api_file_path
         self.model = model
         self.prompt_version = prompt_version
@@ -15,18 +40,37 @@ class BulkAPIDocumentationGenerator:
         #directotry to save the results, will be the model name
         self.output_directory = os.path.join(output_dir,self.model,"BatchAPI",self.prompt_version)
         self.output_file_path = os.path.join(self.output_directory,self.output_file_name+".md")
+        # Latency, token, cache and cost report written next to the README
+        self.report_file_path = os.path.join(self.output_directory,self.output_file_name+".report.json")
         
-        self.prompt_file_path = "/Users/neel/Developer/cmpe297_project/prompts/bulk_api_prompts.json"
+        # Prompt template, validated and compiled once (see documentor.prompt_registry)
+        self.prompt = get_prompt_registry().get("bulk", self.prompt_version)
+        # Strip comments, long docstrings, large literals and duplicated functions before the file is sent
+        self.compactor = CodeCompactor(model=model) if compact_code else None
         self.model = model
+        # Files larger than chunk_tokens are split at route boundaries and documented in parallel
+        self.chunk_tokens = chunk_tokens
+        self.concurrency = max(1, concurrency)
+        # Responses are cached on disk so re-running on an unchanged file costs no tokens
+        self.cache = LLMResponseCache(os.path.join(output_dir, ".llm_cache")) if use_cache else None
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        # Requests/tokens per minute and retry settings of the shared scheduler (see documentor.rate_limiter)
+        self.rate_limits = rate_limits
+        self.metrics = RunMetrics("bulk", self.model, self.prompt_version, self.backend)
+        # Chat model built once by a long-running caller (see documentor.service), instead of a new client per run
+        self.shared_llm = llm
         self.llm = self.initialize_llm()
 
     def initialize_llm(self):
-        return ChatOpenAI(model="gpt-4", temperature=0)
+        if self.shared_llm:
+            # Calls still go into this run's metrics
+            return InstrumentedLLM(self.shared_llm, self.metrics, self.model)
+        return create_llm(self.backend, self.model, temperature=0, cache=self.cache, metrics=self.metrics,
+                          rate_limits=self.rate_limits, **self.backend_options)
 
     def load_prompt_template(self):
-        with open(self.prompt_file_path, "r") as file:
-            prompts = json.load(file)
-        return prompts.get(self.prompt_version, "Default prompt not found.")
+        return self.prompt.template
 
     def extract_api_file_content(self):
         with open(self.api_file_path, "r") as file:
@@ -34,12 +78,59 @@ class BulkAPIDocumentationGenerator:
 
     def generate_readme(self):
         api_file_content = self.extract_api_file_content()
-        prompt_template = self.load_prompt_template()
+        if self.compactor:
+            api_file_content = self.compactor.compact(api_file_content)
+            self.compactor.report()
+            self.metrics.extra["compaction"] = self.compactor.stats()
+        if self.chunk_tokens and count_tokens(api_file_content, self.model) > self.chunk_tokens:
+            return self.generate_readme_in_chunks(api_file_content)
 
-        prompt = prompt_template.format(api_file_content=api_file_content)
+        prompt = self.prompt.format(api_file_content=api_file_content)
 
         response = self.llm.invoke(prompt)
         return response.content
+
+    async def adocument_chunks(self, prompts):
+        import asyncio
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def document_chunk(number, prompt):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await self.llm.ainvoke(prompt)
+                latency = time.perf_counter() - start
+                print(f"Chunk {number}/{len(prompts)}: {count_tokens(prompt, self.model)} prompt tokens, {latency:.2f}s")
+                return response.content
+
+        return await asyncio.gather(*(document_chunk(number, prompt) for number, prompt in enumerate(prompts, 1)))
+
+    def generate_readme_in_chunks(self, api_file_content):
+        # asyncio is only loaded for chunked files, single-request runs start faster without it
+        import asyncio
+
+        start = time.perf_counter()
+        chunks = split_api_source(api_file_content, self.chunk_tokens, self.model)
+        print(f"Splitting {self.api_file_path} into {len(chunks)} chunks of at most {self.chunk_tokens} tokens")
+
+        prompts = [
+            self.prompt.format(api_file_content=chunk)
+            + CHUNK_INSTRUCTIONS.format(chunk_count=len(chunks), chunk_number=number)
+            for number, chunk in enumerate(chunks, 1)
+        ]
+        sections = asyncio.run(self.adocument_chunks(prompts))
+
+        # The merge call only sees the headings of each part, not the full generated text
+        outline = "\n".join(
+            line for section in sections for line in section.splitlines() if line.lstrip().startswith("#")
+        )
+        merge_prompt = MERGE_PROMPT.format(header=module_header(api_file_content), outline=outline)
+        merge_start = time.perf_counter()
+        introduction = self.llm.invoke(merge_prompt).content
+        print(f"Merge step: {count_tokens(merge_prompt, self.model)} prompt tokens, {time.perf_counter() - merge_start:.2f}s")
+        print(f"Chunked README generated in {time.perf_counter() - start:.2f}s total")
+
+        return "\n\n".join([introduction.strip()] + [section.strip() for section in sections]) + "\n"
     
     def save_readme_to_file(self, documentation):
         # Create the output directory if it doesn't exist
@@ -54,6 +145,9 @@ class BulkAPIDocumentationGenerator:
         readme_content = self.generate_readme()
         # Save README to file
         self.save_readme_to_file(readme_content)
+        self.metrics.write_report(self.report_file_path)
+        if self.cache:
+            self.cache.report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+from documentor.tokens import count_tokens
+import ast
+
+
+def top_level_segments(source, tree):
+    """
+    Split a module into (kind, text) segments, one per top-level statement.
+
+    Comments and blank lines above a statement stay with it, so a route keeps its
+    leading comment. Imports and app/router construction are marked as "header".
+    """
+    lines = source.splitlines(keepends=True)
+    segments = []
+    previous_end = 0
+    for node in tree.body:
+        text = "".join(lines[previous_end:node.end_lineno])
+        previous_end = node.end_lineno
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            kind = "header"
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call) and \
+                getattr(node.value.func, "id", getattr(node.value.func, "attr", None)) in ("FastAPI", "APIRouter", "Flask", "Blueprint"):
+            kind = "header"
+        else:
+            kind = "body"
+        segments.append((kind, text))
+
+    trailing = "".join(lines[previous_end:])
+    if trailing.strip() and segments:
+        kind, text = segments[-1]
+        segments[-1] = (kind, text + trailing)
+    return segments
+
+
+def module_header(source):
+    """
+    Return the imports and app/router construction of a module, which every chunk repeats.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return ""
+    return "".join(text for kind, text in top_level_segments(source, tree) if kind == "header").strip()
+
+
+def split_oversized(text, max_tokens, model):
+    # A single statement larger than the budget falls back to the Python-aware text splitter
+    from langchain_text_splitters import Language, RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter.from_language(
+        Language.PYTHON,
+        chunk_size=max_tokens,
+        chunk_overlap=0,
+        length_function=lambda chunk: count_tokens(chunk, model)
+    )
+    return splitter.split_text(text)
+
+
+def split_api_source(source, max_tokens, model="gpt-4o-mini"):
+    """
+    Split an API file into chunks of at most max_tokens tokens at route/function boundaries.
+
+    Every chunk starts with the module header (imports and app/router construction) so each
+    part can be documented on its own. Returns a list of chunk strings.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return split_oversized(source, max_tokens, model)
+
+    segments = top_level_segments(source, tree)
+    header = "".join(text for kind, text in segments if kind == "header").strip() + "\n\n"
+    body_budget = max(max_tokens - count_tokens(header, model), max_tokens // 4)
+
+    chunks = []
+    current, current_tokens = [], 0
+    for kind, text in segments:
+        if kind == "header":
+            continue
+        tokens = count_tokens(text, model)
+        if tokens > body_budget:
+            pieces = split_oversized(text, body_budget, model)
+        else:
+            pieces = [text]
+        for piece in pieces:
+            piece_tokens = count_tokens(piece, model)
+            if current and current_tokens + piece_tokens > body_budget:
+                chunks.append(header + "".join(current).strip() + "\n")
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(header + "".join(current).strip() + "\n")
+    return chunks or [source]
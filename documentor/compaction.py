@@ -0,0 +1,150 @@
+from documentor.tokens import count_tokens
+import ast
+import textwrap
+import threading
+
+
+class LiteralTruncator(ast.NodeTransformer):
+    def __init__(self, max_chars, max_items):
+        self.max_chars = max_chars
+        self.max_items = max_items
+
+    def visit_JoinedStr(self, node):
+        # f-string parts are Constants too, but shortening them would change the template
+        return node
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, (str, bytes)) and len(node.value) > self.max_chars:
+            marker = "..." if isinstance(node.value, str) else b"..."
+            return ast.copy_location(ast.Constant(node.value[:self.max_chars] + marker), node)
+        return node
+
+    def truncate_sequence(self, node):
+        self.generic_visit(node)
+        if len(node.elts) > self.max_items:
+            node.elts = node.elts[:self.max_items] + [ast.Constant(...)]
+        return node
+
+    visit_List = visit_Tuple = visit_Set = truncate_sequence
+
+    def visit_Dict(self, node):
+        self.generic_visit(node)
+        if len(node.keys) > self.max_items:
+            node.keys = node.keys[:self.max_items] + [ast.Constant("...")]
+            node.values = node.values[:self.max_items] + [ast.Constant(...)]
+        return node
+
+
+def docstring_node(node):
+    if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+        first = node.body[0]
+        if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+            return first
+    return None
+
+
+class CodeCompactor:
+    def __init__(self, max_literal_chars=120, max_literal_items=6, docstring_lines=3, model="gpt-4o-mini"):
+        """
+        Shrinks Python source before it is put into a prompt, keeping signatures and behavior.
+
+        The code is parsed and re-emitted with ast.unparse, which drops comments and blank lines.
+        Docstrings keep their first lines (examples further down are dropped), string literals and
+        literal collections are truncated, and functions whose body repeats an earlier function
+        in the same compact_many call are replaced by a stub pointing to the first one.
+
+        :param max_literal_chars: Longest string/bytes literal kept whole
+        :param max_literal_items: Most elements kept from a list, tuple, set or dict literal
+        :param docstring_lines: Lines kept from each docstring (0 drops docstrings)
+        :param model: Model used to count tokens for the before/after report
+        """
+        self.max_literal_chars = max_literal_chars
+        self.max_literal_items = max_literal_items
+        self.docstring_lines = docstring_lines
+        self.model = model
+        self.compacted = {}  # source -> compacted source, endpoints are often formatted more than once
+        # source -> (tokens before, tokens after) of the version last sent, so a grouped endpoint
+        # that is first sized on its own and then compacted with its group is counted once
+        self.token_counts = {}
+        self.lock = threading.Lock()
+
+    def shorten_docstrings(self, tree):
+        for node in ast.walk(tree):
+            docstring = docstring_node(node)
+            if docstring is None:
+                continue
+            if self.docstring_lines <= 0:
+                node.body = node.body[1:] or [ast.Pass()]
+                continue
+            lines = [line.strip() for line in docstring.value.value.strip().splitlines()]
+            # Stop at the first blank line so "Example:" sections and long descriptions are dropped
+            if "" in lines:
+                lines = lines[:lines.index("")]
+            docstring.value = ast.Constant("\n".join(lines[:self.docstring_lines]))
+
+    def deduplicate_functions(self, tree, seen):
+        for node in ast.walk(tree):
+            if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                continue
+            body = ast.unparse(ast.Module(body=node.body, type_ignores=[]))
+            if len(body) < 100:
+                continue  # a stub would not be shorter
+            if body in seen and seen[body] != node.name:
+                node.body = [ast.Expr(ast.Constant(f"Same body as {seen[body]}()."))]
+            else:
+                seen.setdefault(body, node.name)
+
+    def transform(self, source, seen):
+        tree = ast.parse(textwrap.dedent(source))
+        self.shorten_docstrings(tree)
+        tree = LiteralTruncator(self.max_literal_chars, self.max_literal_items).visit(tree)
+        self.deduplicate_functions(tree, seen)
+        return ast.unparse(ast.fix_missing_locations(tree))
+
+    def compact_many(self, sources):
+        """
+        Compact several code blocks that are sent in the same prompt, deduplicating functions across them.
+        """
+        seen = {}
+        results = []
+        for source in sources:
+            try:
+                compacted = self.transform(source, seen)
+            except SyntaxError:
+                # Partial snippets (e.g. a chunk cut mid-statement) are sent unchanged
+                compacted = source
+            results.append(compacted)
+            counts = (count_tokens(source, self.model), count_tokens(compacted, self.model))
+            with self.lock:
+                self.token_counts[source] = counts
+        return results
+
+    def compact(self, source):
+        with self.lock:
+            cached = self.compacted.get(source)
+        if cached is not None:
+            return cached
+        compacted = self.compact_many([source])[0]
+        with self.lock:
+            self.compacted[source] = compacted
+        return compacted
+
+    def stats(self):
+        with self.lock:
+            counts = list(self.token_counts.values())
+        tokens_before = sum(before for before, _ in counts)
+        tokens_after = sum(after for _, after in counts)
+        saved = tokens_before - tokens_after
+        return {
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": saved,
+            "reduction": saved / tokens_before if tokens_before else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(
+            f"Code compaction: {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+            f"({stats['reduction']:.0%} smaller)"
+        )
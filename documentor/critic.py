@@ -0,0 +1,123 @@
+from pydantic import Field, ValidationError, create_model
+import json
+import re
+import statistics
+
+# Closes every critic prompt; the fake backend answers prompts containing it with schema-conforming JSON
+SCHEMA_INSTRUCTION = "Respond with only a JSON object matching this JSON schema:"
+
+
+class CritiqueParseError(ValueError):
+    pass
+
+
+def build_critique_model(criteria):
+    """
+    Pydantic model of one critique: an integer score from 1 to 10 per criterion plus feedback.
+
+    :param criteria: {score key: description of the criterion}
+    """
+    fields = {key: (int, Field(..., ge=1, le=10, description=description)) for key, description in criteria.items()}
+    fields["feedback"] = (str, Field(..., description="Justification of the scores and the main areas to improve"))
+    return create_model("Critique", **fields)
+
+
+def extract_json(text):
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        return json.loads(text)
+    except ValueError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise CritiqueParseError("Response contains no JSON object")
+        try:
+            return json.loads(text[start:end + 1])
+        except ValueError as e:
+            raise CritiqueParseError(f"Response is not valid JSON: {e}")
+
+
+class StructuredCritic:
+    def __init__(self, llm, criteria, instructions, batch_size=4):
+        """
+        Scores documents with a critic LLM that answers in JSON validated against a schema.
+
+        Several documents about the same input are scored in one call. Documents whose part of
+        the answer is missing or invalid are scored again on their own; if that also fails their
+        scores are None. Answers that do not validate are evicted from the LLM response cache.
+
+        :param llm: Chat model (anything with invoke returning a message with .content)
+        :param criteria: {score key: description}, e.g. {"clarity": "Is the documentation clear ...?"}
+        :param instructions: Reviewer instructions put at the top of every prompt
+        :param batch_size: Most documents scored in one call
+        """
+        self.llm = llm
+        self.criteria = criteria
+        self.instructions = instructions
+        self.batch_size = max(1, batch_size)
+        self.critique_model = build_critique_model(criteria)
+
+    def build_prompt(self, context, documents):
+        ids = [f"D{number}" for number in range(1, len(documents) + 1)]
+        batch_model = create_model("Critiques", **{document_id: (self.critique_model, ...) for document_id in ids})
+        blocks = "\n\n".join(f"### Document {document_id}\n{document}" for document_id, document in zip(ids, documents))
+        prompt = (
+            f"{self.instructions}\n\n{context}\n\n{blocks}\n\n"
+            f"Score every document on its own, keyed by its id ({', '.join(ids)}). "
+            f"{SCHEMA_INSTRUCTION}\n{json.dumps(batch_model.model_json_schema())}\n"
+        )
+        return prompt, ids
+
+    def scores_from(self, critique):
+        scores = {key: getattr(critique, key) for key in self.criteria}
+        scores["overall"] = round(statistics.mean(scores.values()), 2)
+        return scores
+
+    def parse(self, text, ids):
+        """
+        Return {id: (scores, critique JSON)} for every document whose critique validates.
+        """
+        data = extract_json(text)
+        if not isinstance(data, dict):
+            raise CritiqueParseError("Response is not a JSON object")
+        parsed = {}
+        for document_id in ids:
+            try:
+                critique = self.critique_model.model_validate(data.get(document_id))
+            except ValidationError:
+                continue
+            parsed[document_id] = (self.scores_from(critique), critique.model_dump_json())
+        return parsed
+
+    def evaluate_batch(self, context, documents, **invoke_options):
+        prompt, ids = self.build_prompt(context, documents)
+        response = self.llm.invoke(prompt, **invoke_options)
+        try:
+            parsed = self.parse(response.content, ids)
+        except CritiqueParseError:
+            parsed = {}
+        if len(parsed) < len(ids) and hasattr(self.llm, "evict"):
+            # Otherwise the fallback and later runs would be served the same rejected answer
+            self.llm.evict(prompt)
+        return [parsed.get(document_id) for document_id in ids], response.content
+
+    def evaluate(self, context, documents, **invoke_options):
+        """
+        Score documents about the same context. Returns [(scores or None, raw critique)] in document order.
+
+        :param context: What the documents are judged against, e.g. the API source
+        :param invoke_options: Extra keyword arguments for llm.invoke (e.g. a metrics label)
+        """
+        results = []
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start:start + self.batch_size]
+            answers, raw_response = self.evaluate_batch(context, batch, **invoke_options)
+            for document, answer in zip(batch, answers):
+                raw = raw_response
+                if answer is None and len(batch) > 1:
+                    # Re-score just this document rather than the whole batch
+                    [answer], raw = self.evaluate_batch(context, [document], **invoke_options)
+                results.append(answer if answer is not None else (None, raw))
+        return results
@@ -0,0 +1,75 @@
+from contextlib import closing, contextmanager
+import hashlib
+import json
+import sqlite3
+import time
+
+
+class EvaluationStore:
+    def __init__(self, db_path):
+        """
+        SQLite index of critic evaluations, keyed by what determines the critique.
+
+        :param db_path: SQLite file, created on first use
+        """
+        self.db_path = db_path
+        with self.connect() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS evaluations (
+                    api_hash TEXT NOT NULL,
+                    doc_hash TEXT NOT NULL,
+                    evaluator_model TEXT NOT NULL,
+                    rubric_version TEXT NOT NULL,
+                    prompt_version TEXT,
+                    api_file TEXT,
+                    scores TEXT NOT NULL,
+                    raw_response TEXT,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (api_hash, doc_hash, evaluator_model, rubric_version)
+                )
+                """
+            )
+
+    @contextmanager
+    def connect(self):
+        # One short-lived connection per call keeps the store safe to use from worker threads
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def lookup(self, api_content, doc_content, evaluator_model, rubric_version):
+        """
+        Return the stored {"scores", "raw_response"} for this critique, or None.
+        """
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT scores, raw_response FROM evaluations "
+                "WHERE api_hash = ? AND doc_hash = ? AND evaluator_model = ? AND rubric_version = ?",
+                (self.hash_text(api_content), self.hash_text(doc_content), evaluator_model, rubric_version)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"scores": json.loads(row[0]), "raw_response": row[1]}
+
+    def save(self, api_content, doc_content, evaluator_model, rubric_version, scores, raw_response,
+             prompt_version=None, api_file=None):
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.hash_text(api_content),
+                    self.hash_text(doc_content),
+                    evaluator_model,
+                    rubric_version,
+                    prompt_version,
+                    api_file,
+                    json.dumps(scores),
+                    raw_response,
+                    time.time()
+                )
+            )
@@ -0,0 +1,182 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+from documentor.critic import SCHEMA_INSTRUCTION
+from documentor.tokens import count_tokens
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+FAKE_VOCABULARY = [
+    "endpoint", "request", "response", "parameter", "returns", "JSON", "status", "client", "server",
+    "path", "query", "body", "header", "optional", "required", "example", "error", "field", "value",
+    "the", "a", "of", "to", "with", "for", "and", "is", "this", "when", "each",
+]
+
+# Granularity in characters of the fake model's simulated prompt prefix cache
+PREFIX_CACHE_BLOCK = 512
+
+FAKE_CRITERIA = ["Completeness", "Clarity", "Accuracy", "Relevance", "Professional Tone and Format"]
+
+
+class FakeRateLimitError(Exception):
+    """
+    Raised by FakeChatModel when it simulates a provider 429 response.
+    """
+
+    status_code = 429
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model for benchmarking the pipelines without network access.
+
+    The same prompt always produces the same text. Each call sleeps for `latency` seconds
+    and returns about `output_tokens` tokens with OpenAI-style usage metadata.
+
+    Throttling can be injected to exercise the retry scheduler: `throttle_rate` rejects that
+    fraction of calls with a 429, and `server_rpm` rejects calls above a requests-per-minute
+    limit enforced over a sliding 60 second window.
+
+    With `prefix_cache`, provider prompt caching is simulated like OpenAI's: the longest prompt
+    prefix (in PREFIX_CACHE_BLOCK character blocks) seen before is reported as cached input tokens
+    once it reaches `prefix_cache_min_tokens`, and the cached share of the prompt makes the call faster.
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.0
+    output_tokens: int = 200
+    throttle_rate: float = 0.0
+    server_rpm: int = 0
+    prefix_cache: bool = False
+    prefix_cache_min_tokens: int = 1024
+    _prefixes: set = PrivateAttr(default_factory=set)
+    _calls: list = PrivateAttr(default_factory=list)
+    _lock: object = PrivateAttr(default_factory=threading.Lock)
+    _rng: object = PrivateAttr(default_factory=lambda: random.Random(0))
+
+    @property
+    def _llm_type(self):
+        return "fake"
+
+    def render_schema(self, schema, rng, definitions):
+        # Minimal JSON Schema instance generator: enough for the pydantic models the critic sends
+        if "$ref" in schema:
+            return self.render_schema(definitions[schema["$ref"].split("/")[-1]], rng, definitions)
+        kind = schema.get("type")
+        if kind == "object":
+            return {name: self.render_schema(value, rng, definitions) for name, value in schema.get("properties", {}).items()}
+        if kind == "integer":
+            return rng.randint(max(schema.get("minimum", 0), 5), schema.get("maximum", 10))
+        if kind == "number":
+            return round(rng.uniform(schema.get("minimum", 0), schema.get("maximum", 10)), 2)
+        if kind == "boolean":
+            return rng.random() < 0.5
+        if kind == "array":
+            return [self.render_schema(schema.get("items", {}), rng, definitions)]
+        return " ".join(rng.choice(FAKE_VOCABULARY) for _ in range(12))
+
+    def render(self, prompt):
+        # Structured output requests (documentor.critic) get JSON matching the schema on the next line
+        schema_request = re.search(re.escape(SCHEMA_INSTRUCTION) + r"\n(.+)", prompt)
+        if schema_request:
+            schema = json.loads(schema_request.group(1))
+            rng = random.Random(int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16))
+            return json.dumps(self.render_schema(schema, rng, schema.get("$defs", {})))
+        # Grouped endpoint requests (documentor.grouping) get a JSON object with one answer per id
+        requested = re.search(r"JSON object whose keys are exactly: ([\w, ]+)", prompt)
+        if requested:
+            ids = [endpoint_id.strip() for endpoint_id in requested.group(1).split(",")]
+            return json.dumps({endpoint_id: self.render_text(f"{endpoint_id}\n{prompt}") for endpoint_id in ids})
+        return self.render_text(prompt)
+
+    def render_text(self, prompt):
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+        rng = random.Random(seed)
+        lines = []
+        # Critic prompts get parseable scores so the evaluation pipeline can run end to end
+        for criterion in FAKE_CRITERIA:
+            if f"{criterion}" in prompt:
+                lines.append(f"{criterion}: {rng.randint(5, 10)}/10")
+        words = [rng.choice(FAKE_VOCABULARY) for _ in range(max(1, self.output_tokens - 8 * len(lines) - 4))]
+        lines.append(f"## Generated documentation {seed % 10000}")
+        lines.append(" ".join(words))
+        return "\n".join(lines)
+
+    def check_throttling(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.throttle_rate and self._rng.random() < self.throttle_rate:
+                raise FakeRateLimitError("Simulated rate limit (throttle_rate)")
+            if self.server_rpm:
+                self._calls[:] = [t for t in self._calls if now - t < 60]
+                if len(self._calls) >= self.server_rpm:
+                    raise FakeRateLimitError(
+                        f"Simulated rate limit ({self.server_rpm} requests per minute)",
+                        retry_after=60 - (now - self._calls[0])
+                    )
+                self._calls.append(now)
+
+    def cached_prefix_tokens(self, prompt):
+        if not self.prefix_cache:
+            return 0
+        ends = range(PREFIX_CACHE_BLOCK, len(prompt) + 1, PREFIX_CACHE_BLOCK)
+        with self._lock:
+            cached_end = 0
+            for end in ends:
+                key = hashlib.sha256(prompt[:end].encode("utf-8")).hexdigest()
+                if key not in self._prefixes:
+                    break
+                cached_end = end
+            for end in ends:
+                self._prefixes.add(hashlib.sha256(prompt[:end].encode("utf-8")).hexdigest())
+        cached_tokens = count_tokens(prompt[:cached_end], self.model_name)
+        return cached_tokens if cached_tokens >= self.prefix_cache_min_tokens else 0
+
+    def prepare(self, messages):
+        # Returns the prompt, its cached prefix tokens and how long the call takes
+        self.check_throttling()
+        prompt = "\n".join(str(message.content) for message in messages)
+        cached_tokens = self.cached_prefix_tokens(prompt)
+        input_tokens = count_tokens(prompt, self.model_name)
+        latency = self.latency * (1 - 0.5 * cached_tokens / input_tokens) if input_tokens else self.latency
+        return prompt, cached_tokens, latency
+
+    def build_result(self, prompt, cached_tokens):
+        content = self.render(prompt)
+        input_tokens = count_tokens(prompt, self.model_name)
+        output_tokens = count_tokens(content, self.model_name)
+        usage = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+        if self.prefix_cache:
+            usage["input_token_details"] = {"cache_read": cached_tokens}
+        message = AIMessage(
+            content=content,
+            usage_metadata=usage,
+            response_metadata={"model_name": self.model_name}
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt, cached_tokens, latency = self.prepare(messages)
+        if latency:
+            time.sleep(latency)
+        return self.build_result(prompt, cached_tokens)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt, cached_tokens, latency = self.prepare(messages)
+        if latency:
+            await asyncio.sleep(latency)
+        return self.build_result(prompt, cached_tokens)
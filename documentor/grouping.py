@@ -0,0 +1,86 @@
+from documentor.tokens import count_tokens
+import json
+import re
+
+# Wraps the prompt version's per-endpoint instructions into one request for several endpoints
+GROUP_PROMPT = """You are documenting several endpoints of the same API in one request.
+
+For every endpoint listed below, write the documentation that this prompt asks for:
+---
+{instructions}
+---
+
+{endpoints}
+
+Return a JSON object whose keys are exactly: {ids}
+Each value must be the complete markdown documentation of that endpoint as a string. Respond with only the JSON object."""
+
+ENDPOINT_BLOCK = """### Endpoint {id}
+- Path: {path}
+- Methods: {methods}
+- Parameters: {parameters}
+- Code:
+{code}
+"""
+
+
+def group_key(endpoint):
+    # Router prefix: the first static path segment, so /users/ and /users/{user_id} share a group
+    for segment in endpoint.path.strip("/").split("/"):
+        if segment and not segment.startswith("{") and not segment.startswith("<"):
+            return segment
+    return "/"
+
+
+def group_endpoints(blocks, endpoints, max_tokens, max_size=8, model="gpt-4o-mini"):
+    """
+    Pack endpoints with the same router prefix into groups whose endpoint blocks fit in max_tokens.
+
+    :param blocks: Formatted endpoint block of every endpoint (see ENDPOINT_BLOCK)
+    :param endpoints: Routes (see documentor.routes), in the same order as blocks
+    :param max_tokens: Token budget for the endpoint blocks of one group
+    :param max_size: Most endpoints per group, which bounds the size of the response
+    Returns a list of index lists. Endpoints too large to share a request get a group of their own.
+    """
+    groups = []
+    open_groups = {}  # group key -> (indices, tokens) of the group still being filled
+    for index, (block, endpoint) in enumerate(zip(blocks, endpoints)):
+        tokens = count_tokens(block, model)
+        if tokens > max_tokens // 2:
+            groups.append([index])
+            continue
+        key = group_key(endpoint)
+        indices, used = open_groups.get(key, ([], 0))
+        if indices and (used + tokens > max_tokens or len(indices) >= max_size):
+            groups.append(indices)
+            indices, used = [], 0
+        indices.append(index)
+        open_groups[key] = (indices, used + tokens)
+    groups.extend(indices for indices, _ in open_groups.values())
+    return sorted(groups)
+
+
+def parse_group_response(text, ids):
+    """
+    Return {id: markdown} for the ids answered with a non-empty string, or {} if the response is not a JSON object.
+    """
+    text = text.strip()
+    # Models often wrap JSON in a code fence despite being asked not to
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            data = json.loads(text[start:end + 1]) if start != -1 and end > start else None
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        return {}
+    return {
+        endpoint_id: data[endpoint_id].strip()
+        for endpoint_id in ids
+        if isinstance(data.get(endpoint_id), str) and data[endpoint_id].strip()
+    }
@@ -0,0 +1,158 @@
+from documentor.routes import Route, FRAMEWORK_EXTRACTORS, module_included_names, register_framework, resolve_framework
+import importlib.util
+import inspect
+
+
+def handler_source(handler):
+    """
+    Return (code, file, first line) of a route handler, or placeholders when the source is unavailable.
+    """
+    if handler is None:
+        return "Code not found", None, None
+    handler = inspect.unwrap(handler)
+    try:
+        lines, line = inspect.getsourcelines(handler)
+        return "".join(lines), inspect.getsourcefile(handler), line
+    except (OSError, TypeError):
+        return "Code not found", None, None
+
+
+def annotation_name(annotation):
+    if annotation is None:
+        return None
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return str(annotation).replace("typing.", "")
+
+
+def describe_field(param):
+    # FastAPI's ModelField: the name, type and default of one query, body or header parameter
+    info = param.field_info
+    return {
+        "name": param.name,
+        "annotation": annotation_name(getattr(info, "annotation", None)),
+        "default": "required" if param.required else repr(param.default),
+        "description": getattr(info, "description", None)
+    }
+
+
+def describe_body_field(param):
+    # File() and Form() parameters set the media type the whole body is sent as
+    return dict(describe_field(param), media_type=getattr(param.field_info, "media_type", "application/json"))
+
+
+def dependency_sources(dependant):
+    # Source of every dependency callable, depth first, like FastAPI resolves them
+    sources = []
+    for dependency in dependant.dependencies:
+        if dependency.call is not None:
+            sources.append(handler_source(dependency.call)[0])
+        sources.extend(dependency_sources(dependency))
+    return sources
+
+
+def fastapi_route_tree(routes, prefix=""):
+    # Yield (full path, route) for every APIRoute, following mounted sub-applications
+    from fastapi.routing import APIRoute
+    from starlette.routing import Mount
+
+    for route in routes:
+        if isinstance(route, APIRoute):
+            yield prefix + route.path, route
+        elif isinstance(route, Mount):
+            yield from fastapi_route_tree(route.routes, prefix + route.path)
+
+
+def fastapi_owners(api_module):
+    """
+    Apps (or, in router-only modules, routers) of a module whose routes are documented.
+    """
+    from fastapi import FastAPI, APIRouter
+
+    values = list(vars(api_module).values())
+    apps = [value for value in values if isinstance(value, FastAPI)]
+    # Sub-applications mounted on another app are documented under the mount path, not on their own
+    mounted = {id(route.app) for app in apps for route in app.routes if getattr(route, "app", None) in apps}
+    owners = [app for app in apps if id(app) not in mounted]
+    if not owners:
+        # Router-only modules: the routers not included in another one, with their own prefix
+        included = module_included_names(api_module)
+        owners = [value for name, value in vars(api_module).items() if isinstance(value, APIRouter) and name not in included]
+    return owners
+
+
+def fastapi_route(route, path):
+    from fastapi.dependencies.utils import get_flat_dependant
+
+    # Parameters of dependencies (e.g. a token header read by Depends()) are part of the request too
+    dependant = get_flat_dependant(route.dependant)
+    code, source_file, source_line = handler_source(route.endpoint)
+    return Route(
+        api_name=route.name or "Unnamed API",
+        path=path,
+        methods=sorted(route.methods),
+        parameters=[param.name for param in route.dependant.path_params],
+        query_parameters=[describe_field(param) for param in dependant.query_params],
+        body_parameters=[describe_body_field(param) for param in dependant.body_params],
+        header_parameters=[describe_field(param) for param in dependant.header_params + dependant.cookie_params],
+        code=code,
+        dependencies=dependency_sources(route.dependant),
+        source_file=source_file,
+        source_line=source_line
+    )
+
+
+@register_framework("fastapi")
+def extract_fastapi_routes(api_module, file_path):
+    return [
+        fastapi_route(route, path) for owner in fastapi_owners(api_module) for path, route in fastapi_route_tree(owner.routes)
+    ]
+
+
+@register_framework("flask")
+def extract_flask_routes(api_module, file_path):
+    from flask import Flask, Blueprint
+
+    values = list(vars(api_module).values())
+    app = next((value for value in values if isinstance(value, Flask)), None)
+    if app is None:
+        # Blueprint-only modules: register the top-level blueprints on a throwaway app to resolve the URL
+        # rules; nested blueprints come along with their parent
+        app = Flask(api_module.__name__, static_folder=None)
+        included = module_included_names(api_module)
+        for name, value in vars(api_module).items():
+            if isinstance(value, Blueprint) and name not in included:
+                app.register_blueprint(value)
+
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == "static" or rule.endpoint.endswith(".static"):
+            continue
+        code, source_file, source_line = handler_source(app.view_functions.get(rule.endpoint))
+        routes.append(Route(
+            api_name=rule.endpoint,
+            path=rule.rule,
+            methods=sorted(rule.methods - {"HEAD", "OPTIONS"}),
+            parameters=list(rule.arguments),
+            code=code,
+            source_file=source_file,
+            source_line=source_line
+        ))
+    return routes
+
+
+def load_module(file_path):
+    spec = importlib.util.spec_from_file_location("api_module", file_path)
+    api_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(api_module)
+    return api_module
+
+
+def extract_api_details_import(file_path, framework="auto"):
+    """
+    Extract endpoints by executing the API module and walking the routes registered on its apps.
+
+    Routes of included routers, blueprints and mounted sub-applications are returned with their full path.
+    """
+    framework = resolve_framework(file_path, framework)
+    return FRAMEWORK_EXTRACTORS[framework](load_module(file_path), file_path)
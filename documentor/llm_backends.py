@@ -0,0 +1,96 @@
+from documentor.llm_cache import CachedLLM
+from documentor.metrics import InstrumentedLLM
+from documentor.rate_limiter import RateLimitedLLM, get_scheduler
+import threading
+
+# Backend name -> factory(model, temperature, **options) returning a LangChain chat model
+LLM_BACKENDS = {}
+
+
+def register_backend(name):
+    def decorator(factory):
+        LLM_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+class LazyChatModel:
+    def __init__(self, factory):
+        """
+        Builds the chat model on its first call, so runs answered entirely from the response
+        cache never import LangChain or the provider SDK.
+
+        :param factory: Callable without arguments returning the chat model
+        """
+        self.factory = factory
+        self.llm = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.llm is None:
+            with self.lock:
+                if self.llm is None:
+                    self.llm = self.factory()
+        return self.llm
+
+    def invoke(self, prompt, **kwargs):
+        return self.get().invoke(prompt, **kwargs)
+
+    async def ainvoke(self, prompt, **kwargs):
+        return await self.get().ainvoke(prompt, **kwargs)
+
+    def stream(self, prompt, **kwargs):
+        return self.get().stream(prompt, **kwargs)
+
+    def __getattr__(self, name):
+        # Anything else (e.g. batch) is read from the built model
+        return getattr(self.get(), name)
+
+
+@register_backend("openai")
+def create_openai_llm(model, temperature, **options):
+    from langchain_openai import ChatOpenAI
+
+    # Retries are handled by the shared scheduler, not by the OpenAI client
+    options.setdefault("max_retries", 0)
+    return ChatOpenAI(model=model, temperature=temperature, **options)
+
+
+@register_backend("fake")
+def create_fake_llm(model, temperature, latency=0.0, output_tokens=200, throttle_rate=0.0, server_rpm=0, prefix_cache=False):
+    from documentor.fake_llm import FakeChatModel
+
+    return FakeChatModel(
+        model_name=model, latency=latency, output_tokens=output_tokens, throttle_rate=throttle_rate, server_rpm=server_rpm,
+        prefix_cache=prefix_cache
+    )
+
+
+def backend_model_key(backend, model):
+    """
+    Name under which a model's outputs are persisted (response cache, stored critiques, manifests).
+    OpenAI keys are the bare model name, so existing caches stay valid; other backends get their own namespace.
+    """
+    return model if backend == "openai" else f"{backend}:{model}"
+
+
+def create_llm(backend, model, temperature=0, cache=None, metrics=None, rate_limits=None, refresh_cache=False, **options):
+    """
+    Build the chat model for a backend. Calls go through the shared rate limiting scheduler of
+    the model, then the response cache and RunMetrics when they are given.
+
+    :param rate_limits: LLMScheduler keyword arguments (rpm, tpm, max_retries, ...); only the
+        first call for a (backend, model) pair configures its scheduler
+    :param refresh_cache: Skip cached responses but still store the new ones (e.g. forced re-evaluations)
+    """
+    if backend not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {backend}. Options: {', '.join(sorted(LLM_BACKENDS))}")
+    llm = LazyChatModel(lambda: LLM_BACKENDS[backend](model, temperature, **options))
+    # Below the cache, so cache hits never use up the rate limit budget
+    llm = RateLimitedLLM(llm, get_scheduler(backend, model, **(rate_limits or {})), model)
+    if cache:
+        llm = CachedLLM(llm, cache, backend_model_key(backend, model), temperature, refresh=refresh_cache)
+    if metrics:
+        # Outermost, so cache hits are recorded too
+        llm = InstrumentedLLM(llm, metrics, model)
+    return llm
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class CachedMessage:
+    # The attributes of the AIMessage a chat model returns, without importing LangChain for cache hits
+    def __init__(self, content):
+        self.content = content
+        self.response_metadata = {"cache_hit": True}
+        self.usage_metadata = None
+
+
+class LLMResponseCache:
+    def __init__(self, cache_dir, max_entries=5000, max_size_bytes=200 * 1024 * 1024, max_age_seconds=30 * 24 * 3600):
+        """
+        :param cache_dir: Directory where cached responses are stored (one JSON file per prompt)
+        :param max_entries: Maximum number of cached responses kept on disk
+        :param max_size_bytes: Maximum total size of the cache directory
+        :param max_age_seconds: Responses older than this are treated as misses and evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        # Evaluators share one cache between worker threads
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.evict()
+
+    @staticmethod
+    def make_key(model, temperature, prompt):
+        # The key covers everything that changes the response of a deterministic call
+        payload = json.dumps({"model": model, "temperature": temperature, "prompt": prompt}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.record(hit=False)
+            return None
+
+        if time.time() - entry["created"] > self.max_age_seconds:
+            self.remove(path)
+            self.record(hit=False)
+            return None
+
+        self.record(hit=True)
+        return entry["content"]
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key, model, temperature, content):
+        entry = {
+            "model": model,
+            "temperature": temperature,
+            "created": time.time(),
+            "content": content
+        }
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{id(entry)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+        # Scanning the directory is not free, so only enforce the limits periodically
+        with self.lock:
+            self.writes += 1
+            should_evict = self.writes % 100 == 0
+        if should_evict:
+            self.evict()
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        # Drop expired entries first, then the oldest ones until the cache fits its limits
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                self.remove(path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_size > self.max_size_bytes):
+            _, size, path = entries.pop(0)
+            self.remove(path)
+            total_size -= size
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def report(self):
+        print(f"LLM cache: {self.hits} hits, {self.misses} misses ({self.cache_dir})")
+
+
+class CachedLLM:
+    def __init__(self, llm, cache, model, temperature, refresh=False):
+        """
+        Wraps a chat model so identical prompts are answered from the on-disk cache.
+
+        :param llm: Underlying chat model (anything with invoke/ainvoke)
+        :param cache: LLMResponseCache instance
+        :param model: Model name used in the cache key
+        :param temperature: Temperature used in the cache key
+        :param refresh: Always call the model and overwrite the cached response
+        """
+        self.llm = llm
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+        self.refresh = refresh
+
+    def lookup(self, key):
+        return None if self.refresh else self.cache.get(key)
+
+    def evict(self, prompt):
+        # Drop a response the caller found unusable, so the next identical prompt calls the model again
+        self.cache.remove(self.cache.entry_path(self.cache.make_key(self.model, self.temperature, prompt)))
+
+    def invoke(self, prompt):
+        key = self.cache.make_key(self.model, self.temperature, prompt)
+        content = self.lookup(key)
+        if content is not None:
+            return CachedMessage(content)
+
+        response = self.llm.invoke(prompt)
+        self.cache.set(key, self.model, self.temperature, response.content)
+        return response
+
+    async def ainvoke(self, prompt):
+        key = self.cache.make_key(self.model, self.temperature, prompt)
+        content = self.lookup(key)
+        if content is not None:
+            return CachedMessage(content)
+
+        response = await self.llm.ainvoke(prompt)
+        self.cache.set(key, self.model, self.temperature, response.content)
+        return response
+
+    def stream(self, prompt):
+        key = self.cache.make_key(self.model, self.temperature, prompt)
+        content = self.lookup(key)
+        if content is not None:
+            yield CachedMessage(content)
+            return
+
+        chunks = []
+        for chunk in self.llm.stream(prompt):
+            chunks.append(chunk.content)
+            yield chunk
+        self.cache.set(key, self.model, self.temperature, "".join(chunks))
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+
+
+class DocumentationManifest:
+    def __init__(self, manifest_path, prompt_template, model_key=""):
+        """
+        Persisted record of the section generated for every endpoint of an API file.
+
+        :param manifest_path: JSON file the manifest is stored in
+        :param prompt_template: Prompt template used for generation; editing it invalidates every entry
+        :param model_key: Backend and model the sections come from (see documentor.llm_backends.backend_model_key);
+            sections written by another backend or model are not reused
+        """
+        self.manifest_path = manifest_path
+        self.prompt_hash = self.hash_text(model_key + "\n" + prompt_template)
+        self.entries = self.load()
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def endpoint_key(endpoint):
+        return f"{','.join(sorted(endpoint.methods))} {endpoint.path}"
+
+    @staticmethod
+    def source_hash(endpoint):
+        # Parameters are included because they are rendered into the prompt alongside the code
+        return DocumentationManifest.hash_text(json.dumps([endpoint.parameters, endpoint.code]))
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f).get("endpoints", {})
+
+    def lookup(self, endpoint):
+        """
+        Return the stored section for an endpoint, or None if it is new or its handler changed.
+        """
+        entry = self.entries.get(self.endpoint_key(endpoint))
+        if entry is None:
+            return None
+        if entry["source_hash"] != self.source_hash(endpoint) or entry["prompt_hash"] != self.prompt_hash:
+            return None
+        return entry["documentation"]
+
+    def update(self, endpoints, documentation):
+        # Rebuild from the current routes only, so removed routes are dropped from the manifest
+        self.entries = {}
+        for endpoint, doc in zip(endpoints, documentation):
+            self.entries[self.endpoint_key(endpoint)] = {
+                "path": endpoint.path,
+                "methods": endpoint.methods,
+                "source_hash": self.source_hash(endpoint),
+                "prompt_hash": self.prompt_hash,
+                "documentation": doc["documentation"]
+            }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"endpoints": self.entries}, f, indent=4)
+        os.replace(tmp_path, self.manifest_path)
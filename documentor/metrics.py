@@ -0,0 +1,192 @@
+from documentor.tokens import count_tokens
+import datetime
+import json
+import os
+import statistics
+import threading
+import time
+
+# Estimated USD price per 1M tokens as (input, output); unknown models are reported at 0
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+# Backends that bill per token; calls to any other backend (e.g. "fake") are reported at 0
+BILLED_BACKENDS = {"openai"}
+
+
+# Prompt tokens served from the provider's prefix cache are billed at this fraction of the input price
+CACHED_INPUT_PRICE_RATIO = 0.5
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_prompt_tokens=0):
+    # Longest matching prefix, so "gpt-4o-mini-2024-07-18" is priced as gpt-4o-mini and not gpt-4
+    matches = [name for name in MODEL_PRICES if model.startswith(name)]
+    if not matches:
+        return 0.0
+    input_price, output_price = MODEL_PRICES[max(matches, key=len)]
+    input_cost = (prompt_tokens - cached_prompt_tokens + cached_prompt_tokens * CACHED_INPUT_PRICE_RATIO) * input_price
+    return (input_cost + completion_tokens * output_price) / 1_000_000
+
+
+def mean_latency(records):
+    return statistics.mean(record["latency"] for record in records) if records else 0.0
+
+
+def aggregate(records):
+    latencies = sorted(record["latency"] for record in records if not record["cache_hit"])
+    sent = [record for record in records if not record["cache_hit"]]
+    sent_prompt_tokens = sum(record["prompt_tokens"] for record in sent)
+    cached_prompt_tokens = sum(record["cached_prompt_tokens"] for record in sent)
+    return {
+        "calls": len(records),
+        "cache_hits": sum(1 for record in records if record["cache_hit"]),
+        "retries": sum(record["retries"] for record in records),
+        "prompt_tokens": sum(record["prompt_tokens"] for record in records),
+        "completion_tokens": sum(record["completion_tokens"] for record in records),
+        # Provider-side prompt caching of shared prefixes, over the calls actually sent
+        "cached_prompt_tokens": cached_prompt_tokens,
+        "prefix_cache_hit_rate": cached_prompt_tokens / sent_prompt_tokens if sent_prompt_tokens else 0.0,
+        "mean_latency_prefix_hit": mean_latency([record for record in sent if record["cached_prompt_tokens"]]),
+        "mean_latency_prefix_miss": mean_latency([record for record in sent if not record["cached_prompt_tokens"]]),
+        "estimated_cost_usd": round(sum(record["cost_usd"] for record in records), 6),
+        "latency_seconds": {
+            "mean": statistics.mean(latencies) if latencies else 0.0,
+            "p50": latencies[len(latencies) // 2] if latencies else 0.0,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+            "max": latencies[-1] if latencies else 0.0,
+        },
+    }
+
+
+class RunMetrics:
+    def __init__(self, mode, model, prompt_version=None, backend="openai"):
+        """
+        Per-run record of every LLM call: latency, tokens, cache hits, retries and estimated cost.
+
+        :param mode: Pipeline that produced the calls, e.g. "bulk", "api_by_api" or "evaluation"
+        :param model: Model name used for cost estimation
+        :param prompt_version: Default label for calls that do not pass their own
+        :param backend: LLM backend the calls went to; only BILLED_BACKENDS get a cost estimate
+        """
+        self.mode = mode
+        self.model = model
+        self.prompt_version = prompt_version
+        self.backend = backend
+        self.started = time.time()
+        self.records = []
+        # Extra top-level report sections, e.g. {"compaction": {...}}
+        self.extra = {}
+        self.lock = threading.Lock()
+
+    def record(self, latency, prompt_tokens, completion_tokens, cache_hit=False, retries=0, label=None,
+               cached_prompt_tokens=0):
+        billed = self.backend in BILLED_BACKENDS and not cache_hit
+        cost = 0.0 if not billed else estimate_cost(self.model, prompt_tokens, completion_tokens, cached_prompt_tokens)
+        with self.lock:
+            self.records.append({
+                "label": label or self.prompt_version,
+                "latency": latency,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_prompt_tokens": cached_prompt_tokens,
+                "cache_hit": cache_hit,
+                "retries": retries,
+                "cost_usd": cost,
+            })
+
+    def summary(self):
+        with self.lock:
+            records = list(self.records)
+        by_label = {}
+        for record in records:
+            by_label.setdefault(record["label"], []).append(record)
+        return {
+            "run": {
+                "mode": self.mode,
+                "model": self.model,
+                "backend": self.backend,
+                "prompt_version": self.prompt_version,
+                "started": datetime.datetime.fromtimestamp(self.started).isoformat(),
+                "wall_seconds": time.time() - self.started,
+            },
+            "totals": aggregate(records),
+            "by_label": {label: aggregate(label_records) for label, label_records in by_label.items()},
+            "calls": records,
+            **self.extra,
+        }
+
+    def write_report(self, report_path):
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        summary = self.summary()
+        with open(report_path, "w") as f:
+            json.dump(summary, f, indent=4)
+        totals = summary["totals"]
+        cost = f"~${totals['estimated_cost_usd']:.4f}" if self.backend in BILLED_BACKENDS else f"no cost ({self.backend} backend)"
+        print(
+            f"Run report saved to {report_path}: {totals['calls']} calls ({totals['cache_hits']} cached), "
+            f"{totals['prompt_tokens']} prompt / {totals['completion_tokens']} completion tokens, "
+            f"{cost}, prefix cache hit rate {totals['prefix_cache_hit_rate']:.0%}"
+        )
+
+
+class InstrumentedLLM:
+    def __init__(self, llm, metrics, model):
+        """
+        Wraps a chat model (or CachedLLM) and records every call in a RunMetrics.
+        """
+        self.llm = llm
+        self.metrics = metrics
+        self.model = model
+
+    def record(self, prompt, response, latency, label):
+        metadata = getattr(response, "response_metadata", None) or {}
+        usage = getattr(response, "usage_metadata", None) or {}
+        cache_hit = bool(metadata.get("cache_hit"))
+        self.metrics.record(
+            latency=latency,
+            prompt_tokens=usage.get("input_tokens") or count_tokens(prompt, self.model),
+            completion_tokens=usage.get("output_tokens") or count_tokens(response.content, self.model),
+            cache_hit=cache_hit,
+            retries=metadata.get("retries", 0),
+            label=label,
+            cached_prompt_tokens=(usage.get("input_token_details") or {}).get("cache_read", 0)
+        )
+
+    def invoke(self, prompt, label=None):
+        start = time.perf_counter()
+        response = self.llm.invoke(prompt)
+        self.record(prompt, response, time.perf_counter() - start, label)
+        return response
+
+    def evict(self, prompt):
+        if hasattr(self.llm, "evict"):
+            self.llm.evict(prompt)
+
+    async def ainvoke(self, prompt, label=None):
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(prompt)
+        self.record(prompt, response, time.perf_counter() - start, label)
+        return response
+
+    def stream(self, prompt, label=None):
+        start = time.perf_counter()
+        chunks = []
+        cache_hit = False
+        for chunk in self.llm.stream(prompt):
+            cache_hit = cache_hit or bool((getattr(chunk, "response_metadata", None) or {}).get("cache_hit"))
+            chunks.append(chunk.content)
+            yield chunk
+        content = "".join(chunks)
+        self.metrics.record(
+            latency=time.perf_counter() - start,
+            prompt_tokens=count_tokens(prompt, self.model),
+            completion_tokens=count_tokens(content, self.model),
+            cache_hit=cache_hit,
+            label=label
+        )
@@ -0,0 +1,38 @@
+from documentor.ast_extractor import call_name
+from documentor.chunking import top_level_segments
+import ast
+
+# Parameter helpers whose first argument is a dependency callable
+DEPENDENCY_HELPERS = {"Depends", "Security"}
+
+
+def dependency_names(tree):
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and call_name(node) in DEPENDENCY_HELPERS and node.args:
+            name = call_name(node.args[0]) if not isinstance(node.args[0], ast.Call) else None
+            if name:
+                names.add(name)
+    return names
+
+
+def build_module_context(source):
+    """
+    Return the parts of a module that every endpoint prompt shares, in source order.
+
+    That is the imports and app/router construction, every top-level class (request and
+    response models, enums) and every top-level function used through Depends()/Security().
+    Route handlers themselves are left out; they go into the per-endpoint part of the prompt.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return ""
+    dependencies = dependency_names(tree)
+    parts = []
+    for node, (kind, text) in zip(tree.body, top_level_segments(source, tree)):
+        if kind == "header" or isinstance(node, ast.ClassDef):
+            parts.append(text.strip())
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in dependencies:
+            parts.append(text.strip())
+    return "\n\n".join(part for part in parts if part)
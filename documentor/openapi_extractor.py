@@ -0,0 +1,279 @@
+from documentor.ast_extractor import raised_http_errors
+from documentor.import_extractor import load_module, fastapi_owners, fastapi_route
+from documentor.routes import resolve_framework
+from dataclasses import replace
+import ast
+import json
+import textwrap
+
+# Added by FastAPI to every operation with parameters; the schema is the same everywhere, the status code is enough
+VALIDATION_ERROR = "422"
+
+# Schema keywords kept next to the type when a schema is rendered
+CONSTRAINTS = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum", "minLength", "maxLength", "pattern", "minItems", "maxItems")
+
+
+class SchemaResolver:
+    def __init__(self, spec):
+        """
+        Resolves the `$ref`s of one app's OpenAPI document. Every referenced schema is resolved
+        once and reused by all operations that point to it.
+        """
+        self.spec = spec
+        self.resolved = {}  # "$ref" -> compacted schema
+
+    def lookup(self, ref):
+        node = self.spec
+        for part in ref.lstrip("#/").split("/"):
+            node = node.get(part, {})
+        return node
+
+    def resolve(self, node, stack=()):
+        if isinstance(node, list):
+            return [self.resolve(item, stack) for item in node]
+        if not isinstance(node, dict):
+            return node
+        ref = node.get("$ref")
+        if ref:
+            if ref in stack:
+                # Self-referencing models (trees, linked lists) stay a named reference
+                return {"$ref": ref.split("/")[-1]}
+            if ref not in self.resolved:
+                # The model name lets a prompt spell out each model once
+                self.resolved[ref] = {"x-model": ref.split("/")[-1], **self.resolve(self.lookup(ref), stack + (ref,))}
+            return self.resolved[ref]
+        schema = {}
+        for key, value in node.items():
+            if key == "title" and isinstance(value, str):
+                # Titles repeat the property or model name
+                continue
+            if key == "properties":
+                schema[key] = {name: self.resolve(item, stack) for name, item in value.items()}
+            else:
+                schema[key] = self.resolve(value, stack)
+        # Optional[X] is rendered by FastAPI as anyOf [X, null]
+        variants = schema.get("anyOf")
+        if isinstance(variants, list) and len(variants) == 2 and {"type": "null"} in variants:
+            schema.pop("anyOf")
+            schema = {**next(variant for variant in variants if variant != {"type": "null"}), **schema, "nullable": True}
+        return schema
+
+    def operation(self, path, method):
+        """
+        Compact operation object of one route: parameters, request body and responses with every schema inlined.
+        """
+        operation = self.spec.get("paths", {}).get(path, {}).get(method.lower())
+        if operation is None:
+            return None
+        compact = {key: operation[key] for key in ("summary", "description", "deprecated") if key in operation}
+        parameters = [
+            {key: self.resolve(parameter[key]) for key in ("name", "in", "required", "schema", "description") if key in parameter}
+            for parameter in operation.get("parameters", [])
+        ]
+        if parameters:
+            compact["parameters"] = parameters
+        body = operation.get("requestBody")
+        if body:
+            compact["requestBody"] = {
+                "required": body.get("required", False),
+                # Examples given with Body(example=...) sit next to the schema
+                "content": {
+                    media: {**self.resolve(item.get("schema", {})), **{key: item[key] for key in ("example", "examples") if key in item}}
+                    for media, item in body.get("content", {}).items()
+                }
+            }
+        responses = {}
+        for status, response in operation.get("responses", {}).items():
+            responses[status] = {"description": response.get("description", "")}
+            schemas = [item.get("schema") for item in response.get("content", {}).values() if item.get("schema")]
+            if schemas and status != VALIDATION_ERROR:
+                responses[status]["schema"] = self.resolve(schemas[0])
+        compact["responses"] = responses
+        return compact
+
+
+def owner_operations(owner, prefix=""):
+    """
+    Yield (full path, APIRoute, resolver) for an app or router, following mounted FastAPI sub-applications.
+    """
+    from fastapi import FastAPI
+    from fastapi.openapi.utils import get_openapi
+    from fastapi.routing import APIRoute
+    from starlette.routing import Mount
+
+    # app.openapi() caches the document on the app; routers get one built from their routes
+    spec = owner.openapi() if isinstance(owner, FastAPI) else get_openapi(title="", version="", routes=owner.routes)
+    resolver = SchemaResolver(spec)
+    for route in owner.routes:
+        if isinstance(route, APIRoute):
+            yield prefix + route.path, route, resolver
+        elif isinstance(route, Mount) and isinstance(route.app, FastAPI):
+            yield from owner_operations(route.app, prefix + route.path)
+
+
+def handler_body(code):
+    """
+    The statements of a handler without its decorators, signature and docstring, which the operation already describes.
+    """
+    source = textwrap.dedent(code)
+    try:
+        function = ast.parse(source).body[0]
+    except (SyntaxError, IndexError):
+        return code
+    if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return code
+    statements = function.body
+    if statements and isinstance(statements[0], ast.Expr) and isinstance(statements[0].value, ast.Constant) \
+            and isinstance(statements[0].value.value, str):
+        statements = statements[1:]
+    if not statements:
+        return ""
+    lines = source.splitlines(keepends=True)
+    return textwrap.dedent("".join(lines[statements[0].lineno - 1:function.end_lineno])).strip()
+
+
+def needs_source(operation):
+    """
+    The handler source is only sent when the schema leaves out what the endpoint does or returns:
+    the handler has no docstring, or a success response has no declared model.
+    """
+    if not operation.get("description"):
+        return True
+    return any(
+        status.startswith("2") and status != "204" and not response.get("schema")
+        for status, response in operation["responses"].items()
+    )
+
+
+def schema_type(schema, models):
+    """
+    One-line type of a resolved schema, e.g. `{id: integer, tags?: string[]}`; shorter than the JSON it replaces.
+
+    :param models: Names of the models already written out in this prompt; later uses only give the name
+    """
+    if not isinstance(schema, dict) or not schema:
+        return "any"
+    model = schema.get("x-model")
+    if model in models:
+        return model + (" | null" if schema.get("nullable") else "")
+    if model:
+        models.add(model)
+    if "$ref" in schema:
+        text = schema["$ref"]
+    elif "enum" in schema:
+        text = " | ".join(json.dumps(value) for value in schema["enum"])
+    elif "anyOf" in schema or "oneOf" in schema:
+        text = " | ".join(schema_type(variant, models) for variant in schema.get("anyOf") or schema.get("oneOf"))
+    elif schema.get("type") == "array":
+        text = schema_type(schema.get("items"), models) + "[]"
+    elif schema.get("type") == "object" or "properties" in schema:
+        required = set(schema.get("required", []))
+        properties = schema.get("properties", {})
+        text = "{" + ", ".join(
+            f"{name}{'' if name in required else '?'}: {schema_type(item, models)}" for name, item in properties.items()
+        ) + "}" if properties else "object"
+    else:
+        text = schema.get("type", "any") + (f"<{schema['format']}>" if "format" in schema else "")
+    constraints = [f"{key} {schema[key]}" for key in CONSTRAINTS if key in schema]
+    if constraints:
+        text += f" ({', '.join(constraints)})"
+    if model:
+        text = f"{model} {text}"
+    return text + (" | null" if schema.get("nullable") else "")
+
+
+def render_operation(route, operation, body):
+    """
+    Prompt text of an operation. Boilerplate FastAPI adds to every operation (the summary made from
+    the function name, "Successful Response", the 422 validation error) is left out.
+    """
+    models = set()
+    summary = operation.get("summary")
+    if summary == route.api_name.replace("_", " ").title():
+        summary = None
+    lines = [f"{', '.join(route.methods)} {route.path}" + (f" ({summary})" if summary else "")]
+    if operation.get("description"):
+        lines.append(operation["description"])
+    if operation.get("deprecated"):
+        lines.append("Deprecated.")
+    if operation.get("parameters"):
+        lines.append("Parameters:")
+        for parameter in operation["parameters"]:
+            schema = parameter.get("schema", {})
+            details = [parameter.get("in", "query"), schema_type(schema, models), "required" if parameter.get("required") else "optional"]
+            if "default" in schema:
+                details.append(f"default {json.dumps(schema['default'])}")
+            description = parameter.get("description") or schema.get("description")
+            lines.append(f"- {parameter['name']} ({', '.join(details)})" + (f": {description}" if description else ""))
+    if operation.get("requestBody"):
+        body_spec = operation["requestBody"]
+        for media, schema in body_spec["content"].items():
+            lines.append(f"Request body ({media}, {'required' if body_spec['required'] else 'optional'}): {schema_type(schema, models)}")
+            if schema.get("description"):
+                lines.append(f"  {schema['description']}")
+            for key in ("example", "examples"):
+                if key in schema:
+                    lines.append(f"  {key}: {json.dumps(schema[key], default=str)}")
+    lines.append("Responses:")
+    for status, response in operation["responses"].items():
+        if status == VALIDATION_ERROR and response["description"] == "Validation Error":
+            continue
+        description = "" if response["description"] == "Successful Response" else f": {response['description']}"
+        schema = f" -> {schema_type(response['schema'], models)}" if response.get("schema") else ""
+        lines.append(f"- {status}{description}{schema}")
+    if body:
+        lines.append("Handler body:\n" + body)
+    return "\n".join(lines)
+
+
+def method_operations(resolver, path, methods):
+    """
+    Operation of every method of a route, as (operation, methods) pairs; methods with identical
+    operations share one pair so a GET/POST route that behaves the same for both stays one endpoint.
+    """
+    grouped = []
+    for method in methods:
+        operation = resolver.operation(path, method)
+        for existing, existing_methods in grouped:
+            if existing == operation:
+                existing_methods.append(method)
+                break
+        else:
+            grouped.append((operation, [method]))
+    return grouped
+
+
+def extract_api_details_openapi(file_path, framework="auto"):
+    """
+    Extract endpoints from the OpenAPI document of a FastAPI app.
+
+    Each route's `code` is its operation object (parameters, request body and response schemas with
+    every `$ref` inlined, plus the HTTPExceptions raised by the handler and its dependencies), with
+    the handler body appended only when the schema does not say what the endpoint does or returns.
+    """
+    if resolve_framework(file_path, framework) != "fastapi":
+        raise ValueError("The openapi extractor only supports FastAPI apps; use the import or ast extractor for Flask")
+    api_module = load_module(file_path)
+    routes = []
+    for owner in fastapi_owners(api_module):
+        for path, api_route, resolver in owner_operations(owner):
+            route = fastapi_route(api_route, path)
+            if not api_route.include_in_schema:
+                # Left out of the schema: document it from the source as the import extractor does
+                routes.append(route)
+                continue
+            # HTTPExceptions of the handler and its dependencies, e.g. a 401 from an auth check
+            errors = [error for code in [route.code] + route.dependencies for error in raised_http_errors(code)]
+            for operation, methods in method_operations(resolver, api_route.path_format, route.methods):
+                # Methods whose operations differ (e.g. only POST takes a body) become endpoints of their own
+                method_route = replace(route, methods=methods) if len(methods) < len(route.methods) else route
+                if operation is not None:
+                    for status, detail in errors:
+                        operation["responses"].setdefault(str(status), {"description": detail or ""})
+                    operation["responses"] = dict(sorted(operation["responses"].items()))
+                    method_route.operation = operation
+                    method_route.code = render_operation(
+                        method_route, operation, handler_body(route.code) if needs_source(operation) else ""
+                    )
+                routes.append(method_route)
+    return routes
@@ -0,0 +1,113 @@
+import functools
+import json
+import os
+import string
+
+# Prompt files live in the repository's prompts/ directory, wherever it is checked out
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prompts")
+
+# Prompt kind -> file holding its versions
+PROMPT_FILES = {
+    "bulk": "bulk_api_prompts.json",
+    "api_by_api": "api_by_api_prompts.json",
+}
+
+# Placeholders every version of a kind must use; anything else is rejected
+REQUIRED_PLACEHOLDERS = {
+    "bulk": {"api_file_content"},
+    "api_by_api": {"path", "methods", "parameters", "code"},
+}
+OPTIONAL_PLACEHOLDERS = {
+    "bulk": set(),
+    # Shared imports, models and dependencies of the module, see documentor.module_context
+    "api_by_api": {"module_context"},
+}
+
+
+class PromptValidationError(ValueError):
+    pass
+
+
+class CompiledPrompt:
+    def __init__(self, kind, version, template):
+        """
+        A prompt template parsed once into literal text and named fields.
+
+        Raises PromptValidationError when the template uses positional, indexed or formatted
+        fields, or its placeholders do not match the ones expected for its kind.
+        """
+        self.kind = kind
+        self.version = version
+        self.template = template
+        self.parts = []
+        try:
+            parsed = list(string.Formatter().parse(template))
+        except ValueError as e:
+            raise PromptValidationError(f"{kind} prompt {version}: {e}")
+        for literal, field, format_spec, conversion in parsed:
+            if field is not None and (not field.isidentifier() or format_spec or conversion):
+                raise PromptValidationError(
+                    f"{kind} prompt {version}: unsupported placeholder '{{{field}}}', only plain names like {{path}} are allowed"
+                )
+            self.parts.append((literal, field))
+        self.placeholders = {field for _, field in self.parts if field is not None}
+
+        missing = REQUIRED_PLACEHOLDERS[kind] - self.placeholders
+        unknown = self.placeholders - REQUIRED_PLACEHOLDERS[kind] - OPTIONAL_PLACEHOLDERS[kind]
+        if missing or unknown:
+            problems = []
+            if missing:
+                problems.append(f"missing {', '.join('{' + name + '}' for name in sorted(missing))}")
+            if unknown:
+                problems.append(f"unknown {', '.join('{' + name + '}' for name in sorted(unknown))}")
+            raise PromptValidationError(f"{kind} prompt {version}: {'; '.join(problems)}")
+
+    def format(self, **values):
+        # Same result as str.format on the template, without re-parsing it on every call
+        return "".join(
+            literal + (str(values[field]) if field is not None else "") for literal, field in self.parts
+        )
+
+
+class PromptRegistry:
+    def __init__(self, prompts_dir=PROMPTS_DIR):
+        """
+        Loads and validates every prompt file once, so a misconfigured version fails before any LLM call.
+
+        :param prompts_dir: Directory holding the files listed in PROMPT_FILES
+        """
+        self.prompts_dir = prompts_dir
+        self.prompts = {}
+        errors = []
+        for kind, file_name in PROMPT_FILES.items():
+            path = os.path.join(prompts_dir, file_name)
+            try:
+                with open(path, "r") as f:
+                    versions = json.load(f)
+            except (OSError, ValueError) as e:
+                errors.append(f"{path}: {e}")
+                continue
+            self.prompts[kind] = {}
+            for version, template in versions.items():
+                try:
+                    self.prompts[kind][version] = CompiledPrompt(kind, version, template)
+                except PromptValidationError as e:
+                    errors.append(f"{path}: {e}")
+        if errors:
+            raise PromptValidationError("Invalid prompt configuration:\n" + "\n".join(errors))
+
+    def versions(self, kind):
+        return sorted(self.prompts[kind])
+
+    def get(self, kind, version):
+        if version not in self.prompts[kind]:
+            raise PromptValidationError(
+                f"Unknown {kind} prompt version: {version}. Options: {', '.join(self.versions(kind))}"
+            )
+        return self.prompts[kind][version]
+
+
+@functools.lru_cache(maxsize=None)
+def get_prompt_registry(prompts_dir=PROMPTS_DIR):
+    # Loaded once per process and shared by every generator
+    return PromptRegistry(prompts_dir)
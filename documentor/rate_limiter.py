@@ -0,0 +1,318 @@
+from documentor.tokens import count_tokens
+from collections import Counter
+import random
+import threading
+import time
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = {408, 409, 429}
+
+# Exception class names of transport errors that carry no status code (openai, httpx)
+RETRYABLE_ERRORS = {"APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout", "TimeoutError", "ConnectionError"}
+
+
+def error_status(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error):
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    return type(error).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after(error):
+    # Honour the server's Retry-After header when there is one
+    seconds = getattr(error, "retry_after", None)
+    if seconds is None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        seconds = headers.get("retry-after")
+    try:
+        return float(seconds) if seconds is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        # Starts full, so a fresh run can use a whole minute's budget straight away
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.available = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self.refill(now)
+        # A request larger than the whole bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        return 0.0 if self.available >= amount else (amount - self.available) / self.rate
+
+
+class LLMScheduler:
+    def __init__(self, rpm=None, tpm=None, max_concurrency=32, max_retries=5, max_throttle_retries=20, base_delay=1.0,
+                 max_delay=60.0, failure_threshold=10, cooldown_seconds=30.0, expected_output_tokens=500):
+        """
+        Shared admission control for every call to one model.
+
+        :param rpm: Requests-per-minute budget (None = unlimited)
+        :param tpm: Tokens-per-minute budget, prompt plus expected output (None = unlimited)
+        :param max_concurrency: Upper bound for the adaptive number of calls in flight
+        :param max_retries: Retries of a call that failed with a 5xx, timeout or connection error
+        :param max_throttle_retries: Retries of a call rejected with a 429, which also pauses every caller briefly
+        :param base_delay: First backoff delay in seconds, doubled on every retry with full jitter
+        :param max_delay: Cap on a single backoff delay
+        :param failure_threshold: Consecutive failed attempts (429s excluded) that open the circuit breaker
+        :param cooldown_seconds: How long an open circuit holds calls back before letting one trial call through
+        :param expected_output_tokens: Completion tokens reserved per call until the real usage is known
+        """
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.in_flight = 0
+        self.successes = 0
+        self.max_retries = max_retries
+        self.max_throttle_retries = max_throttle_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_trial = False
+        # A 429 holds every caller back until paused_until, so they do not hit the server together
+        self.paused_until = 0.0
+        self.expected_output_tokens = expected_output_tokens
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def try_acquire(self, tokens):
+        """
+        Reserve a slot and budget for one call. Returns 0 on success, otherwise the seconds to wait.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.opened_at is not None:
+                # Open circuit: callers wait out the cooldown, then for the trial call to settle it
+                remaining = self.cooldown_seconds - (now - self.opened_at)
+                if remaining > 0:
+                    return remaining
+                if self.half_open_trial:
+                    return 0.05
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= self.limit:
+                return 0.05
+            wait = max(
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens else 0.0
+            )
+            if wait > 0:
+                return wait
+            if self.requests:
+                self.requests.available -= 1
+            if self.tokens:
+                self.tokens.available -= tokens
+            # Half-open: after the cooldown a single trial call is let through
+            self.half_open_trial = self.opened_at is not None
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self, tokens):
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens):
+        # Imported on first async use; the synchronous CLI paths never load asyncio
+        import asyncio
+
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, reserved_tokens, used_tokens=None, error=None):
+        with self.lock:
+            self.in_flight -= 1
+            if self.tokens and used_tokens is not None:
+                # Settle the reservation against the real usage
+                self.tokens.available += reserved_tokens - used_tokens
+            trial = self.half_open_trial
+            self.half_open_trial = False
+            if error is None:
+                self.consecutive_failures = 0
+                self.opened_at = None
+                # Additive increase: one more slot after a full window of successes
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self.successes = 0
+                return
+            if error_status(error) == 429:
+                # Throttling is not an outage: instead of counting toward the breaker, every caller
+                # pauses, and the limit is halved based on what was actually in flight
+                self.throttled += 1
+                pause = retry_after(error)
+                if pause is None:
+                    pause = random.uniform(0, self.base_delay)
+                self.paused_until = max(self.paused_until, time.monotonic() + min(pause, self.max_delay))
+                self.limit = max(1, min(self.limit, self.in_flight + 1) // 2)
+                self.successes = 0
+            elif is_retryable(error):
+                self.consecutive_failures += 1
+                if trial or self.consecutive_failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+
+    def backoff(self, attempt, error):
+        delay = retry_after(error)
+        if delay is None:
+            # Full jitter keeps concurrent retries from hitting the server in lockstep
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return min(delay, self.max_delay)
+
+    def retry_delay(self, failures, error):
+        """
+        Seconds to wait before retrying a call whose failed attempts are counted in failures, or None to give up.
+        """
+        if not is_retryable(error):
+            return None
+        if error_status(error) == 429:
+            # On top of the shared pause, each throttled call backs off on its own
+            return self.backoff(failures["throttled"] - 1, error) if failures["throttled"] <= self.max_throttle_retries else None
+        return self.backoff(failures["errors"] - 1, error) if failures["errors"] <= self.max_retries else None
+
+    def stats(self):
+        return {"concurrency_limit": self.limit, "throttled": self.throttled, "circuit_open": self.opened_at is not None}
+
+
+# One scheduler per (backend, model), so every generator and evaluator in a process shares the same budget
+SCHEDULERS = {}
+SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_scheduler(backend, model, **limits):
+    """
+    Return the shared scheduler for a model, creating it with the given limits on first use.
+    """
+    with SCHEDULERS_LOCK:
+        key = (backend, model)
+        if key not in SCHEDULERS:
+            SCHEDULERS[key] = LLMScheduler(**limits)
+        return SCHEDULERS[key]
+
+
+class RateLimitedLLM:
+    def __init__(self, llm, scheduler, model):
+        """
+        Wraps a chat model so every call goes through the scheduler and is retried on throttling.
+        """
+        self.llm = llm
+        self.scheduler = scheduler
+        self.model = model
+
+    def reserve(self, prompt):
+        return count_tokens(prompt, self.model) + self.scheduler.expected_output_tokens
+
+    def used_tokens(self, response):
+        usage = getattr(response, "usage_metadata", None) or {}
+        return usage.get("total_tokens")
+
+    def retry_delay(self, failures, error):
+        failures["throttled" if error_status(error) == 429 else "errors"] += 1
+        return self.scheduler.retry_delay(failures, error)
+
+    def mark_retries(self, response, retries):
+        # Surfaced in the run report through response_metadata
+        if retries and isinstance(getattr(response, "response_metadata", None), dict):
+            response.response_metadata["retries"] = retries
+        return response
+
+    def invoke(self, prompt):
+        reserved = self.reserve(prompt)
+        failures = Counter()
+        while True:
+            self.scheduler.acquire(reserved)
+            try:
+                response = self.llm.invoke(prompt)
+            except Exception as e:
+                self.scheduler.release(reserved, error=e)
+                delay = self.retry_delay(failures, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.scheduler.release(reserved, self.used_tokens(response))
+            return self.mark_retries(response, sum(failures.values()))
+
+    async def ainvoke(self, prompt):
+        import asyncio
+
+        reserved = self.reserve(prompt)
+        failures = Counter()
+        while True:
+            await self.scheduler.aacquire(reserved)
+            try:
+                response = await self.llm.ainvoke(prompt)
+            except Exception as e:
+                self.scheduler.release(reserved, error=e)
+                delay = self.retry_delay(failures, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.scheduler.release(reserved, self.used_tokens(response))
+            return self.mark_retries(response, sum(failures.values()))
+
+    def stream(self, prompt):
+        reserved = self.reserve(prompt)
+        failures = Counter()
+        while True:
+            self.scheduler.acquire(reserved)
+            started = False
+            released = False
+            try:
+                for chunk in self.llm.stream(prompt):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self.scheduler.release(reserved, error=e)
+                released = True
+                delay = self.retry_delay(failures, e)
+                # Once tokens have been yielded the call cannot be replayed
+                if started or delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            finally:
+                # Also reached when the consumer stops iterating early (break or close())
+                if not released:
+                    self.scheduler.release(reserved)
+            return
+
+    def batch(self, prompts, config=None, return_exceptions=False):
+        from concurrent.futures import ThreadPoolExecutor
+
+        max_workers = (config or {}).get("max_concurrency") or self.scheduler.max_concurrency
+
+        def run(prompt):
+            try:
+                return self.invoke(prompt)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, prompts))
@@ -0,0 +1,263 @@
+from documentor.api_by_api_doc import APIDocumentationGenerator
+from documentor.routes import detect_framework, extract_routes
+from documentor.tokens import count_tokens
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import json
+import os
+import re
+import sys
+import time
+
+# Directories that never contain the project's own route files
+SKIPPED_DIRECTORIES = {".git", ".venv", "venv", "env", "__pycache__", "node_modules", "site-packages", "build", "dist", ".tox", ".nox"}
+
+ROUTE_FILE_PATTERN = re.compile(
+    r"\b(FastAPI|APIRouter|Flask|Blueprint)\s*\(|@\w+\.(get|post|put|delete|patch|route|api_route)\s*\("
+)
+APP_PATTERN = re.compile(r"\b(FastAPI|Flask)\s*\(")
+
+
+def discover_route_files(repo_dir):
+    """
+    Return [(file_path, framework, defines_app)] for every Python file under repo_dir that declares routes.
+    """
+    route_files = []
+    for root, directories, files in os.walk(repo_dir):
+        directories[:] = sorted(d for d in directories if d not in SKIPPED_DIRECTORIES and not d.startswith("."))
+        for name in sorted(files):
+            if not name.endswith(".py"):
+                continue
+            file_path = os.path.join(root, name)
+            try:
+                with open(file_path, "r") as f:
+                    source = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            if ROUTE_FILE_PATTERN.search(source):
+                route_files.append((file_path, detect_framework(source), bool(APP_PATTERN.search(source))))
+    return route_files
+
+
+def add_repository_to_path(repo_dir):
+    # Route modules usually import their own package, e.g. `from app.models import User`
+    if repo_dir not in sys.path:
+        sys.path.insert(0, repo_dir)
+
+
+def extract_file(task):
+    """
+    Process-pool worker: extract the endpoints of one file. Returns (file_path, endpoints, seconds, error).
+    """
+    file_path, framework, extractor = task
+    start = time.perf_counter()
+    try:
+        endpoints = extract_routes(file_path, framework, extractor)
+        return file_path, endpoints, time.perf_counter() - start, None
+    except Exception as e:
+        return file_path, [], time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def handler_key(route):
+    return os.path.realpath(route.source_file) if route.source_file else None, route.source_line
+
+
+def drop_served_by_apps(extracted, app_files):
+    """
+    Drop the routes of router-only modules whose handlers an app file already documents.
+
+    A router included by main.py is served under main.py's prefixes; its own file would document
+    the same handlers again, under paths the app does not serve. Returns the number dropped.
+    """
+    served = {
+        handler_key(route) for file_path, endpoints, _, _ in extracted if file_path in app_files for route in endpoints
+    }
+    dropped = 0
+    for position, (file_path, endpoints, seconds, error) in enumerate(extracted):
+        if file_path in app_files:
+            continue
+        kept = [route for route in endpoints if route.source_line is None or handler_key(route) not in served]
+        dropped += len(endpoints) - len(kept)
+        extracted[position] = (file_path, kept, seconds, error)
+    return dropped
+
+
+class RepositoryDocumentationGenerator:
+    def __init__(self, model, repo_dir, output_dir, prompt_version, concurrency=8, processes=None,
+                 extractor="import", use_cache=True, backend="openai", backend_options=None, rate_limits=None,
+                 compact_code=False, framework="auto", template_threshold=None):
+        """
+        :param model: LLM model name
+        :param repo_dir: Root directory of the repository to document
+        :param output_dir: Directory the output tree is written under
+        :param prompt_version: Version of the api_by_api prompt to use
+        :param concurrency: Maximum number of LLM calls in flight across all files
+        :param processes: Number of extraction worker processes (default: CPU count)
+        :param extractor: "import", "ast" or "openapi", see APIDocumentationGenerator
+        :param framework: "fastapi" or "flask" for every route file, or "auto" to detect it per file
+        :param template_threshold: Render endpoints up to this handler complexity without the LLM, see TemplateRenderer
+        """
+        self.repo_dir = os.path.abspath(repo_dir)
+        self.model = model
+        self.prompt_version = prompt_version
+        self.processes = processes
+        self.extractor = extractor
+        self.framework = framework
+        self.now = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        repo_name = os.path.basename(self.repo_dir.rstrip("/"))
+        self.output_directory = os.path.join(output_dir, model, "Repository", prompt_version, repo_name + self.now)
+
+        # One documenter shares the LLM client, cache and prompt formatting across every file
+        self.documenter = APIDocumentationGenerator(
+            model=model,
+            api_file_path=self.repo_dir,
+            output_dir=output_dir,
+            framework=framework,
+            prompt_version=prompt_version,
+            concurrency=concurrency,
+            use_cache=use_cache,
+            extractor=extractor,
+            backend=backend,
+            backend_options=backend_options,
+            rate_limits=rate_limits,
+            compact_code=compact_code,
+            template_threshold=template_threshold
+        )
+        # Calls are reported per route file rather than per prompt version
+        self.documenter.metrics.mode = "repository"
+
+    def extract_all(self, route_files):
+        tasks = [
+            (file_path, framework if self.framework == "auto" else self.framework, self.extractor)
+            for file_path, framework, _ in route_files
+        ]
+        with ProcessPoolExecutor(
+            max_workers=self.processes, initializer=add_repository_to_path, initargs=(self.repo_dir,)
+        ) as executor:
+            return list(executor.map(extract_file, tasks))
+
+    async def adocument_endpoint(self, semaphore, file_path, endpoint, usage):
+        if self.documenter.templates:
+            doc_content = self.documenter.templates.render(endpoint)
+            if doc_content is not None:
+                return self.documenter.build_section(endpoint, doc_content, 0.0)
+        async with semaphore:
+            prompt = self.documenter.format_prompt(endpoint, file_path)
+            start = time.perf_counter()
+            response = await self.documenter.llm.ainvoke(prompt, label=os.path.relpath(file_path, self.repo_dir))
+            latency = time.perf_counter() - start
+
+        metadata = getattr(response, "usage_metadata", None) or {}
+        usage["prompt_tokens"] += metadata.get("input_tokens") or count_tokens(prompt, self.model)
+        usage["completion_tokens"] += metadata.get("output_tokens") or count_tokens(response.content, self.model)
+        usage["llm_seconds"] += latency
+        usage["last_finished"] = time.perf_counter()
+        return self.documenter.build_section(endpoint, response.content, latency)
+
+    async def agenerate_all(self, extracted, usages):
+        # Imported here so loading this module (e.g. from the CLI) does not pull in asyncio
+        import asyncio
+
+        # A single semaphore caps the LLM calls in flight across all files
+        semaphore = asyncio.Semaphore(self.documenter.concurrency)
+        start = time.perf_counter()
+        tasks = {}
+        for file_path, endpoints, _, _ in extracted:
+            usage = usages[file_path]
+            usage["last_finished"] = start
+            tasks[file_path] = asyncio.gather(
+                *(self.adocument_endpoint(semaphore, file_path, endpoint, usage) for endpoint in endpoints)
+            )
+        results = await asyncio.gather(*tasks.values())
+        for file_path in tasks:
+            usages[file_path]["generation_seconds"] = usages[file_path].pop("last_finished") - start
+        return dict(zip(tasks, results))
+
+    def output_path_for(self, file_path):
+        relative = os.path.relpath(file_path, self.repo_dir)
+        return os.path.join(self.output_directory, os.path.splitext(relative)[0] + ".md")
+
+    def write_outputs(self, documentation, summary):
+        for file_path, sections in documentation.items():
+            output_path = self.output_path_for(file_path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, "w") as f:
+                for section in sections:
+                    f.write(self.documenter.format_section(section))
+
+        # Index page linking every documented file
+        index_path = os.path.join(self.output_directory, "index.md")
+        with open(index_path, "w") as f:
+            f.write(f"# API Documentation: {os.path.basename(self.repo_dir)}\n\n")
+            f.write("| File | Endpoints | Time (s) | Prompt tokens | Completion tokens |\n")
+            f.write("|------|-----------|----------|---------------|-------------------|\n")
+            for file_path, entry in summary["files"].items():
+                if entry["endpoints"] == 0:
+                    continue
+                relative = os.path.relpath(self.output_path_for(file_path), self.output_directory)
+                f.write(
+                    f"| [{os.path.relpath(file_path, self.repo_dir)}]({relative}) | {entry['endpoints']} | "
+                    f"{entry['seconds']:.2f} | {entry['prompt_tokens']} | {entry['completion_tokens']} |\n"
+                )
+        with open(os.path.join(self.output_directory, "summary.json"), "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"Repository documentation saved to {self.output_directory} (index: {index_path})")
+
+    def print_summary(self, summary):
+        print("\n=== Per-file summary ===")
+        for file_path, entry in summary["files"].items():
+            status = f"error: {entry['error']}" if entry["error"] else f"{entry['endpoints']} endpoints"
+            print(
+                f"{os.path.relpath(file_path, self.repo_dir)}: {status}, {entry['seconds']:.2f}s "
+                f"(extraction {entry['extraction_seconds']:.2f}s), "
+                f"{entry['prompt_tokens']} prompt / {entry['completion_tokens']} completion tokens"
+            )
+        print(
+            f"{summary['files_documented']} files, {summary['endpoints']} endpoints in {summary['seconds']:.2f}s, "
+            f"{summary['prompt_tokens']} prompt / {summary['completion_tokens']} completion tokens"
+        )
+
+    def process_and_generate_documentation(self):
+        start = time.perf_counter()
+        route_files = discover_route_files(self.repo_dir)
+        print(f"Found {len(route_files)} route files under {self.repo_dir}")
+
+        # Extraction imports each module, so it runs in parallel worker processes
+        extracted = self.extract_all(route_files)
+        dropped = drop_served_by_apps(extracted, {file_path for file_path, _, defines_app in route_files if defines_app})
+        if dropped:
+            print(f"Skipping {dropped} endpoints of router modules already documented through an app")
+        usages = {
+            file_path: {"prompt_tokens": 0, "completion_tokens": 0, "llm_seconds": 0.0}
+            for file_path, _, _, _ in extracted
+        }
+        import asyncio
+        documentation = asyncio.run(self.agenerate_all(extracted, usages))
+
+        summary = {"files": {}}
+        for file_path, endpoints, extraction_seconds, error in extracted:
+            usage = usages[file_path]
+            summary["files"][file_path] = {
+                "endpoints": len(endpoints),
+                "error": error,
+                "extraction_seconds": extraction_seconds,
+                "seconds": extraction_seconds + usage["generation_seconds"],
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": usage["completion_tokens"]
+            }
+        files = summary["files"].values()
+        summary.update({
+            "files_documented": sum(1 for entry in files if entry["endpoints"]),
+            "endpoints": sum(entry["endpoints"] for entry in files),
+            "prompt_tokens": sum(entry["prompt_tokens"] for entry in files),
+            "completion_tokens": sum(entry["completion_tokens"] for entry in files),
+            "seconds": time.perf_counter() - start
+        })
+
+        self.write_outputs({path: sections for path, sections in documentation.items() if sections}, summary)
+        self.print_summary(summary)
+        self.documenter.report_compaction()
+        self.documenter.report_templates()
+        self.documenter.metrics.write_report(os.path.join(self.output_directory, "run_report.json"))
+        if self.documenter.cache:
+            self.documenter.cache.report()
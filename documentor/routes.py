@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field, asdict
+import ast
+import importlib
+import re
+
+FRAMEWORKS = ("fastapi", "flask")
+
+# Extractor name -> (module, function); imported on first use, the import-based ones pull in the web framework
+ROUTE_EXTRACTORS = {
+    "import": ("documentor.import_extractor", "extract_api_details_import"),
+    "ast": ("documentor.ast_extractor", "extract_api_details_ast"),
+    "openapi": ("documentor.openapi_extractor", "extract_api_details_openapi"),
+}
+
+# Framework name -> extractor(module, file_path) returning the Routes of an imported API module
+FRAMEWORK_EXTRACTORS = {}
+
+# Calls that add a router's or blueprint's routes to another router or app
+INCLUDE_CALLS = ("include_router", "register_blueprint")
+
+FLASK_PATTERN = re.compile(r"^\s*(from\s+flask\b|import\s+flask\b)|\b(Flask|Blueprint)\s*\(", re.MULTILINE)
+FASTAPI_PATTERN = re.compile(r"^\s*(from\s+fastapi\b|import\s+fastapi\b)|\b(FastAPI|APIRouter)\s*\(", re.MULTILINE)
+
+
+def register_framework(name):
+    def decorator(extractor):
+        FRAMEWORK_EXTRACTORS[name] = extractor
+        return extractor
+    return decorator
+
+
+@dataclass(slots=True)
+class Route:
+    """
+    One documented endpoint, as found by the import-based or AST extractor.
+
+    Parameter entries are dicts with name, annotation, default and description; body parameters
+    also carry the media_type they are sent as. `code` is the handler source (decorators included),
+    `source_file`/`source_line` point at where it is defined. `dependencies` holds the source of the
+    functions the route depends on through Depends()/Security(), nested ones included.
+    `operation` is the endpoint's OpenAPI operation when it was read from the app's schema.
+    """
+    api_name: str
+    path: str
+    methods: list
+    parameters: list = field(default_factory=list)  # path parameter names
+    query_parameters: list = field(default_factory=list)
+    body_parameters: list = field(default_factory=list)
+    header_parameters: list = field(default_factory=list)
+    code: str = ""
+    dependencies: list = field(default_factory=list)
+    source_file: str = None
+    source_line: int = None
+    operation: dict = None
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def detect_framework(source):
+    """
+    Guess the framework of a module from its source; FastAPI unless only Flask is used.
+    """
+    if FLASK_PATTERN.search(source) and not FASTAPI_PATTERN.search(source):
+        return "flask"
+    return "fastapi"
+
+
+def resolve_framework(file_path, framework="auto"):
+    if framework != "auto":
+        if framework not in FRAMEWORKS:
+            raise ValueError(f"Unknown framework: {framework}. Options: auto, {', '.join(FRAMEWORKS)}")
+        return framework
+    with open(file_path, "r") as f:
+        return detect_framework(f.read())
+
+
+def extract_routes(file_path, framework="auto", extractor="import"):
+    """
+    Routes of an API file, read by the named extractor (see ROUTE_EXTRACTORS).
+    """
+    if extractor not in ROUTE_EXTRACTORS:
+        raise ValueError(f"Unknown extractor: {extractor}. Options: {', '.join(ROUTE_EXTRACTORS)}")
+    module, function = ROUTE_EXTRACTORS[extractor]
+    return getattr(importlib.import_module(module), function)(file_path, framework)
+
+
+def included_names(source):
+    """
+    Names of the routers and blueprints a module includes in another of its routers or apps.
+
+    Their routes are already served, with the full prefix, through the router they are included
+    in, so router-only modules only document the routers at the top of each include chain.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return set()
+    return {
+        node.args[0].id for node in ast.walk(tree)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr in INCLUDE_CALLS
+        and node.args and isinstance(node.args[0], ast.Name)
+    }
+
+
+def module_included_names(api_module):
+    try:
+        with open(api_module.__file__, "r") as f:
+            return included_names(f.read())
+    except (OSError, TypeError):
+        return set()
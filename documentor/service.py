@@ -0,0 +1,226 @@
+from documentor.bulk_api_doc import BulkAPIDocumentationGenerator
+from documentor.api_by_api_doc import APIDocumentationGenerator
+from documentor.llm_cache import LLMResponseCache
+from documentor.llm_backends import create_llm
+from documentor.prompt_registry import get_prompt_registry, PromptValidationError
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+import datetime
+import hashlib
+import os
+import threading
+import uuid
+
+# Modes the service runs, both document a single uploaded file; each uses the prompt kind of the same name
+SERVICE_MODES = ("bulk", "api_by_api")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class DocumentationJob:
+    def __init__(self, key, mode, prompt_version, file_name, file_hash):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.mode = mode
+        self.prompt_version = prompt_version
+        self.file_name = file_name
+        self.file_hash = file_hash
+        self.status = QUEUED
+        self.created = datetime.datetime.now().isoformat()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.documentation = None
+        self.report = None
+        # Requests answered with this job instead of starting a new one
+        self.coalesced_requests = 0
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "prompt_version": self.prompt_version,
+            "file_name": self.file_name,
+            "file_hash": self.file_hash,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "error": self.error,
+            "coalesced_requests": self.coalesced_requests,
+            "report": self.report,
+            "documentation_url": f"/jobs/{self.id}/documentation" if self.status == SUCCEEDED else None,
+        }
+
+
+class DocumentationService:
+    def __init__(self, model, output_dir, backend="openai", backend_options=None, rate_limits=None, use_cache=True,
+                 max_jobs=4, concurrency=4, chunk_tokens=None, max_finished_jobs=1000):
+        """
+        Runs documentation jobs for uploaded API files in a long-lived process.
+
+        The chat model, response cache and prompt templates are created once and shared by every
+        job. Jobs for the same file content, mode and prompt version are coalesced: a request that
+        matches a queued, running or finished job gets that job's id instead of starting another
+        generation. Failed jobs are not reused, so retrying a request runs it again.
+
+        :param max_jobs: Jobs generated at the same time; later ones wait in the queue
+        :param concurrency: Endpoints (api_by_api) or chunks (bulk) in flight per job
+        :param chunk_tokens: Bulk files larger than this are split into chunks at route boundaries (None = one request)
+        :param max_finished_jobs: Finished jobs kept for polling and coalescing, oldest dropped first
+        """
+        self.model = model
+        self.output_dir = output_dir
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        self.concurrency = max(1, concurrency)
+        self.chunk_tokens = chunk_tokens
+        self.max_finished_jobs = max_finished_jobs
+        # Fail at startup, not on the first request, when a prompt file is invalid
+        self.prompts = get_prompt_registry()
+        self.cache = LLMResponseCache(os.path.join(output_dir, ".llm_cache")) if use_cache else None
+        # The warm client: one connection pool, rate limit scheduler and cache for every job
+        self.llm = create_llm(backend, model, temperature=0, cache=self.cache, rate_limits=rate_limits,
+                              **self.backend_options)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_jobs))
+        self.jobs = {}  # job id -> DocumentationJob, in creation order
+        self.jobs_by_key = {}  # coalescing key -> job id
+        self.lock = threading.Lock()
+
+    def submit(self, content, file_name, mode, prompt_version):
+        """
+        Start (or join) the job documenting content. Returns (job, coalesced).
+
+        Raises ValueError for an unknown mode and PromptValidationError for an unknown prompt version.
+        """
+        if mode not in SERVICE_MODES:
+            raise ValueError(f"Unknown mode: {mode}. Options: {', '.join(SERVICE_MODES)}")
+        self.prompts.get(mode, prompt_version)
+        file_hash = hashlib.sha256(content).hexdigest()
+        key = f"{file_hash}:{mode}:{prompt_version}"
+        with self.lock:
+            existing = self.jobs.get(self.jobs_by_key.get(key))
+            if existing and existing.status != FAILED:
+                existing.coalesced_requests += 1
+                return existing, True
+            # Only the base name of the upload is kept, it becomes the name of the generated file
+            name = os.path.basename(file_name or "")
+            job = DocumentationJob(key, mode, prompt_version, name if name not in ("", ".", "..") else "api.py", file_hash)
+            self.jobs[job.id] = job
+            self.jobs_by_key[key] = job.id
+            self.evict_finished_jobs()
+        self.executor.submit(self.run_job, job, content)
+        return job, False
+
+    def evict_finished_jobs(self):
+        finished = [job for job in self.jobs.values() if job.status in (SUCCEEDED, FAILED)]
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self.jobs[job.id]
+            if self.jobs_by_key.get(job.key) == job.id:
+                del self.jobs_by_key[job.key]
+
+    def job_llm(self, job):
+        if self.concurrency > 1 and (job.mode == "api_by_api" or self.chunk_tokens):
+            # Concurrent endpoints or chunks run on the job's own event loop and async connection pools cannot
+            # outlive their loop, so the job gets its own client on the shared cache and scheduler
+            return create_llm(self.backend, self.model, temperature=0, cache=self.cache, **self.backend_options)
+        return self.llm
+
+    def build_generator(self, job, api_file_path, output_dir):
+        if job.mode == "bulk":
+            return BulkAPIDocumentationGenerator(
+                self.model, api_file_path, output_dir, job.prompt_version, use_cache=False,
+                chunk_tokens=self.chunk_tokens, concurrency=self.concurrency, backend=self.backend, llm=self.job_llm(job)
+            )
+        # Uploaded code is never executed: routes are read with the AST extractor
+        return APIDocumentationGenerator(
+            self.model, api_file_path, output_dir, "auto", job.prompt_version, concurrency=self.concurrency,
+            use_cache=False, extractor="ast", backend=self.backend, llm=self.job_llm(job)
+        )
+
+    def run_job(self, job, content):
+        job.status = RUNNING
+        job.started = datetime.datetime.now().isoformat()
+        try:
+            # Every job writes under its own directory, so identical file names never collide
+            job_dir = os.path.join(self.output_dir, "jobs", job.id)
+            os.makedirs(job_dir, exist_ok=True)
+            api_file_path = os.path.join(job_dir, job.file_name)
+            with open(api_file_path, "wb") as f:
+                f.write(content)
+            generator = self.build_generator(job, api_file_path, job_dir)
+            generator.process_and_generate_documentation()
+            with open(generator.output_file_path, "r") as f:
+                job.documentation = f.read()
+            job.report = generator.metrics.summary()["totals"]
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = FAILED
+            print(f"Job {job.id} failed: {job.error}")
+        job.finished = datetime.datetime.now().isoformat()
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def stats(self):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        for job in jobs:
+            counts[job.status] += 1
+        return {
+            "model": self.model,
+            "backend": self.backend,
+            "jobs": counts,
+            "coalesced_requests": sum(job.coalesced_requests for job in jobs),
+            "prompt_versions": {mode: self.prompts.versions(mode) for mode in SERVICE_MODES},
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_app(service):
+    app = FastAPI(title="API Documentation Service")
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok", **service.stats()}
+
+    @app.post("/jobs", status_code=202)
+    async def create_job(
+        file: UploadFile = File(..., description="API file to document"),
+        mode: str = Form("bulk", description="bulk or api_by_api"),
+        prompt_version: str = Form("v1", description="Prompt version to use"),
+    ):
+        content = await file.read()
+        if not content:
+            raise HTTPException(status_code=400, detail="The uploaded file is empty")
+        try:
+            job, coalesced = service.submit(content, file.filename, mode, prompt_version)
+        except (ValueError, PromptValidationError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {**job.to_dict(), "coalesced": coalesced}
+
+    @app.get("/jobs/{job_id}")
+    def get_job(job_id: str):
+        job = service.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job.to_dict()
+
+    @app.get("/jobs/{job_id}/documentation", response_class=PlainTextResponse)
+    def get_documentation(job_id: str):
+        job = service.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job.status == FAILED:
+            raise HTTPException(status_code=500, detail=job.error)
+        if job.status != SUCCEEDED:
+            raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+        return PlainTextResponse(job.documentation, media_type="text/markdown")
+
+    return app
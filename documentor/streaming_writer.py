@@ -0,0 +1,93 @@
+import json
+import os
+
+
+class StreamingMarkdownWriter:
+    def __init__(self, partial_path, final_path):
+        """
+        Appends documentation sections to a partial markdown file as soon as they are ready.
+
+        Sections are written in route order even when they complete out of order. A sidecar
+        index records the key and end byte offset of every section on disk, so an interrupted run
+        can resume from the partial file. finish() atomically renames it to the final path.
+
+        :param partial_path: Stable path of the in-progress file (shared between runs on the same API file)
+        :param final_path: Path the finished markdown is renamed to
+        """
+        self.partial_path = partial_path
+        self.index_path = partial_path + ".index"
+        self.final_path = final_path
+        self.next_index = 0
+        self.pending = {}  # index -> (key, text) waiting for earlier sections
+
+    def resume(self, keys):
+        """
+        Keep the sections of a previous interrupted run that match the leading keys.
+
+        Callers put everything a section depends on (route, handler source, prompt) in its key.
+
+        Returns the section texts that were kept, in order. Anything after the first mismatch
+        (or a section written without its index entry) is truncated away.
+        """
+        recorded = []
+        if os.path.exists(self.partial_path) and os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                for line in f:
+                    try:
+                        recorded.append(json.loads(line))
+                    except ValueError:
+                        break  # the last index line may be cut off by a crash
+
+        kept = []
+        for entry, key in zip(recorded, keys):
+            if entry["key"] != key:
+                break
+            kept.append(entry)
+
+        end_offset = kept[-1]["end"] if kept else 0
+        sections = []
+        if kept:
+            # Offsets are in bytes, so sections are sliced before decoding
+            with open(self.partial_path, "rb") as f:
+                content = f.read(end_offset)
+            start = 0
+            for entry in kept:
+                sections.append(content[start:entry["end"]].decode("utf-8"))
+                start = entry["end"]
+
+        # Rewrite both files so they only contain the kept sections
+        with open(self.partial_path, "ab") as f:
+            f.truncate(end_offset)
+        with open(self.index_path, "w") as f:
+            for entry in kept:
+                f.write(json.dumps(entry) + "\n")
+
+        self.next_index = len(kept)
+        return sections
+
+    def add(self, index, key, text):
+        # Buffer out-of-order sections and flush every section that is now contiguous
+        self.pending[index] = (key, text)
+        while self.next_index in self.pending:
+            key, text = self.pending.pop(self.next_index)
+            self.append(key, text)
+            self.next_index += 1
+
+    def append(self, key, text):
+        with open(self.partial_path, "ab") as f:
+            f.write(text.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            end = f.tell()
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps({"key": key, "end": end}) + "\n")
+            f.flush()
+
+    def finish(self):
+        if self.pending:
+            raise RuntimeError(f"{len(self.pending)} sections are still waiting for earlier sections")
+        if not os.path.exists(self.partial_path):
+            open(self.partial_path, "w").close()
+        os.replace(self.partial_path, self.final_path)
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
@@ -0,0 +1,232 @@
+from documentor.ast_extractor import raised_http_errors, literal
+from documentor.compaction import docstring_node
+import ast
+import json
+import re
+import textwrap
+
+# Straight-line handlers longer than this are sent to the LLM whatever their complexity
+MAX_TEMPLATE_STATEMENTS = 8
+
+# Request body media types curl sends as -F form fields
+FORM_MEDIA_TYPES = ("multipart/form-data", "application/x-www-form-urlencoded")
+
+# Placeholder values used in the example request
+EXAMPLE_VALUES = {"int": "1", "float": "1.0", "bool": "true", "str": "example", "integer": "1", "number": "1.0", "boolean": "true", "dict": "{}"}
+
+
+def cyclomatic_complexity(function):
+    """
+    1 + the number of decision points (branches, loops, exception handlers, comprehension
+    clauses and extra boolean operands) in a handler.
+    """
+    complexity = 1
+    for node in ast.walk(function):
+        if isinstance(node, (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler, ast.match_case)):
+            complexity += 1
+        elif isinstance(node, ast.comprehension):
+            complexity += 1 + len(node.ifs)
+        elif isinstance(node, ast.BoolOp):
+            complexity += len(node.values) - 1
+    return complexity
+
+
+def humanize(name):
+    return name.replace("_", " ").strip().capitalize()
+
+
+class TemplateRenderer:
+    def __init__(self, threshold):
+        """
+        Writes the documentation of trivial endpoints from the route model, without an LLM call.
+
+        An endpoint is trivial when its handler's cyclomatic complexity is at most threshold,
+        it has at most MAX_TEMPLATE_STATEMENTS statements and the source of all its dependencies
+        is known. The section lists the methods, the parameters with their defaults, the success
+        status and the HTTPException status codes raised by the handler and its dependencies, and
+        an example request. Everything else goes to the LLM.
+
+        :param threshold: Highest complexity rendered from the template (1 = handlers without branches)
+        """
+        self.threshold = threshold
+        self.trees = {}  # source file -> parsed module, for routes whose code is not the handler source
+        self.rendered = 0
+        self.skipped = 0
+
+    def handler(self, route):
+        """
+        The handler's FunctionDef, from the route's code or, for OpenAPI routes, from its source file.
+        """
+        try:
+            tree = ast.parse(textwrap.dedent(route.code))
+            if tree.body and isinstance(tree.body[0], (ast.FunctionDef, ast.AsyncFunctionDef)):
+                return tree.body[0]
+        except SyntaxError:
+            pass
+        if not route.source_file or not route.source_line:
+            return None
+        if route.source_file not in self.trees:
+            try:
+                with open(route.source_file, "r") as f:
+                    self.trees[route.source_file] = ast.parse(f.read())
+            except (OSError, SyntaxError, UnicodeDecodeError):
+                self.trees[route.source_file] = None
+        tree = self.trees[route.source_file]
+        for node in ast.walk(tree) if tree else []:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if min([decorator.lineno for decorator in node.decorator_list] + [node.lineno]) == route.source_line:
+                    return node
+        return None
+
+    def is_trivial(self, route, function):
+        statements = function.body[1:] if docstring_node(function) else function.body
+        if "Code not found" in route.dependencies:
+            # The errors a dependency defined elsewhere can raise are unknown
+            return False
+        return cyclomatic_complexity(function) <= self.threshold and len(statements) <= MAX_TEMPLATE_STATEMENTS
+
+    def decorator_keyword(self, function, name):
+        for decorator in function.decorator_list:
+            if isinstance(decorator, ast.Call):
+                for keyword in decorator.keywords:
+                    if keyword.arg == name:
+                        return keyword.value
+        return None
+
+    def responses(self, route, function):
+        """
+        [(status code, description)] of the success response and every error the endpoint is known to return.
+        """
+        if route.operation:
+            # OpenAPI routes already hold the declared responses and the errors of handler and dependencies
+            return [
+                (status, "" if response["description"] == "Successful Response" else response["description"])
+                for status, response in route.operation["responses"].items()
+            ]
+        status = literal(self.decorator_keyword(function, "status_code"), None)
+        responses = [(str(status if isinstance(status, int) else 200), "")]
+        errors = [error for code in [ast.unparse(function)] + route.dependencies for error in raised_http_errors(code)]
+        for code, detail in sorted(errors, key=lambda error: error[0]):
+            if (str(code), detail or "") not in responses:
+                responses.append((str(code), detail or ""))
+        return responses
+
+    def response_body(self, route, function):
+        if route.operation:
+            from documentor.openapi_extractor import schema_type
+
+            for status, response in route.operation["responses"].items():
+                if status.startswith("2") and response.get("schema"):
+                    return f"`{schema_type(response['schema'], set())}`"
+        model = self.decorator_keyword(function, "response_model")
+        if model is not None:
+            return f"`{ast.unparse(model)}`"
+        # Handlers returning dict literals: list the keys they can return
+        keys = []
+        for node in ast.walk(function):
+            if isinstance(node, ast.Return) and isinstance(node.value, ast.Dict):
+                keys.extend(key.value for key in node.value.keys if isinstance(key, ast.Constant) and key.value not in keys)
+        return "A JSON object with " + ", ".join(f"`{key}`" for key in keys) if keys else None
+
+    def example_request(self, route, function):
+        annotations = {arg.arg: ast.unparse(arg.annotation) for arg in function.args.args if arg.annotation is not None}
+
+        def example(name, annotation=None):
+            return EXAMPLE_VALUES.get(annotation or annotations.get(name, "str"), "example")
+
+        # FastAPI {name} and Flask <converter:name> placeholders
+        path = re.sub(r"{(\w+)[^}]*}", lambda match: example(match.group(1)), route.path)
+        path = re.sub(r"<(?:(\w+):)?(\w+)>", lambda match: example(match.group(2), match.group(1)), path)
+        query = "&".join(
+            f"{parameter['name']}={example(parameter['name'])}"
+            for parameter in route.query_parameters if parameter["default"] == "required"
+        )
+        command = f"curl -X {route.methods[0]} \"http://localhost:8000{path}{'?' + query if query else ''}\""
+        for parameter in route.header_parameters:
+            if parameter["default"] == "required":
+                command += f" \\\n  -H \"{parameter['name'].replace('_', '-')}: <{parameter['name']}>\""
+        if route.body_parameters:
+            media_type, content = self.request_body(route)
+            if media_type in FORM_MEDIA_TYPES:
+                # Form and file fields; curl sets the multipart Content-Type itself
+                for parameter in route.body_parameters:
+                    file = parameter.get("media_type") == "multipart/form-data" or "UploadFile" in (parameter["annotation"] or "")
+                    value = f"@{parameter['name']}.bin" if file else example(parameter["name"], parameter["annotation"])
+                    command += f" \\\n  -F \"{parameter['name']}={value}\""
+            else:
+                body = json.dumps(content["example"]) if "example" in content else None
+                command += f" \\\n  -H \"Content-Type: {media_type}\" \\\n  -d '" + (body or "{...}") + "'"
+        return command
+
+    def request_body(self, route):
+        """
+        (media type, OpenAPI content entry) of the request body, from the operation when there is one.
+        """
+        if route.operation and route.operation.get("requestBody"):
+            return next(iter(route.operation["requestBody"]["content"].items()), ("application/json", {}))
+        # Like FastAPI: one file field makes the whole body multipart, form fields make it a form
+        media_types = {parameter.get("media_type", "application/json") for parameter in route.body_parameters}
+        return next((media_type for media_type in FORM_MEDIA_TYPES if media_type in media_types), "application/json"), {}
+
+    def parameter_rows(self, route, function):
+        annotations = {arg.arg: ast.unparse(arg.annotation) for arg in function.args.args if arg.annotation is not None}
+        # Flask declares path parameter types with converters, e.g. <int:user_id>
+        converters = {name: converter for converter, name in re.findall(r"<(\w+):(\w+)>", route.path)}
+        rows = [
+            (name, "path", annotations.get(name) or converters.get(name, "str"), "required", "") for name in route.parameters
+        ]
+        for location, parameters in (("query", route.query_parameters), ("header", route.header_parameters),
+                                     ("body", route.body_parameters)):
+            for parameter in parameters:
+                rows.append((
+                    parameter["name"], location, parameter["annotation"] or "any", parameter["default"],
+                    parameter["description"] or ""
+                ))
+        return rows
+
+    def render(self, route):
+        """
+        Markdown documentation of a trivial endpoint, or None when it should be documented by the LLM.
+        """
+        function = self.handler(route)
+        if function is None or not self.is_trivial(route, function):
+            self.skipped += 1
+            return None
+        self.rendered += 1
+        docstring = ast.get_docstring(function)
+        description = docstring.strip().split("\n\n")[0] if docstring else f"{humanize(route.api_name)}."
+        lines = [f"## {humanize(function.name)}", "", description, "", f"**Methods:** {', '.join(route.methods)}", ""]
+
+        rows = self.parameter_rows(route, function)
+        if rows:
+            lines += ["### Parameters", "", "| Name | In | Type | Default | Description |", "|------|----|------|---------|-------------|"]
+            lines += [f"| `{name}` | {location} | `{annotation}` | {default} | {description} |"
+                      for name, location, annotation, default, description in rows]
+            lines.append("")
+
+        lines += ["### Responses", "", "| Status | Description |", "|--------|-------------|"]
+        for status, detail in self.responses(route, function):
+            lines.append(f"| {status} | {detail or ('Success' if status.startswith('2') else '')} |")
+        body = self.response_body(route, function)
+        if body:
+            lines += ["", f"**Response body:** {body}"]
+
+        lines += ["", "### Example request", "", "```bash", self.example_request(route, function), "```"]
+        return "\n".join(lines)
+
+    def stats(self):
+        total = self.rendered + self.skipped
+        return {
+            "threshold": self.threshold,
+            "rendered_from_template": self.rendered,
+            "sent_to_llm": self.skipped,
+            "llm_calls_avoided": self.rendered,
+            "share_rendered": self.rendered / total if total else 0.0,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(
+            f"Template fast path: {stats['rendered_from_template']} of {self.rendered + self.skipped} endpoints rendered "
+            f"without the LLM (complexity <= {self.threshold}), {stats['llm_calls_avoided']} LLM calls avoided"
+        )
@@ -0,0 +1,30 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model):
+    """
+    Return the tiktoken encoding for a model, or None when tiktoken or its encoding files are unavailable.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        try:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            return None
+    except Exception:
+        # tiktoken downloads its encoding files on first use, which fails offline
+        return None
+
+
+def count_tokens(text, model="gpt-4o-mini"):
+    encoding = get_encoding(model)
+    if encoding is None:
+        # Roughly four characters per token for English text and code
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text, disallowed_special=()))
@@ -6,180 +6,190 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import json
 import os
-import re
 import argparse
-from langchain_openai import ChatOpenAI
+from concurrent.futures import ThreadPoolExecutor
+from documentor.llm_cache import LLMResponseCache
+from documentor.llm_backends import create_llm, backend_model_key, LLM_BACKENDS
+from documentor.evaluation_store import EvaluationStore
+from documentor.metrics import RunMetrics
+from documentor.critic import StructuredCritic, CritiqueParseError, extract_json
 from documentor.api_by_api_doc import APIDocumentationGenerator
 from datetime import datetime
 
+# Bump when the evaluation prompt or score parsing changes, so stored critiques are not reused
+RUBRIC_VERSION = "v2"
+
+# Criteria the critic scores from 1 to 10
+CRITERIA = {
+    "completeness": "Does the README include all key sections (Overview, Endpoints, Methods, Parameters, Examples)?",
+    "clarity": "Is the README clear, well-structured, and easy to understand?",
+    "accuracy": "Does the documentation accurately represent the API file content?",
+    "relevance": "Is the documentation relevant and helpful to both technical and non-technical users?"
+}
+
+EVALUATION_INSTRUCTIONS = """You are a meticulous technical documentation reviewer tasked with evaluating API documentation.
+Evaluate each generated README documentation below against the input API file, based on the criteria listed below:
+
+**Evaluation Criteria:**
+""" + "\n".join(
+    f"{number}. **{key.capitalize()}:** {description} Provide a score (1-10)."
+    for number, (key, description) in enumerate(CRITERIA.items(), 1)
+) + """
+
+Justify the scores in the feedback and give brief feedback on areas of improvement."""
+
 class MultiVersionEvaluator:
-    def __init__(self, model, api_file_path, generated_docs, prompt_versions, output_dir):
+    def __init__(self, model, api_file_path, generated_docs, prompt_versions, output_dir, use_cache=True, max_workers=4, reuse=True,
+                 backend="openai", backend_options=None, rate_limits=None, batch_size=4):
         """
         :param model: LLM model name
         :param api_file_path: Path to the original API file
         :param generated_docs: Dictionary of {prompt_version: generated_readme_content}
         :param prompt_versions: List of prompt versions to evaluate
         :param output_dir: Directory to save evaluation results
+        :param use_cache: Reuse cached critic responses for identical prompts (shared with the generators)
+        :param max_workers: Maximum number of critic calls made concurrently
+        :param reuse: Reuse stored critiques of the same API file and documentation instead of re-evaluating
+        :param backend: Name of the LLM backend in documentor.llm_backends.LLM_BACKENDS
+        :param backend_options: Extra keyword arguments for the backend factory
+        :param rate_limits: Settings of the shared rate limiting scheduler (see documentor.rate_limiter)
+        :param batch_size: Maximum number of versions scored in one critic call
         """
         self.model = model
         self.api_file_path = api_file_path
         self.generated_docs = generated_docs  # {version: readme_content}
         self.prompt_versions = prompt_versions
+        self.max_workers = max(1, max_workers)
         self.output_dir = os.path.join(output_dir, "critic_evaluations")
         os.makedirs(self.output_dir, exist_ok=True)
+        self.reuse = reuse
+        self.store = EvaluationStore(os.path.join(self.output_dir, "evaluations.sqlite"))
+        self.cache = LLMResponseCache(os.path.join(output_dir, ".llm_cache")) if use_cache else None
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        # Stored critiques are keyed by the critic; other backends get their own namespace, as in the LLM cache
+        self.evaluator_model = backend_model_key(backend, model)
+        self.rate_limits = rate_limits
+        # Critic calls are reported per prompt version
+        self.metrics = RunMetrics("evaluation", self.model, backend=self.backend)
         self.llm = self.initialize_llm()
+        # Scores come back as JSON validated against a schema; several versions share one call
+        self.critic = StructuredCritic(self.llm, CRITERIA, EVALUATION_INSTRUCTIONS, batch_size=batch_size)
 
     def initialize_llm(self):
-        return ChatOpenAI(model=self.model, temperature=0)
+        options = dict(self.backend_options)
+        if self.backend == "openai":
+            # JSON mode guarantees a parseable critique
+            options.setdefault("model_kwargs", {"response_format": {"type": "json_object"}})
+        # --force re-runs the critic, so cached critic answers are not reused either
+        return create_llm(self.backend, self.model, temperature=0, cache=self.cache, metrics=self.metrics,
+                          rate_limits=self.rate_limits, refresh_cache=not self.reuse, **options)
 
     def load_api_file_content(self):
         with open(self.api_file_path, "r") as file:
             return file.read()
 
-    def evaluate_single_version(self, version, readme_content):
-        # Static evaluation prompt
-        evaluation_prompt = """
-        You are a meticulous technical documentation reviewer tasked with evaluating API documentation. 
-        Evaluate the following generated README documentation based on the criteria listed below:
-
-        **Evaluation Criteria:**
-        1. **Completeness:** Does the README include all key sections (Overview, Endpoints, Methods, Parameters, Examples)? Provide a score (1-10) and justify your score.
-        2. **Clarity:** Is the README clear, well-structured, and easy to understand? Provide a score (1-10) and justify your score.
-        3. **Accuracy:** Does the documentation accurately represent the API file content? Provide a score (1-10) and justify your score.
-        4. **Relevance:** Is the documentation relevant and helpful to both technical and non-technical users? Provide a score (1-10) and justify your score.
-
-        **Input API File Content:**
-        {api_file_content}
-
-        **Generated README:**
-        {generated_readme}
-
-        Provide scores and justification for each criterion. Conclude with an overall score (average of the four criteria) and brief feedback on areas of improvement.
+    def evaluate_versions(self, docs):
         """
+        Score several versions' documentation of the API file in as few critic calls as possible.
 
-        # Load API file content
-        api_file_content = self.load_api_file_content()
-
-        # Format the prompt with API content and README content
-        formatted_prompt = evaluation_prompt.format(
-            api_file_content=api_file_content,
-            generated_readme=readme_content
-        )
+        :param docs: {version: readme_content}
+        Returns {version: (scores, raw_response)}; scores is None when the critique could not be validated.
+        """
+        context = f"**Input API File Content:**\n{self.load_api_file_content()}"
+        versions = list(docs)
+        batches = [versions[start:start + self.critic.batch_size] for start in range(0, len(versions), self.critic.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self.critic.evaluate, context, [docs[version] for version in batch], label="+".join(batch))
+                for batch in batches
+            ]
+            results = {}
+            for batch, future in zip(batches, futures):
+                results.update(zip(batch, future.result()))
+        return results
 
-        # LLM evaluation
-        print(f"Evaluating prompt version: {version}")
-        response = self.llm.invoke(formatted_prompt)
-        return response.content
+    def evaluate_single_version(self, version, readme_content):
+        return self.evaluate_versions({version: readme_content})[version]
 
     def parse_scores(self, evaluation_response):
         """
-        Extract scores for completeness, clarity, accuracy, and relevance from LLM response.
+        Extract the criterion scores from a stored JSON critique; a score that is missing or invalid is None.
         """
+        try:
+            critique = extract_json(evaluation_response)
+        except CritiqueParseError:
+            critique = {}
         scores = {}
-        patterns = {
-            "completeness": r"Completeness:\s*(\d+)/10",
-            "clarity": r"Clarity:\s*(\d+)/10",
-            "accuracy": r"Accuracy:\s*(\d+)/10",
-            "relevance": r"Relevance:\s*(\d+)/10"
-        }
-
-        for key, pattern in patterns.items():
-            match = re.search(pattern, evaluation_response, re.IGNORECASE)
-            if match:
-                scores[key] = int(match.group(1))
-            else:
-                scores[key] = None  # Set to None if the score isn't found
+        for key in CRITERIA:
+            value = critique.get(key) if isinstance(critique, dict) else None
+            scores[key] = value if isinstance(value, int) and 1 <= value <= 10 else None
         return scores
 
-    def check_existing_response(self, version):
+    def check_existing_response(self, version, readme_content):
         """
-        Check if an evaluation file already exists for the given version.
+        Look up a stored evaluation of the same API file and documentation by the same critic and rubric.
         """
-        output_file = os.path.join(self.output_dir, f"evaluation_{version}.json")
-        if os.path.exists(output_file):
-            return output_file
-        return None
-
-    def evaluate_all_versions(self):
-        # Evaluate all versions and store results
-        evaluation_results = {}
-        for version, readme_content in self.generated_docs.items():
-            existing_file = self.check_existing_response(version)
-            if existing_file:
-                choice = input(f"Evaluation for version '{version}' already exists. Reuse it? (y/n): ").strip().lower()
-                if choice == "y":
-                    print(f"Reusing existing evaluation for version '{version}'...")
-                    with open(existing_file, "r") as f:
-                        evaluation_data = json.load(f)
-                        scores = evaluation_data["scores"]
-                else:
-                    print(f"Generating new evaluation for version '{version}'...")
-                    result = self.evaluate_single_version(version, readme_content)
-                    scores = self.parse_scores(result)
-                    self.save_evaluation(version, scores, result)
-            else:
-                print(f"Generating evaluation for version '{version}'...")
-                result = self.evaluate_single_version(version, readme_content)
-                scores = self.parse_scores(result)
-                self.save_evaluation(version, scores, result)
+        return self.store.lookup(self.load_api_file_content(), readme_content, self.evaluator_model, RUBRIC_VERSION)
 
-            evaluation_results[version] = scores
-        return evaluation_results
+    def evaluate_version(self, version, readme_content):
+        return self.evaluate_all_versions({version: readme_content})[version]
 
-    def save_evaluation(self, version, scores, raw_response):
+    def evaluate_all_versions(self, docs=None):
+        """
+        Evaluate {version: readme_content} (default: generated_docs). Stored critiques are reused without
+        prompting, the others are scored together in batched critic calls.
+        """
+        docs = self.generated_docs if docs is None else docs
+        scores = {}
+        pending = {}
+        for version, readme_content in docs.items():
+            existing = self.check_existing_response(version, readme_content) if self.reuse else None
+            if existing:
+                print(f"Reusing existing evaluation for version '{version}'...")
+                scores[version] = existing["scores"]
+            else:
+                pending[version] = readme_content
+
+        if pending:
+            print(f"Generating evaluation for versions: {', '.join(pending)}...")
+            for version, (version_scores, raw_response) in self.evaluate_versions(pending).items():
+                if version_scores is None:
+                    # Not saved, so the next run critiques this version again
+                    print(f"Could not parse the critique of version '{version}'")
+                    scores[version] = self.parse_scores(raw_response)
+                    continue
+                self.save_evaluation(version, version_scores, raw_response, pending[version])
+                scores[version] = version_scores
+        # Keep the results in the order the versions were given
+        return {version: scores[version] for version in docs}
+
+    def save_evaluation(self, version, scores, raw_response, readme_content):
         # Generate a timestamp
         timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         
-        # Append timestamp to the filename
-        output_file = os.path.join(self.output_dir, f"evaluation_{version}_{timestamp}.json")
+        # Append the API file name and timestamp to the filename, versions of several files may be saved in the same second
+        api_file_name = os.path.basename(self.api_file_path).split(".")[0]
+        output_file = os.path.join(self.output_dir, f"evaluation_{version}_{api_file_name}_{timestamp}.json")
         
         # Save structured scores and raw LLM response to JSON
         evaluation_data = {
             "version": version,
+            "api_file": self.api_file_path,
             "timestamp": timestamp,
             "scores": scores,
             "raw_response": raw_response
         }
         with open(output_file, "w") as f:
             json.dump(evaluation_data, f, indent=4)
-        
-        print(f"Evaluation saved: {output_file}")
-
-    def evaluate_single_version(self, version, readme_content):
-        # Static evaluation prompt
-        evaluation_prompt = """
-        You are a meticulous technical documentation reviewer tasked with evaluating API documentation. 
-        Evaluate the following generated README documentation based on the criteria listed below:
-
-        **Evaluation Criteria:**
-        1. **Completeness:** Does the README include all key sections (Overview, Endpoints, Methods, Parameters, Examples)? Provide a score (1-10) and justify your score.
-        2. **Clarity:** Is the README clear, well-structured, and easy to understand? Provide a score (1-10) and justify your score.
-        3. **Accuracy:** Does the documentation accurately represent the API file content? Provide a score (1-10) and justify your score.
-        4. **Relevance:** Is the documentation relevant and helpful to both technical and non-technical users? Provide a score (1-10) and justify your score.
-
-        **Input API File Content:**
-        {api_file_content}
-
-        **Generated README:**
-        {generated_readme}
 
-        Provide scores and justification for each criterion. Conclude with an overall score (average of the four criteria) and brief feedback on areas of improvement.
-        """
-
-        # Load API file content
-        api_file_content = self.load_api_file_content()
-
-        # Format the prompt with API content and README content
-        formatted_prompt = evaluation_prompt.format(
-            api_file_content=api_file_content,
-            generated_readme=readme_content
+        # Index the critique so later runs on the same inputs reuse it
+        self.store.save(
+            self.load_api_file_content(), readme_content, self.evaluator_model, RUBRIC_VERSION, scores, raw_response,
+            prompt_version=version, api_file=self.api_file_path
         )
-
-        # LLM evaluation
-        print(f"Evaluating prompt version: {version}")
-        response = self.llm.invoke(formatted_prompt)
-        return response.content
-
+        
+        print(f"Evaluation saved: {output_file}")
 
     def summarize_results(self, evaluation_results):
         # Print and summarize evaluation feedback
@@ -187,11 +197,17 @@ class MultiVersionEvaluator:
         for version, scores in evaluation_results.items():
             print(f"\nPrompt Version: {version}")
             print(f"Scores: {scores}")
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        api_file_name = os.path.basename(self.api_file_path).split(".")[0]
+        self.metrics.write_report(os.path.join(self.output_dir, f"run_report_{api_file_name}_{timestamp}.json"))
+        if self.cache:
+            self.cache.report()
         print("\nEvaluation Complete. Check the output directory for details.")
 
 
-def get_latest_file(folder_path):
-    files = [os.path.join(folder_path, f) for f in os.listdir(folder_path)]
+def get_latest_file(folder_path, prefix="", suffix=""):
+    # The suffix keeps run reports and manifests next to the markdown from being picked up
+    files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.startswith(prefix) and f.endswith(suffix)]
     return max(files, key=os.path.getctime)
 
 if __name__ == "__main__":
@@ -202,34 +218,110 @@ if __name__ == "__main__":
         default="/Users/neel/Developer/cmpe297_project/sample_inputs/sample_apis.py", 
         help="Path to the input API file."
     )
+    parser.add_argument(
+        "--api_files",
+        nargs="+",
+        help="Evaluate several API files at once (overrides --api_file)."
+    )
     parser.add_argument(
         "--regenerate_file", 
         action="store_true", 
         help="Regenerate documentation files."
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM instead of reusing cached responses."
+    )
+    reuse_group = parser.add_mutually_exclusive_group()
+    reuse_group.add_argument(
+        "--reuse",
+        dest="reuse",
+        action="store_true",
+        default=True,
+        help="Reuse stored critiques of unchanged API files and documentation (default)."
+    )
+    reuse_group.add_argument(
+        "--force",
+        dest="reuse",
+        action="store_false",
+        help="Always run the critic, even when a stored critique exists."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(LLM_BACKENDS),
+        default="openai",
+        help="LLM backend used for generation and critique (default: openai)."
+    )
+    parser.add_argument(
+        "--fake_latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per call for the fake backend (default: 0)."
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help="Requests-per-minute budget shared by generation and critique calls (default: unlimited)."
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Tokens-per-minute budget shared by generation and critique calls (default: unlimited)."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of (API file, prompt version) pairs generated and critiqued concurrently (default: 4)."
+    )
     args = parser.parse_args()
 
     # Input parameters
-    api_file_path = args.api_file  # Set from CLI argument
+    api_files = args.api_files or [args.api_file]  # Set from CLI argument
     output_dir = "/Users/neel/Developer/cmpe297_project/output_docs"
     model = "gpt-4o-mini"
     prompt_versions = ["v1", "v2"]
-    generated_docs = {}
-
-    if args.regenerate_file:
-        for version in prompt_versions:
-            print(f"Generating documentation for version: {version}")
-            generator = APIDocumentationGenerator(model=model, api_file_path=api_file_path, output_dir=output_dir, prompt_version=version,framework="fastapi")
+    backend_options = {"latency": args.fake_latency} if args.backend == "fake" else {}
+    rate_limits = {"rpm": args.rpm, "tpm": args.tpm}
+
+    def load_documentation(api_file_path, version):
+        if args.regenerate_file:
+            print(f"Generating documentation for version: {version} ({api_file_path})")
+            generator = APIDocumentationGenerator(model=model, api_file_path=api_file_path, output_dir=output_dir, prompt_version=version,framework="fastapi", use_cache=not args.no_cache,
+                backend=args.backend, backend_options=backend_options, rate_limits=rate_limits)
             generator.process_and_generate_documentation()
             with open(generator.output_file_path, "r") as f:
-                generated_docs[version] = f.read()
-    else:
-        for version in prompt_versions:
+                readme_content = f.read()
+        else:
             saved_dir = f"{output_dir}/{model}/API-by-API/{version}"
-            latest_file = get_latest_file(saved_dir)
+            latest_file = get_latest_file(saved_dir, os.path.basename(api_file_path).split(".")[0], ".md")
             with open(latest_file, "r") as f:
-                generated_docs[version] = f.read()
+                readme_content = f.read()
+        return readme_content
+
+    # Generate (or load) the documentation of every (API file, prompt version) pair concurrently
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            (api_file_path, version): executor.submit(load_documentation, api_file_path, version)
+            for api_file_path in api_files
+            for version in prompt_versions
+        }
+    evaluators = {
+        api_file_path: MultiVersionEvaluator(
+            model, api_file_path, {version: futures[(api_file_path, version)].result() for version in prompt_versions},
+            prompt_versions, output_dir, use_cache=not args.no_cache, reuse=args.reuse,
+            backend=args.backend, backend_options=backend_options, rate_limits=rate_limits
+        )
+        for api_file_path in api_files
+    }
+
+    # Then critique each file's versions together, one batched critic call per file
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = {api_file_path: executor.submit(evaluator.evaluate_all_versions) for api_file_path, evaluator in evaluators.items()}
 
-    evaluator = MultiVersionEvaluator(model, api_file_path, generated_docs, prompt_versions, output_dir)
-    results = evaluator.evaluate_all_versions()
-    evaluator.summarize_results(results)
+    for api_file_path, evaluator in evaluators.items():
+        print(f"\n=== {api_file_path} ===")
+        evaluator.summarize_results(results[api_file_path].result())
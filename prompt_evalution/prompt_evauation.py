@@ -13,7 +13,11 @@ def load_prompts(prompts_path):
         return json.load(prompts_file)
 
 # Extract API details
-def extract_api_details(file_path, framework):
+def extract_api_details(file_path, framework, extractor="import"):
+    if extractor == "ast":
+        from documentor.ast_extractor import extract_api_details_ast
+        return [route.to_dict() for route in extract_api_details_ast(file_path, framework)]
+
     import importlib.util
     from fastapi.routing import APIRoute
 
@@ -46,10 +50,23 @@ def extract_api_details(file_path, framework):
                 })
     return endpoints
 
+# Criteria the critic scores from 1 to 10
+CRITERIA = {
+    "completeness": "Does the documentation address all aspects of the endpoint, including its purpose, functionality, methods, parameters, outputs, and potential errors? Ensure it covers all details required to confidently use the endpoint without additional clarification.",
+    "clarity": "Is the documentation written in clear, concise, and simple language that can be easily understood by someone unfamiliar with the system? Avoid vague, ambiguous, or overly technical explanations.",
+    "accuracy": "Does the documentation precisely describe the endpoint's behavior and intended functionality without errors, omissions, or contradictions?",
+    "relevance": "Is the documentation focused only on the endpoint's purpose, avoiding unnecessary or confusing details? Ensure it directly answers the user's potential questions.",
+    "professional_tone_and_format": "Is the documentation written in a professional and instructional tone, following best practices in formatting, structure, and conventions for API documentation?"
+}
+
+EVALUATION_INSTRUCTIONS = """You are an API documentation quality expert. Your task is to critically evaluate the quality of the documentation generated for an API endpoint. Imagine you are a new developer or user with no prior knowledge of the system, relying solely on this documentation for understanding and implementation. Assess each response stringently based on the criteria in the schema below and provide a score (1-10) for each.
+If any score is less than 6, briefly explain the shortcomings in that area in the feedback.
+Ensure that your evaluation is very stringent, reflecting the perspective of a developer or user who relies solely on the documentation to fully understand and confidently use the API."""
+
 # Generate and evaluate
 
 def generate_and_evaluate(prompts, apis, generation_llm, evaluation_llm, output_file="results.json"):
-    from statistics import mean
+    from documentor.critic import StructuredCritic
 
     # Initialize chains
     generation_chain = RunnableSequence(
@@ -59,31 +76,7 @@ def generate_and_evaluate(prompts, apis, generation_llm, evaluation_llm, output_
         ), 
         generation_llm
     )
-    evaluation_chain = RunnableSequence(
-        PromptTemplate(
-            input_variables=["response"],
-            template="""
-            You are an API documentation quality expert. Your task is to critically evaluate the quality of the documentation generated for an API endpoint. Imagine you are a new developer or user with no prior knowledge of the system, relying solely on this documentation for understanding and implementation. Assess the response stringently based on the following criteria and provide scores for each:
-            1. **Completeness**: Does the documentation address all aspects of the endpoint, including its purpose, functionality, methods, parameters, outputs, and potential errors? Ensure it covers all details required to confidently use the endpoint without additional clarification. (Score: 1-10)
-            2. **Clarity**: Is the documentation written in clear, concise, and simple language that can be easily understood by someone unfamiliar with the system? Avoid vague, ambiguous, or overly technical explanations. (Score: 1-10)
-            3. **Accuracy**: Does the documentation precisely describe the endpoint's behavior and intended functionality without errors, omissions, or contradictions? (Score: 1-10)
-            4. **Relevance**: Is the documentation focused only on the endpoint's purpose, avoiding unnecessary or confusing details? Ensure it directly answers the user's potential questions. (Score: 1-10)
-            5. **Professional Tone and Format**: Is the documentation written in a professional and instructional tone, following best practices in formatting, structure, and conventions for API documentation? (Score: 1-10)
-
-            Provide your response in the following format:
-            `Completeness:<score>, Clarity:<score>, Accuracy:<score>, Relevance:<score>, Professional Tone and Format:<score>, Overall:<overall_score>`
-
-            Additionally:
-            - Assign an **Overall Score** (average of all the criteria rounded to the nearest whole number).
-            - If any score is less than 6, briefly explain the shortcomings in that area to highlight where the documentation failed to meet expectations.
-
-            Ensure that your evaluation is very stringent, reflecting the perspective of a developer or user who relies solely on the documentation to fully understand and confidently use the API.
-            Response:
-            {response}
-            """
-        ), 
-        evaluation_llm
-    )
+    critic = StructuredCritic(evaluation_llm, CRITERIA, EVALUATION_INSTRUCTIONS, batch_size=len(prompts))
 
     scores = {}
     results = {}
@@ -93,25 +86,25 @@ def generate_and_evaluate(prompts, apis, generation_llm, evaluation_llm, output_
         methods = api['methods']
         parameters = api['parameters']
 
+        responses = {}
         for version, prompt_template in prompts.items():
             # Fill the prompt
             filled_prompt = prompt_template.format(path=path, methods=methods, parameters=parameters)
             
             # Generate response
-            response = generation_chain.invoke({"path": path, "methods": methods, "parameters": parameters, "prompt": filled_prompt})
-            
-            # Evaluate response
-            evaluation = evaluation_chain.invoke({"response": response}).content
-            logging.info(f"Version: {version}, API: {path},\nEvaluation: {evaluation}")
+            responses[version] = generation_chain.invoke({"path": path, "methods": methods, "parameters": parameters, "prompt": filled_prompt})
 
-            # Parse evaluation for scores
-            try:
-                evaluation_scores = {criterion.split(":")[0].strip(): int(criterion.split(":")[1].strip())
-                                     for criterion in evaluation.split(",")}
-                overall_score = evaluation_scores.get("Overall", 0)
-            except (ValueError, IndexError):
+        # Evaluate the responses of all versions in one critic call
+        context = f"Endpoint: {path}\nMethods: {methods}\nParameters: {parameters}"
+        evaluations = critic.evaluate(context, [response.content for response in responses.values()])
+
+        for (version, response), (evaluation_scores, evaluation) in zip(responses.items(), evaluations):
+            logging.info(f"Version: {version}, API: {path},\nEvaluation: {evaluation}")
+            if evaluation_scores is None:
                 logging.error(f"Failed to parse scores for API: {path} with version: {version}")
                 overall_score = 0
+            else:
+                overall_score = evaluation_scores["overall"]
 
             # Accumulate scores
             scores[version] = scores.get(version, 0) + overall_score
@@ -123,6 +116,7 @@ def generate_and_evaluate(prompts, apis, generation_llm, evaluation_llm, output_
                 "parameters": parameters,
                 "response": response,
                 "evaluation": evaluation,
+                "scores": evaluation_scores,
                 "overall_score": overall_score
             }
 
@@ -137,29 +131,22 @@ def generate_and_evaluate(prompts, apis, generation_llm, evaluation_llm, output_
 def parse_results(results):
     parsed_results = {}
     for key, value in results.items():
-        #check the the first 2 characters of the key are the version number
-        version = key[:2]
-        #check if the version number is in the dictionary
-        if version not in results:
-            parsed_results[version] = {}
-        #now we look at evaluation part
-        eval = results[key]['evaluation']
-        #split the evaluation by comma, first 5 elements are the criteria scores
-        individual_evals = eval.split(",")[:5]
-        #split the individual evaluation by colon
-        for individual_eval in individual_evals:
-            #split the individual evaluation by colon
-            print(individual_eval)
-            criterion, score = individual_eval.split(":")
-            #add the criterion and score to the dictionary
-            parsed_results[version][criterion.strip()] = int(score)
+        # the version number is the part of the key before the path
+        version = key.split("_", 1)[0]
+        parsed_results.setdefault(version, {})
+        # the critic returned validated scores, or None when the critique could not be parsed
+        if value["scores"] is None:
+            continue
+        for criterion, score in value["scores"].items():
+            parsed_results[version][criterion] = score
     return parsed_results
 
 
 if __name__=="__main__":
     # Set up LLMs
     generation_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    evaluation_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    # JSON mode, the critic validates the answer against its schema
+    evaluation_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, model_kwargs={"response_format": {"type": "json_object"}})
 
     # File paths and framework
     prompts_file = "prompts.json"
@@ -0,0 +1,118 @@
+import sys
+import os
+
+# Add the root project directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+from documentor.ab_testing import PromptABTest
+from documentor.llm_backends import LLM_BACKENDS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="A/B test api_by_api prompt versions on endpoints sampled across API files, stopping once a winner is clear."
+    )
+    parser.add_argument(
+        "--api_files",
+        nargs="+",
+        required=True,
+        help="API files to sample endpoints from."
+    )
+    parser.add_argument(
+        "--versions",
+        nargs="+",
+        default=["v1", "v2"],
+        help="api_by_api prompt versions to compare (default: v1 v2)."
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=0.05,
+        help="Probability of declaring a winner that is not actually better (default: 0.05)."
+    )
+    parser.add_argument(
+        "--min_samples",
+        type=int,
+        default=5,
+        help="Endpoints evaluated before the first stopping decision (default: 5)."
+    )
+    parser.add_argument(
+        "--max_samples",
+        type=int,
+        default=40,
+        help="Most endpoints evaluated before the test is called inconclusive (default: 40)."
+    )
+    parser.add_argument(
+        "--min_effect",
+        type=float,
+        default=0.0,
+        help="Stop with a tie once every difference in overall score is known to be smaller than this (default: 0, never)."
+    )
+    parser.add_argument(
+        "--critiques",
+        type=int,
+        default=1,
+        help="Critiques averaged per endpoint to reduce critic noise (default: 1)."
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=["import", "ast", "openapi"],
+        default="ast",
+        help="Read routes statically (ast, default), by importing the API files (import) or from their OpenAPI schema (openapi)."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the endpoint sampling and document order (default: 0)."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Endpoints evaluated concurrently per round (default: 4)."
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Do not reuse cached LLM responses."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(LLM_BACKENDS),
+        default="openai",
+        help="LLM backend used for generation and critique (default: openai)."
+    )
+    parser.add_argument(
+        "--fake_latency",
+        type=float,
+        default=0.0,
+        help="Simulated seconds per call for the fake backend (default: 0)."
+    )
+    parser.add_argument(
+        "--rpm",
+        type=int,
+        default=None,
+        help="Requests-per-minute budget shared by generation and critique calls (default: unlimited)."
+    )
+    parser.add_argument(
+        "--tpm",
+        type=int,
+        default=None,
+        help="Tokens-per-minute budget shared by generation and critique calls (default: unlimited)."
+    )
+    args = parser.parse_args()
+
+    # Input parameters
+    output_dir = "/Users/neel/Developer/cmpe297_project/output_docs"
+    model = "gpt-4o-mini"
+    backend_options = {"latency": args.fake_latency} if args.backend == "fake" else {}
+
+    test = PromptABTest(
+        model, args.api_files, args.versions, output_dir, extractor=args.extractor, alpha=args.alpha,
+        min_samples=args.min_samples, max_samples=args.max_samples, min_effect=args.min_effect,
+        critiques_per_sample=args.critiques, workers=args.workers, seed=args.seed, use_cache=not args.no_cache,
+        backend=args.backend, backend_options=backend_options, rate_limits={"rpm": args.rpm, "tpm": args.tpm}
+    )
+    test.run()
@@ -0,0 +1,98 @@
+import argparse
+import uvicorn
+from documentor.service import DocumentationService, create_app
+from documentor.llm_backends import LLM_BACKENDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve API documentation generation over HTTP.")
+    parser.add_argument(
+        '-H', '--host',
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1)."
+    )
+    parser.add_argument(
+        '-P', '--port',
+        type=int,
+        default=8000,
+        help="Port to listen on (default: 8000)."
+    )
+    parser.add_argument(
+        '-o', '--output_dir',
+        default="/Users/neel/Developer/cmpe297_project/output_docs",
+        help="Directory where job files and the response cache are kept (default: /Users/neel/Developer/cmpe297_project/output_docs)."
+    )
+    parser.add_argument(
+        '-md', '--model',
+        default="gpt-4o-mini",
+        help="LLM model to use for generating documentation (default: gpt-4o-mini)."
+    )
+    parser.add_argument(
+        '-b', '--backend',
+        choices=sorted(LLM_BACKENDS),
+        default='openai',
+        help="LLM backend. 'fake' is a deterministic offline model for benchmarking (default: openai)."
+    )
+    parser.add_argument(
+        '--fake_latency',
+        type=float,
+        default=0.0,
+        help="Simulated seconds per call for the fake backend (default: 0)."
+    )
+    parser.add_argument(
+        '-j', '--max_jobs',
+        type=int,
+        default=4,
+        help="Jobs generated at the same time; later jobs wait in the queue (default: 4)."
+    )
+    parser.add_argument(
+        '-c', '--concurrency',
+        type=int,
+        default=4,
+        help="Endpoints (api_by_api) or chunks (bulk, with --chunk_tokens) documented concurrently within a job (default: 4)."
+    )
+    parser.add_argument(
+        '-ct', '--chunk_tokens',
+        type=int,
+        default=None,
+        help="Split bulk uploads larger than this many tokens at route boundaries and document the parts in parallel."
+    )
+    parser.add_argument(
+        '--rpm',
+        type=int,
+        default=None,
+        help="Requests-per-minute budget shared by all jobs (default: unlimited)."
+    )
+    parser.add_argument(
+        '--tpm',
+        type=int,
+        default=None,
+        help="Tokens-per-minute budget shared by all jobs (default: unlimited)."
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Always call the LLM instead of reusing cached responses from <output_dir>/.llm_cache."
+    )
+    args = parser.parse_args()
+
+    backend_options = {"latency": args.fake_latency} if args.backend == 'fake' else {}
+    service = DocumentationService(
+        model=args.model,
+        output_dir=args.output_dir,
+        backend=args.backend,
+        backend_options=backend_options,
+        rate_limits={"rpm": args.rpm, "tpm": args.tpm},
+        use_cache=not args.no_cache,
+        max_jobs=args.max_jobs,
+        concurrency=args.concurrency,
+        chunk_tokens=args.chunk_tokens
+    )
+    try:
+        uvicorn.run(create_app(service), host=args.host, port=args.port)
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
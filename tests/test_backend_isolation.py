@@ -0,0 +1,66 @@
+"""
+A fake-backend run and an OpenAI run of the same model share output_dir/<model>/API-by-API/<version>.
+Nothing the fake backend persisted there (manifest, partial markdown) may end up in the OpenAI run.
+"""
+import os
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from documentor.api_by_api_doc import APIDocumentationGenerator
+from documentor.streaming_writer import StreamingMarkdownWriter
+
+API_FILE = os.path.join(os.path.dirname(__file__), "..", "sample_inputs", "complex_api.py")
+REAL_DOCUMENTATION = "Documentation written by the real backend."
+
+
+class StubOpenAI:
+    # Stands in for the OpenAI chat model so the test needs no network or API key
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return AIMessage(REAL_DOCUMENTATION)
+
+
+def generate(output_dir, backend, **kwargs):
+    llm = StubOpenAI() if backend == "openai" else None
+    generator = APIDocumentationGenerator(
+        "gpt-4o-mini", API_FILE, str(output_dir), "auto", "v1", use_cache=False, backend=backend, llm=llm, **kwargs
+    )
+    generator.process_and_generate_documentation()
+    return generator, llm
+
+
+def read_output(generator):
+    with open(generator.output_file_path, "r") as f:
+        return f.read()
+
+
+def test_incremental_openai_run_does_not_reuse_fake_sections(tmp_path):
+    generate(tmp_path, "fake", incremental=True)
+    generator, llm = generate(tmp_path, "openai", incremental=True)
+
+    endpoints = generator.extract_api_details()
+    assert llm.calls == len(endpoints)
+    assert read_output(generator).count(REAL_DOCUMENTATION) == len(endpoints)
+
+    # A second OpenAI run reuses the OpenAI sections
+    _, llm = generate(tmp_path, "openai", incremental=True)
+    assert llm.calls == 0
+
+
+def test_openai_run_does_not_resume_fake_partial_file(tmp_path, monkeypatch):
+    def crash(writer):
+        raise RuntimeError("interrupted")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(StreamingMarkdownWriter, "finish", crash)
+        with pytest.raises(RuntimeError):
+            generate(tmp_path, "fake")
+
+    generator, llm = generate(tmp_path, "openai")
+    endpoints = generator.extract_api_details()
+    assert llm.calls == len(endpoints)
+    assert read_output(generator).count(REAL_DOCUMENTATION) == len(endpoints)